@@ -1,3 +1,7 @@
+import time
+# Start of this script run, before the heavy imports (the first run's value is the startup baseline)
+SCRIPT_STARTED_AT = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -5,7 +9,6 @@ import joblib
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import plotly.figure_factory as ff
 from datetime import datetime, timedelta
 import warnings
 import json
@@ -16,23 +19,39 @@ import sqlite3
 from hashlib import sha256
 import jwt
 from functools import wraps
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
 from io import BytesIO
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
-from reportlab.lib.units import inch
-import matplotlib.pyplot as plt
-import seaborn as sns
 from PIL import Image as PILImage
 import io
 import re
 import uuid
+import tempfile
+from modules.data_loader import DEFAULTS, validate_schema, optimize_memory
+from modules.dataset_store import SharedDatasetStore
+from modules.jobs import JobManager, DONE, FAILED, CANCELLED
+from modules.model_loader import BackgroundModelLoader, StartupTimings
+from modules.model_registry import ModelRegistry, compare_versions
+from modules.anomaly_detection import (
+    Z_THRESHOLD, acknowledge_anomaly, ensure_anomaly_schema, get_anomalies, is_replayed,
+    rebuild_state, score_transactions
+)
+from modules.period_kpis import PERIODS, ensure_kpi_schema, lifetime_totals, percent_change, period_comparison
+from modules.forecasting import FORECAST_MODELS_TABLE, HORIZONS, forecast_business, last_complete_day
+from modules.data_archive import ARCHIVE_FORMATS, export_archive, import_archive
+from modules.data_export import EXPORT_FORMATS, default_format, export_frame, new_export_path
+from modules.reports import DEFAULT_CACHE_DIR, REPORT_FORMATS, ReportQueue, ensure_report_schema, period_range, report_spec
+from modules.portfolio_reports import batch_specs, bundle_batch, portfolio_spec
+from modules.model_training import (
+    DEFAULT_PARAMS, guess_target, register_result, train_pipeline, train_pipeline_from_csv
+)
+from modules.explainability import (
+    ExplanationCache, attribution_summary, dataset_fingerprint, explain_rows,
+    partial_dependence
+)
+from modules.simulation_engine import (
+    SIMULATION_PARAMETERS, DISTRIBUTIONS, OPTIMIZABLE_PARAMETERS, parameter_label,
+    run_grid_sweep, run_monte_carlo, optimize_scenario, sweep_values
+)
+from modules.predictive_analytics import IncrementalDataset, SortedColumnStats, apply_dataset_scores
 
 warnings.filterwarnings('ignore')
 
@@ -125,6 +144,25 @@ def init_db():
         )
     ''')
     
+    # Reports and rollups scan one business's transactions by date range
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transactions_business_date ON transactions (business_id, date)')
+    
+    # Portfolio reports join all of a user's businesses to their rows
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_business_profiles_user ON business_profiles (user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_inventory_business ON inventory (business_id)')
+    
+    # Fitted forecasting model parameters per business and series
+    cursor.execute(FORECAST_MODELS_TABLE)
+    
+    # Streaming anomaly detector state and flagged anomalies
+    ensure_anomaly_schema(conn)
+    
+    # Per-day sales/expense rollup, kept current by triggers on transactions
+    ensure_kpi_schema(conn)
+    
+    # Write counters that version cached report artifacts
+    ensure_report_schema(conn)
+    
     conn.commit()
     conn.close()
 
@@ -227,7 +265,7 @@ def get_user_businesses(user_id):
     return businesses
 
 def add_transaction(business_id, transaction_type, amount, category, description, receipt_image=None):
-    """Add sales or expense transaction"""
+    """Add sales or expense transaction; returns the anomalies it raised"""
     conn = sqlite3.connect('bizsight.db')
     cursor = conn.cursor()
     
@@ -237,8 +275,15 @@ def add_transaction(business_id, transaction_type, amount, category, description
         VALUES (?, ?, ?, ?, ?, ?)''',
         (business_id, transaction_type, amount, category, description, receipt_image)
     )
+    transaction_id = cursor.lastrowid
+    cursor.execute('SELECT date(date) FROM transactions WHERE id = ?', (transaction_id,))
+    day = cursor.fetchone()[0]
+    # Scored in the same database transaction as the insert
+    anomalies = score_transactions(conn, [(business_id, transaction_id, transaction_type, amount, category, day)])
     conn.commit()
     conn.close()
+    
+    return anomalies
 
 def get_transactions(business_id, start_date=None, end_date=None, transaction_type=None):
     """Get transactions for a business"""
@@ -266,6 +311,36 @@ def get_transactions(business_id, start_date=None, end_date=None, transaction_ty
     
     return transactions
 
+def get_transactions_version(business_id):
+    """Cheap fingerprint of a business's transactions (changes on any insert, edit or delete)"""
+    conn = sqlite3.connect('bizsight.db')
+    cursor = conn.cursor()
+    
+    cursor.execute(
+        'SELECT COUNT(*), MAX(id), SUM(amount), MAX(date) FROM transactions WHERE business_id = ?',
+        (business_id,)
+    )
+    version = cursor.fetchone()
+    conn.close()
+    
+    return version
+
+def get_kpi_totals(business_id):
+    """All-time sales, expenses, profit and margin from the daily rollup"""
+    conn = sqlite3.connect('bizsight.db')
+    totals = lifetime_totals(conn, business_id)
+    conn.close()
+    
+    return totals
+
+def get_period_comparison(business_id, period):
+    """KPIs of the current week/month/quarter against the one before, from the daily rollup"""
+    conn = sqlite3.connect('bizsight.db')
+    comparison = period_comparison(conn, business_id, period)
+    conn.close()
+    
+    return comparison
+
 def add_inventory_item(business_id, item_name, quantity, unit_price, reorder_level=10):
     """Add inventory item"""
     conn = sqlite3.connect('bizsight.db')
@@ -757,68 +832,91 @@ PLOTLY_COLORS = [
 # ============================================================
 # LOAD MODEL - FROM FIRST CODE
 # ============================================================
+MODEL_PATH = "business_sales_profit_pipeline.pkl"
+MODEL_REGISTRY_DIR = "models"
+
 @st.cache_resource
+def get_startup_timings(_started_at):
+    """Process-wide startup milestones, measured from the start of the first script run"""
+    return StartupTimings(_started_at)
+
+@st.cache_resource
+def get_model_registry():
+    """Process-wide registry of versioned profit pipelines"""
+    return ModelRegistry(MODEL_REGISTRY_DIR)
+
+@st.cache_resource
+def get_model_loader():
+    """Background loader for the model active at startup, started once per process"""
+    registry = get_model_registry()
+    if registry.active is None:
+        # No registry yet: load the bundled pipeline and register it once it is ready
+        return BackgroundModelLoader(MODEL_PATH, startup_timings)
+    return BackgroundModelLoader(registry.path(registry.active), startup_timings, registry.active)
+
+# Start loading right away; pages that never predict (login) do not wait for it
+startup_timings = get_startup_timings(SCRIPT_STARTED_AT)
+get_model_loader()
+
 def load_model():
-    try:
-        model = joblib.load("business_sales_profit_pipeline.pkl")
-        return model
-    except FileNotFoundError:
+    """Publish the active registry model, its version and its feature columns"""
+    global model, MODEL_VERSION, REQUIRED_COLUMNS
+    registry = get_model_registry()
+    loader = get_model_loader()
+    if not loader.ready:
+        with st.spinner("Loading prediction model..."):
+            loader.get()
+    
+    if loader.model is not None:
+        if loader.version is None:
+            loader.version = registry.register_existing(MODEL_PATH, loader.model, "Bundled baseline model")['version']
+        registry.adopt(loader.version, loader.model)
+    
+    # Pick up versions activated by other sessions or processes (hot swap)
+    registry.refresh()
+    active = registry.active
+    model = None
+    if active is not None:
+        try:
+            if registry.is_loaded(active):
+                model = registry.load(active)
+            else:
+                with st.spinner(f"Loading model {active}..."):
+                    model = registry.load(active)
+        except Exception as e:
+            st.error(f"Error loading model {active}: {str(e)}")
+    elif isinstance(loader.error, FileNotFoundError):
         st.error("Model file not found. Using demonstration mode.")
-        return None
-    except Exception as e:
-        st.error(f"Error loading model: {str(e)}")
-        return None
+    elif loader.error is not None:
+        st.error(f"Error loading model: {str(loader.error)}")
+    
+    if model is not None:
+        MODEL_VERSION = active
+        REQUIRED_COLUMNS = model.feature_names_in_.tolist()
+    return model
 
-model = load_model()
+# Set by load_model() before any page that predicts; cache keys include MODEL_VERSION
+model = None
+MODEL_VERSION = "demo"
 
 # ============================================================
 # REQUIRED SCHEMA - FROM FIRST CODE
 # ============================================================
-if model:
-    REQUIRED_COLUMNS = model.feature_names_in_.tolist()
-else:
-    # Default columns if model is not available
-    REQUIRED_COLUMNS = [
-        "city_tier", "customer_rating", "electricity_cost", "inventory_level",
-        "avg_employee_salary", "conversion_rate", "is_festival_season",
-        "avg_transaction_value", "avg_daily_footfall", "rent_cost",
-        "supplier_cost", "discount_percentage", "business_type", "city",
-        "store_size_sqft", "logistics_cost", "years_of_operation",
-        "profit_margin", "marketing_roi", "employee_efficiency",
-        "marketing_spend", "employee_count"
-    ]
-
-DEFAULTS = {
-    "city_tier": 1,
-    "customer_rating": 4.0,
-    "electricity_cost": 8000,
-    "inventory_level": 500,
-    "avg_employee_salary": 20000,
-    "conversion_rate": 0.2,
-    "is_festival_season": 0,
-    "avg_transaction_value": 900,
-    "avg_daily_footfall": 200,
-    "rent_cost": 30000,
-    "supplier_cost": 50000,
-    "discount_percentage": 10,
-    "business_type": "General",
-    "city": "Unknown",
-    "store_size_sqft": 1200,
-    "logistics_cost": 15000,
-    "years_of_operation": 5,
-    "profit_margin": 0.2,
-    "marketing_roi": 2.0,
-    "employee_efficiency": 50000,
-    "marketing_spend": 50000,
-    "employee_count": 10,
-}
+# Default columns if model is not available; load_model() replaces them with the model's features
+REQUIRED_COLUMNS = [
+    "city_tier", "customer_rating", "electricity_cost", "inventory_level",
+    "avg_employee_salary", "conversion_rate", "is_festival_season",
+    "avg_transaction_value", "avg_daily_footfall", "rent_cost",
+    "supplier_cost", "discount_percentage", "business_type", "city",
+    "store_size_sqft", "logistics_cost", "years_of_operation",
+    "profit_margin", "marketing_roi", "employee_efficiency",
+    "marketing_spend", "employee_count"
+]
 
 def align_schema(df):
-    """Ensure the dataframe has all required columns"""
-    for col in REQUIRED_COLUMNS:
-        if col not in df.columns:
-            df[col] = DEFAULTS.get(col, 0)
-    return df[REQUIRED_COLUMNS]
+    """Ensure the dataframe has all required columns with valid types"""
+    aligned, _ = validate_schema(df, REQUIRED_COLUMNS)
+    return aligned
 
 # ============================================================
 # SESSION STATE INITIALIZATION
@@ -837,121 +935,424 @@ if 'current_business_name' not in st.session_state:
 # For analytics section
 if 'data_loaded' not in st.session_state:
     st.session_state.data_loaded = False
-if 'df_raw' not in st.session_state:
-    st.session_state.df_raw = None
-if 'df' not in st.session_state:
-    st.session_state.df = None
 
 # ============================================================
 # LOAD AND PROCESS DATA FUNCTION
 # ============================================================
+def generate_advanced_sample_data():
+    """Generate the advanced sample dataset (50K enhanced business profiles)"""
+    np.random.seed(42)
+    n_samples = 50000
+    
+    sample_data = {
+        'business_id': [f'BUS_{i:06d}' for i in range(n_samples)],
+        'city': np.random.choice(['Mumbai', 'Delhi', 'Bangalore', 'Chennai', 'Kolkata', 'Hyderabad', 
+                                 'Pune', 'Ahmedabad', 'Jaipur', 'Lucknow'], n_samples),
+        'state': np.random.choice(['Maharashtra', 'Delhi', 'Karnataka', 'Tamil Nadu', 'West Bengal',
+                                  'Telangana', 'Gujarat', 'Rajasthan', 'Uttar Pradesh'], n_samples),
+        'region': np.random.choice(['North', 'South', 'East', 'West', 'Central'], n_samples),
+        'city_tier': np.random.choice([1, 2, 3], n_samples, p=[0.3, 0.4, 0.3]),
+        'business_type': np.random.choice(['Retail', 'Restaurant', 'Services', 'Manufacturing', 
+                                          'E-commerce', 'Healthcare', 'Education', 'Entertainment'], n_samples),
+        'years_of_operation': np.random.randint(1, 30, n_samples),
+        'store_size_sqft': np.random.randint(500, 10000, n_samples),
+        'employee_count': np.random.randint(5, 200, n_samples),
+        'employee_efficiency': np.random.randint(20000, 200000, n_samples),
+        'avg_employee_salary': np.random.randint(20000, 80000, n_samples),
+        'avg_daily_footfall': np.random.randint(50, 2000, n_samples),
+        'conversion_rate': np.random.uniform(0.05, 0.5, n_samples),
+        'avg_transaction_value': np.random.randint(500, 5000, n_samples),
+        'customer_rating': np.random.uniform(2.5, 5.0, n_samples),
+        'discount_percentage': np.random.uniform(0, 40, n_samples),
+        'rent_cost': np.random.randint(10000, 200000, n_samples),
+        'electricity_cost': np.random.randint(5000, 30000, n_samples),
+        'logistics_cost': np.random.randint(5000, 50000, n_samples),
+        'supplier_cost': np.random.randint(20000, 200000, n_samples),
+        'inventory_level': np.random.randint(1000, 100000, n_samples),
+        'marketing_spend': np.random.randint(10000, 300000, n_samples),
+        'marketing_roi': np.random.uniform(1.0, 5.0, n_samples),
+        'is_festival_season': np.random.choice([0, 1], n_samples, p=[0.8, 0.2]),
+        'profit_margin': np.random.uniform(-0.1, 0.4, n_samples),
+        'monthly_sales': np.random.randint(100000, 2000000, n_samples),
+        'operational_cost': np.random.randint(50000, 500000, n_samples),
+        'monthly_revenue': np.random.randint(150000, 2500000, n_samples),
+        'sales_per_sqft': np.random.randint(100, 2000, n_samples),
+        'profit_per_employee': np.random.randint(-5000, 50000, n_samples),
+        'cost_to_sales_ratio': np.random.uniform(0.3, 0.8, n_samples),
+        'employee_productivity': np.random.randint(10000, 150000, n_samples),
+        'risk_category': np.random.choice(['Low', 'Medium', 'High'], n_samples, p=[0.5, 0.3, 0.2]),
+        'business_size': np.random.choice(['Small', 'Medium', 'Large'], n_samples, p=[0.4, 0.4, 0.2])
+    }
+    
+    df = pd.DataFrame(sample_data)
+    df['profit'] = df['monthly_sales'] * df['profit_margin']
+    df['total_cost'] = df['operational_cost'] + df['employee_count'] * df['avg_employee_salary'] / 12
+    df['gross_margin'] = (df['monthly_revenue'] - df['operational_cost']) / df['monthly_revenue'].replace(0, 1)
+    df['inventory_turnover'] = df['monthly_sales'] / df['inventory_level'].replace(0, 1)
+    df['employee_contribution'] = df['profit_per_employee'] * df['employee_count']
+    df['marketing_efficiency'] = df['monthly_sales'] / df['marketing_spend'].replace(0, 1)
+    df['roi_category'] = pd.cut(df['marketing_roi'], bins=[0, 1.5, 3, 10], labels=['Low', 'Medium', 'High'])
+    
+    return df
+
+def generate_sample_data():
+    """Generate the original sample dataset (100K business records)"""
+    np.random.seed(42)
+    n_samples = 100000
+    
+    sample_data = {
+        "city_tier": np.random.choice([1, 2, 3], n_samples, p=[0.4, 0.4, 0.2]),
+        "customer_rating": np.random.uniform(3.0, 5.0, n_samples),
+        "electricity_cost": np.random.randint(5000, 15000, n_samples),
+        "inventory_level": np.random.randint(100, 5000, n_samples),
+        "avg_employee_salary": np.random.randint(15000, 40000, n_samples),
+        "conversion_rate": np.random.uniform(0.1, 0.4, n_samples),
+        "is_festival_season": np.random.choice([0, 1], n_samples, p=[0.7, 0.3]),
+        "avg_transaction_value": np.random.randint(500, 2000, n_samples),
+        "avg_daily_footfall": np.random.randint(50, 500, n_samples),
+        "rent_cost": np.random.randint(10000, 50000, n_samples),
+        "supplier_cost": np.random.randint(20000, 100000, n_samples),
+        "discount_percentage": np.random.randint(0, 30, n_samples),
+        "business_type": np.random.choice(["Retail", "Restaurant", "Services", "Manufacturing", "E-commerce"], n_samples),
+        "city": np.random.choice(["Mumbai", "Delhi", "Bangalore", "Chennai", "Kolkata", "Hyderabad"], n_samples),
+        "store_size_sqft": np.random.randint(500, 5000, n_samples),
+        "logistics_cost": np.random.randint(5000, 30000, n_samples),
+        "years_of_operation": np.random.randint(1, 20, n_samples),
+        "profit_margin": np.random.uniform(0.1, 0.4, n_samples),
+        "marketing_roi": np.random.uniform(1.5, 4.0, n_samples),
+        "employee_efficiency": np.random.randint(20000, 100000, n_samples),
+        "marketing_spend": np.random.randint(10000, 200000, n_samples),
+        "employee_count": np.random.randint(5, 50, n_samples),
+        "month": np.random.randint(1, 13, n_samples),
+        "year": np.random.choice([2022, 2023, 2024], n_samples),
+    }
+    
+    df = pd.DataFrame(sample_data)
+    
+    return df
+
+# Rows per parse/predict chunk; background jobs report progress and check for cancellation between chunks
+INGEST_CHUNK_ROWS = 20000
+
+def read_business_file(file, file_name, job=None):
+    """Parse an uploaded CSV/Excel file and normalize its column names"""
+    if file_name.endswith('.csv'):
+        if job is None:
+            df = pd.read_csv(file)
+        else:
+            chunks = []
+            for chunk in pd.read_csv(file, chunksize=INGEST_CHUNK_ROWS):
+                job.check_cancelled()
+                chunks.append(chunk)
+                job.update(rows_done=job.rows_done + len(chunk))
+            df = pd.concat(chunks, ignore_index=True)
+    else:
+        df = pd.read_excel(file)
+    
+    df.columns = df.columns.str.lower().str.strip().str.replace(" ", "_")
+    return df
+
+@st.cache_data
+def read_upload_columns(file_id, file_name, _file):
+    """Normalized column names of an uploaded file, read from its header only"""
+    try:
+        buffer = BytesIO(_file.getvalue())
+        if file_name.endswith('.csv'):
+            header = pd.read_csv(buffer, nrows=0)
+        else:
+            header = pd.read_excel(buffer, nrows=0)
+    except Exception as e:
+        st.error(f"Error loading file: {str(e)}")
+        return []
+    return header.columns.str.lower().str.strip().str.replace(" ", "_").tolist()
+
 @st.cache_data
 def load_data(file=None, sample=False, advanced_sample=False):
     """Load data from uploaded file or generate sample data"""
     if advanced_sample:
-        # Advanced sample data from second code
-        np.random.seed(42)
-        n_samples = 50000
-        
-        sample_data = {
-            'business_id': [f'BUS_{i:06d}' for i in range(n_samples)],
-            'city': np.random.choice(['Mumbai', 'Delhi', 'Bangalore', 'Chennai', 'Kolkata', 'Hyderabad', 
-                                     'Pune', 'Ahmedabad', 'Jaipur', 'Lucknow'], n_samples),
-            'state': np.random.choice(['Maharashtra', 'Delhi', 'Karnataka', 'Tamil Nadu', 'West Bengal',
-                                      'Telangana', 'Gujarat', 'Rajasthan', 'Uttar Pradesh'], n_samples),
-            'region': np.random.choice(['North', 'South', 'East', 'West', 'Central'], n_samples),
-            'city_tier': np.random.choice([1, 2, 3], n_samples, p=[0.3, 0.4, 0.3]),
-            'business_type': np.random.choice(['Retail', 'Restaurant', 'Services', 'Manufacturing', 
-                                              'E-commerce', 'Healthcare', 'Education', 'Entertainment'], n_samples),
-            'years_of_operation': np.random.randint(1, 30, n_samples),
-            'store_size_sqft': np.random.randint(500, 10000, n_samples),
-            'employee_count': np.random.randint(5, 200, n_samples),
-            'employee_efficiency': np.random.randint(20000, 200000, n_samples),
-            'avg_employee_salary': np.random.randint(20000, 80000, n_samples),
-            'avg_daily_footfall': np.random.randint(50, 2000, n_samples),
-            'conversion_rate': np.random.uniform(0.05, 0.5, n_samples),
-            'avg_transaction_value': np.random.randint(500, 5000, n_samples),
-            'customer_rating': np.random.uniform(2.5, 5.0, n_samples),
-            'discount_percentage': np.random.uniform(0, 40, n_samples),
-            'rent_cost': np.random.randint(10000, 200000, n_samples),
-            'electricity_cost': np.random.randint(5000, 30000, n_samples),
-            'logistics_cost': np.random.randint(5000, 50000, n_samples),
-            'supplier_cost': np.random.randint(20000, 200000, n_samples),
-            'inventory_level': np.random.randint(1000, 100000, n_samples),
-            'marketing_spend': np.random.randint(10000, 300000, n_samples),
-            'marketing_roi': np.random.uniform(1.0, 5.0, n_samples),
-            'is_festival_season': np.random.choice([0, 1], n_samples, p=[0.8, 0.2]),
-            'profit_margin': np.random.uniform(-0.1, 0.4, n_samples),
-            'monthly_sales': np.random.randint(100000, 2000000, n_samples),
-            'operational_cost': np.random.randint(50000, 500000, n_samples),
-            'monthly_revenue': np.random.randint(150000, 2500000, n_samples),
-            'sales_per_sqft': np.random.randint(100, 2000, n_samples),
-            'profit_per_employee': np.random.randint(-5000, 50000, n_samples),
-            'cost_to_sales_ratio': np.random.uniform(0.3, 0.8, n_samples),
-            'employee_productivity': np.random.randint(10000, 150000, n_samples),
-            'risk_category': np.random.choice(['Low', 'Medium', 'High'], n_samples, p=[0.5, 0.3, 0.2]),
-            'business_size': np.random.choice(['Small', 'Medium', 'Large'], n_samples, p=[0.4, 0.4, 0.2])
-        }
-        
-        df = pd.DataFrame(sample_data)
-        df['profit'] = df['monthly_sales'] * df['profit_margin']
-        df['total_cost'] = df['operational_cost'] + df['employee_count'] * df['avg_employee_salary'] / 12
-        df['gross_margin'] = (df['monthly_revenue'] - df['operational_cost']) / df['monthly_revenue'].replace(0, 1)
-        df['inventory_turnover'] = df['monthly_sales'] / df['inventory_level'].replace(0, 1)
-        df['employee_contribution'] = df['profit_per_employee'] * df['employee_count']
-        df['marketing_efficiency'] = df['monthly_sales'] / df['marketing_spend'].replace(0, 1)
-        df['roi_category'] = pd.cut(df['marketing_roi'], bins=[0, 1.5, 3, 10], labels=['Low', 'Medium', 'High'])
-        
+        df = generate_advanced_sample_data()
     elif sample:
-        # Original sample data from first code
-        np.random.seed(42)
-        n_samples = 100000
-        
-        sample_data = {
-            "city_tier": np.random.choice([1, 2, 3], n_samples, p=[0.4, 0.4, 0.2]),
-            "customer_rating": np.random.uniform(3.0, 5.0, n_samples),
-            "electricity_cost": np.random.randint(5000, 15000, n_samples),
-            "inventory_level": np.random.randint(100, 5000, n_samples),
-            "avg_employee_salary": np.random.randint(15000, 40000, n_samples),
-            "conversion_rate": np.random.uniform(0.1, 0.4, n_samples),
-            "is_festival_season": np.random.choice([0, 1], n_samples, p=[0.7, 0.3]),
-            "avg_transaction_value": np.random.randint(500, 2000, n_samples),
-            "avg_daily_footfall": np.random.randint(50, 500, n_samples),
-            "rent_cost": np.random.randint(10000, 50000, n_samples),
-            "supplier_cost": np.random.randint(20000, 100000, n_samples),
-            "discount_percentage": np.random.randint(0, 30, n_samples),
-            "business_type": np.random.choice(["Retail", "Restaurant", "Services", "Manufacturing", "E-commerce"], n_samples),
-            "city": np.random.choice(["Mumbai", "Delhi", "Bangalore", "Chennai", "Kolkata", "Hyderabad"], n_samples),
-            "store_size_sqft": np.random.randint(500, 5000, n_samples),
-            "logistics_cost": np.random.randint(5000, 30000, n_samples),
-            "years_of_operation": np.random.randint(1, 20, n_samples),
-            "profit_margin": np.random.uniform(0.1, 0.4, n_samples),
-            "marketing_roi": np.random.uniform(1.5, 4.0, n_samples),
-            "employee_efficiency": np.random.randint(20000, 100000, n_samples),
-            "marketing_spend": np.random.randint(10000, 200000, n_samples),
-            "employee_count": np.random.randint(5, 50, n_samples),
-            "month": np.random.randint(1, 13, n_samples),
-            "year": np.random.choice([2022, 2023, 2024], n_samples),
-        }
-        
-        df = pd.DataFrame(sample_data)
+        df = generate_sample_data()
     else:
         try:
-            if file.name.endswith('.csv'):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-            
-            df.columns = df.columns.str.lower().str.strip().str.replace(" ", "_")
+            df = read_business_file(file, file.name)
         except Exception as e:
             st.error(f"Error loading file: {str(e)}")
             return pd.DataFrame()
     
-    df.fillna(method='ffill', inplace=True)
-    df.fillna(0, inplace=True)
+    # Remaining gaps in model features are defaulted (and reported) by validate_schema
+    df.ffill(inplace=True)
     
     return df
 
+# ============================================================
+# DATA ENRICHMENT PIPELINE
+# ============================================================
+def predict_profit(df, job=None):
+    """Model predictions in row chunks, reporting progress to ``job`` if given"""
+    predictions = []
+    for start in range(0, len(df), INGEST_CHUNK_ROWS):
+        if job is not None:
+            job.check_cancelled()
+        predictions.append(model.predict(df.iloc[start:start + INGEST_CHUNK_ROWS]))
+        if job is not None:
+            job.update(rows_done=min(start + INGEST_CHUNK_ROWS, len(df)))
+    startup_timings.mark("first_prediction")
+    return np.concatenate(predictions) if predictions else np.empty(0, dtype=np.float32)
+
+def score_rows(df_raw, key_column=None, job=None):
+    """Row-level pipeline: schema validation, derived metrics and model prediction"""
+    # Validate, coerce and align the model features
+    df, schema_report = validate_schema(df_raw, REQUIRED_COLUMNS)
+    if key_column:
+        df.insert(0, key_column, df_raw[key_column].to_numpy())
+    
+    # Calculate monthly_sales
+    df["monthly_sales"] = (
+        df["avg_daily_footfall"] * df["conversion_rate"] * df["avg_transaction_value"] * 30
+    )
+    
+    # Add derived metrics
+    df["sales_per_sqft"] = df["monthly_sales"] / df["store_size_sqft"].replace(0, 1)
+    df["sales_per_employee"] = df["monthly_sales"] / df["employee_count"].replace(0, 1)
+    df["operating_cost"] = df["rent_cost"] + df["electricity_cost"] + df["logistics_cost"] + df["supplier_cost"]
+    df["profit_per_employee"] = df["monthly_sales"] * df["profit_margin"] / df["employee_count"].replace(0, 1)
+    df["cost_to_sales_ratio"] = df["operating_cost"] / df["monthly_sales"].replace(0, 1)
+    df["roi_per_employee"] = df["employee_efficiency"] / df["avg_employee_salary"].replace(0, 1)
+    
+    # Model prediction
+    if model:
+        if job is not None:
+            job.update(rows_done=0, total_rows=len(df), phase="Scoring")
+        df["predicted_profit"] = predict_profit(df, job)
+    else:
+        # Generate synthetic predictions for demonstration
+        np.random.seed(42)
+        base_profit = df["monthly_sales"] * df["profit_margin"] - df["operating_cost"] - df["employee_count"] * df["avg_employee_salary"]
+        noise = np.random.normal(0, 0.1 * abs(base_profit).mean(), len(df))
+        df["predicted_profit"] = np.maximum(base_profit + noise, 0)
+    
+    # Add advanced scores
+    df['profitability_score'] = (df['profit_margin'].clip(-0.5, 0.5) * 0.4 + 
+                                (df['customer_rating'].clip(1, 5) / 5) * 0.3 + 
+                                (1 - df['cost_to_sales_ratio'].clip(0, 1)) * 0.3) * 100
+    
+    df['growth_potential'] = ((df['years_of_operation'].clip(0, 30) / 30) * 0.3 +
+                             (df['city_tier'].clip(1, 3) / 3) * 0.2 +
+                             (df['employee_count'].clip(1, 200) / 200) * 0.3 +
+                             (df['store_size_sqft'].clip(500, 10000) / 10000) * 0.2) * 100
+    
+    return df, schema_report
+
+def enrich_dataset(df_raw, key_column=None, job=None):
+    """Validate, score and enrich a raw dataset for the analytics dashboard"""
+    if job is not None:
+        job.update(rows_done=0, total_rows=len(df_raw), phase="Validating")
+    df, schema_report = score_rows(df_raw, key_column, job)
+    
+    # Risk bands, efficiency score and performance tiers are relative to the whole dataset
+    if job is not None:
+        job.check_cancelled()
+        job.update(rows_done=len(df), phase="Ranking")
+    apply_dataset_scores(df, SortedColumnStats.from_frame(df))
+    
+    # Categoricals for low-cardinality strings, narrow numerics
+    df, memory_report = optimize_memory(df, source=df_raw)
+    
+    return df, schema_report, memory_report
+
+def ingest_upload(job, file_bytes, file_name, key_column=None):
+    """Background job: parse, score and enrich an uploaded file into an incremental dataset"""
+    # Line count is a cheap row estimate for CSV parse progress
+    estimate = file_bytes.count(b"\n") if file_name.endswith('.csv') else 0
+    job.update(rows_done=0, total_rows=estimate, phase="Parsing")
+    df_raw = read_business_file(BytesIO(file_bytes), file_name, job)
+    del file_bytes
+    
+    # Remaining gaps in model features are defaulted (and reported) by validate_schema
+    df_raw.ffill(inplace=True)
+    if df_raw.empty:
+        raise ValueError("The uploaded file has no rows")
+    if key_column:
+        if key_column not in df_raw.columns:
+            raise ValueError(f"Key column '{key_column}' not found in the uploaded file")
+        # Same rule as appended deltas: the last row of each key wins
+        df_raw = df_raw.drop_duplicates(key_column, keep="last", ignore_index=True)
+    
+    df, schema_report, memory_report = enrich_dataset(df_raw, key_column, job)
+    return {
+        'dataset': IncrementalDataset(df, score_rows, key_column),
+        'schema_report': schema_report,
+        'memory_report': memory_report,
+    }
+
+@st.cache_resource
+def get_job_manager():
+    """Process-wide thread pool for ingestion and scoring jobs"""
+    return JobManager(max_workers=max(2, (os.cpu_count() or 2) // 2))
+
+# ============================================================
+# EXPLAINABILITY
+# ============================================================
+@st.cache_resource
+def get_explanation_cache():
+    """Process-wide cache of attributions and partial dependence curves"""
+    return ExplanationCache()
+
+def get_dataset_fingerprint(df):
+    """Fingerprint of an analytics frame, memoized while the frame object is unchanged"""
+    cached = st.session_state.get('analytics_fingerprint')
+    if cached is not None and cached[0] is df:
+        return cached[1]
+    fingerprint = dataset_fingerprint(df, REQUIRED_COLUMNS)
+    st.session_state.analytics_fingerprint = (df, fingerprint)
+    return fingerprint
+
+def explain_dataset(job, df, cache_key, sample_rows=None, exact=True):
+    """Background job: feature attributions for (a seeded sample of) the dataset"""
+    if sample_rows is None or sample_rows >= len(df):
+        positions = np.arange(len(df))
+    else:
+        positions = np.sort(np.random.default_rng(42).choice(len(df), sample_rows, replace=False))
+    job.update(rows_done=0, total_rows=len(positions), phase="Explaining")
+    result = explain_rows(
+        model, df.iloc[positions], REQUIRED_COLUMNS,
+        exact=exact, chunk_rows=2000 if exact else 20000, job=job
+    )
+    result['positions'] = positions
+    # The page reads attributions from the cache, so the job keeps no reference to them
+    get_explanation_cache().put(cache_key, result)
+
+# ============================================================
+# MODEL TRAINING
+# ============================================================
+# CSV uploads larger than this default to streaming (external-memory) training
+EXTERNAL_MEMORY_BYTES = 200 * 1024 * 1024
+
+def train_model(job, file_bytes, file_name, target, base_pipeline, base_version, continue_training,
+                params, holdout, early_stopping_rounds, external_memory, activate):
+    """Background job: train a profit pipeline on an uploaded file and register it"""
+    options = dict(
+        base_pipeline=base_pipeline,
+        continue_training=continue_training,
+        params=params,
+        holdout=holdout,
+        early_stopping_rounds=early_stopping_rounds,
+        job=job
+    )
+    # Line count is a cheap row estimate for parse/scan progress
+    estimate = file_bytes.count(b"\n") if file_name.endswith('.csv') else 0
+    job.update(rows_done=0, total_rows=estimate, phase="Parsing")
+    if external_memory:
+        # Spill the upload to disk and stream it; only one chunk is parsed at a time
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, "training.csv")
+            with open(path, "wb") as f:
+                f.write(file_bytes)
+            del file_bytes
+            result = train_pipeline_from_csv(path, target, **options)
+    else:
+        df = read_business_file(BytesIO(file_bytes), file_name, job)
+        del file_bytes
+        result = train_pipeline(df, target, **options)
+    
+    job.update(phase="Registering")
+    entry = register_result(
+        get_model_registry(), result, target, file_name,
+        parent=base_version if continue_training else None, activate=activate
+    )
+    return {'version': entry['version'], 'metrics': result['metrics'], 'stats': result['stats'], 'activated': activate}
+
+# ============================================================
+# REPORT QUEUE
+# ============================================================
+@st.cache_resource
+def get_report_queue():
+    """Process pool rendering reports into a shared on-disk artifact cache"""
+    return ReportQueue(
+        DEFAULT_CACHE_DIR,
+        'bizsight.db',
+        max_workers=max(1, min(4, (os.cpu_count() or 2) // 2))
+    )
+
+def build_report(job, spec):
+    """Background job: render a report on the process pool and wait for the artifact"""
+    report_queue = get_report_queue()
+    job.update(phase="Queued")
+    path, future = report_queue.submit(spec)
+    while not future.done():
+        if job.cancel_requested:
+            # Only still-queued renders can be withdrawn; a running one finishes into the cache
+            future.cancel()
+            job.check_cancelled()
+        if future.running():
+            job.update(phase="Rendering")
+        time.sleep(0.2)
+    return {'spec': spec, 'path': path, 'seconds': future.result()}
+
+def build_report_batch(job, user_id, report_format, period, start_date, end_date, detail):
+    """Background job: render every business's own report on the process pool and zip them"""
+    conn = sqlite3.connect('bizsight.db')
+    specs = batch_specs(conn, user_id, report_format, period, start_date, end_date, detail)
+    conn.close()
+    path = new_export_path("zip")
+    stats = bundle_batch(get_report_queue(), specs, path, job=job)
+    return {'request': (user_id, report_format, period, start_date, end_date, detail), 'path': path, **stats}
+
+# ============================================================
+# DATA EXPORT
+# ============================================================
+def export_dataset(job, df, fmt, columns):
+    """Background job: write the analyzed frame to a compressed temp file in chunks"""
+    path = new_export_path(EXPORT_FORMATS[fmt]['extension'])
+    stats = export_frame(df, path, fmt, columns, job=job)
+    return {'path': path, 'format': fmt, **stats}
+
+def archive_business(job, business_id, fmt):
+    """Background job: stream a business's data and receipts into a zip archive"""
+    path = new_export_path("zip")
+    stats = export_archive('bizsight.db', business_id, path, fmt, job=job)
+    return {'path': path, 'format': fmt, **stats}
+
+def restore_archive(job, file_bytes, business_id):
+    """Background job: bulk-import an uploaded archive into a business"""
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "archive.zip")
+        with open(path, "wb") as f:
+            f.write(file_bytes)
+        del file_bytes
+        return import_archive('bizsight.db', path, business_id=business_id, job=job)
+
+# ============================================================
+# FORECASTING
+# ============================================================
+@st.cache_data(max_entries=256, show_spinner=False)
+def get_business_forecast(business_id, transactions_version, last_day):
+    """Daily sale/expense forecasts, recomputed only when transactions change or a day closes"""
+    return forecast_business('bizsight.db', business_id)
+
+# Canonical datasets enriched once per process and shared by every session
+SAMPLE_DATASETS = {
+    "Use sample data (100K records)": ("sample_100k", generate_sample_data),
+    "Use advanced sample dataset (50K records)": ("advanced_sample_50k", generate_advanced_sample_data),
+}
+
+@st.cache_resource
+def get_dataset_store():
+    """Process-wide store of read-only, memory-mapped enriched datasets"""
+    return SharedDatasetStore(Path(tempfile.gettempdir()) / "bizsight_datasets")
+
+def get_shared_dataset(data_source):
+    """Return the shared enriched view and its reports for a sample data source"""
+    dataset_key, generator = SAMPLE_DATASETS[data_source]
+    store_key = f"{dataset_key}_{MODEL_VERSION}"
+    
+    def build():
+        df, schema_report, memory_report = enrich_dataset(generator())
+        return df, {'schema_report': schema_report, 'memory_report': memory_report}
+    
+    return get_dataset_store().get(store_key, build)
+
 # ============================================================
 # AUTHENTICATION PAGE
 # ============================================================
@@ -1129,7 +1530,7 @@ def show_transaction_management():
         
         if st.button("Save Transaction", type="primary"):
             if amount > 0 and category:
-                add_transaction(
+                anomalies = add_transaction(
                     st.session_state.current_business_id,
                     transaction_type.lower(),
                     amount,
@@ -1138,6 +1539,9 @@ def show_transaction_management():
                     receipt_image
                 )
                 st.success(f"✅ {transaction_type} transaction recorded successfully!")
+                for anomaly in anomalies:
+                    # Toasts survive the rerun below
+                    st.toast(f"🚨 {describe_anomaly(anomaly[2], anomaly[3], anomaly[4], anomaly[6], anomaly[7])}")
                 st.rerun()
             else:
                 st.warning("⚠️ Please fill in amount and category")
@@ -1430,124 +1834,140 @@ def show_inventory_management():
 # ============================================================
 # REPORT GENERATION MODULE
 # ============================================================
-def generate_pdf_report(business_name, transactions, inventory, period="Monthly"):
-    """Generate PDF report using ReportLab"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1E3A8A'),
-        spaceAfter=30,
-        alignment=1  # Center
+def show_report_builder(report_period, report_format, start_date=None, end_date=None, detail=False):
+    """Report of the current business for the chosen period"""
+    try:
+        start_date, end_date = period_range(report_period, start_date, end_date)
+    except ValueError as e:
+        st.warning(f"⚠️ {e}")
+        return
+    
+    spec = report_spec(
+        st.session_state.current_business_id,
+        st.session_state.current_business_name,
+        report_format,
+        report_period,
+        start_date,
+        end_date,
+        detail
+    )
+    show_report_artifact(
+        spec,
+        f"{report_period} {report_format} report",
+        "Generate Report",
+        f"{st.session_state.current_business_name}_{report_period}_Report_{end_date.strftime('%Y%m%d')}",
+        "report"
+    )
+
+def show_report_artifact(spec, job_label, button_label, file_stem, key):
+    """Queue a report render, poll its job and serve cached artifacts; ``key`` prefixes the job and widget keys"""
+    report_queue = get_report_queue()
+    job_manager = get_job_manager()
+    job_id = st.session_state.get(f'{key}_job_id')
+    job = job_manager.get(job_id) if job_id else None
+    
+    # An unchanged report for unchanged data is served straight from the artifact cache
+    artifact = report_queue.cached(spec)
+    if artifact is None and st.button(button_label, type="primary", disabled=job is not None and not job.finished, key=f"{key}_generate"):
+        job = job_manager.submit(job_label, build_report, spec)
+        st.session_state[f'{key}_job_id'] = job.id
+    
+    if job is not None and job.result is not None and job.result['spec'] != spec:
+        job = None
+    if artifact is None and job is not None:
+        if not job.finished:
+            st.info(f"⏳ {job.label}: {job.phase.lower()}")
+            show_job_progress(job.id)
+        elif job.status == FAILED:
+            st.error(f"❌ Report generation failed: {job.error}")
+        elif job.status == CANCELLED:
+            st.warning("⚠️ Report generation cancelled")
+    
+    if artifact is not None:
+        if job is not None and job.status == DONE and job.result['spec'] == spec:
+            st.success(f"✅ Report generated in {job.result['seconds']:.1f}s")
+        else:
+            st.success("✅ Report is up to date with your data")
+        file_format = REPORT_FORMATS[spec['report_format']]
+        st.download_button(
+            label=f"📥 Download {spec['report_format']} Report",
+            data=artifact.read_bytes(),
+            file_name=f"{file_stem}.{file_format['extension']}",
+            mime=file_format['mime'],
+            key=f"{key}_download"
+        )
+
+def show_portfolio_reports(report_period, report_format, start_date=None, end_date=None, detail=False):
+    """One consolidated report over all of the user's businesses, or each business's report in a zip"""
+    businesses = get_user_businesses(st.session_state.user_id)
+    if len(businesses) < 2:
+        return
+    try:
+        start_date, end_date = period_range(report_period, start_date, end_date)
+    except ValueError:
+        # Already reported by the business report builder
+        return
+    
+    st.markdown("### Portfolio Reports")
+    mode = st.radio(
+        f"Report on all {len(businesses)} businesses",
+        ["Consolidated report", "Separate report per business (zip)"],
+        horizontal=True,
+        key="portfolio_mode"
     )
     
-    story.append(Paragraph(f"BizSight AI - {period} Business Report", title_style))
-    story.append(Paragraph(f"Business: {business_name}", styles['Normal']))
-    story.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
-    story.append(Spacer(1, 20))
+    if mode == "Consolidated report":
+        spec = portfolio_spec(
+            st.session_state.user_id,
+            st.session_state.username,
+            report_format,
+            report_period,
+            start_date,
+            end_date
+        )
+        show_report_artifact(
+            spec,
+            f"{report_period} {report_format} portfolio report",
+            "Generate Portfolio Report",
+            f"Portfolio_{report_period}_Report_{end_date.strftime('%Y%m%d')}",
+            "portfolio_report"
+        )
+        return
     
-    # Executive Summary
-    story.append(Paragraph("Executive Summary", styles['Heading2']))
+    request = (st.session_state.user_id, report_format, report_period, start_date, end_date, detail)
+    job_manager = get_job_manager()
+    job_id = st.session_state.get('portfolio_batch_job_id')
+    job = job_manager.get(job_id) if job_id else None
+    if job is not None and job.result is not None and job.result['request'] != request:
+        job = None
     
-    if transactions:
-        df_trans = pd.DataFrame(
-            transactions,
-            columns=['ID', 'Business ID', 'Type', 'Amount', 'Category', 'Description', 'Date', 'Receipt', 'Created At']
+    if st.button("Generate All Business Reports", type="primary", disabled=job is not None and not job.finished, key="portfolio_batch_generate"):
+        job = job_manager.submit(f"{len(businesses)} {report_period} {report_format} reports", build_report_batch, *request)
+        st.session_state.portfolio_batch_job_id = job.id
+    
+    if job is None:
+        return
+    if not job.finished:
+        st.info(f"⏳ {job.label}: {job.phase.lower()}")
+        show_job_progress(job.id)
+    elif job.status == FAILED:
+        st.error(f"❌ Report generation failed: {job.error}")
+    elif job.status == CANCELLED:
+        st.warning("⚠️ Report generation cancelled")
+    elif os.path.exists(job.result['path']):
+        result = job.result
+        st.success(
+            f"✅ {result['reports']} reports ready in {result['seconds']:.1f}s "
+            f"({result['cached']} already up to date)"
         )
-        
-        total_sales = df_trans[df_trans['Type'] == 'sale']['Amount'].sum()
-        total_expenses = df_trans[df_trans['Type'] == 'expense']['Amount'].sum()
-        net_profit = total_sales - total_expenses
-        
-        summary_data = [
-            ['Metric', 'Value'],
-            ['Total Sales', f"₹{total_sales:,.2f}"],
-            ['Total Expenses', f"₹{total_expenses:,.2f}"],
-            ['Net Profit', f"₹{net_profit:,.2f}"],
-            ['Profit Margin', f"{(net_profit/total_sales*100) if total_sales > 0 else 0:.1f}%"]
-        ]
-        
-        summary_table = Table(summary_data)
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1E3A8A')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(summary_table)
-        story.append(Spacer(1, 20))
-    
-    # Transaction Summary
-    if transactions:
-        story.append(Paragraph("Transaction Summary", styles['Heading2']))
-        
-        trans_data = [['Date', 'Type', 'Category', 'Amount (₹)']]
-        for trans in transactions[:20]:  # Limit to 20 for report
-            trans_data.append([
-                trans[6][:10] if trans[6] else '',
-                trans[2].title(),
-                trans[4],
-                f"{trans[3]:,.2f}"
-            ])
-        
-        trans_table = Table(trans_data)
-        trans_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3B82F6')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ALIGN', (3, 1), (3, -1), 'RIGHT')
-        ]))
-        
-        story.append(trans_table)
-        story.append(Spacer(1, 20))
-    
-    # Inventory Summary
-    if inventory:
-        story.append(Paragraph("Inventory Summary", styles['Heading2']))
-        
-        inv_data = [['Item Name', 'Quantity', 'Unit Price (₹)', 'Total Value (₹)', 'Status']]
-        for item in inventory:
-            status = '⚠️ Low Stock' if item[3] <= item[5] else '✅ OK'
-            inv_data.append([
-                item[2],
-                str(item[3]),
-                f"{item[4]:,.2f}",
-                f"{item[3] * item[4]:,.2f}",
-                status
-            ])
-        
-        inv_table = Table(inv_data)
-        inv_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10B981')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ALIGN', (1, 1), (3, -1), 'RIGHT')
-        ]))
-        
-        story.append(inv_table)
-    
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
+        with open(result['path'], 'rb') as f:
+            st.download_button(
+                label=f"📥 Download {result['reports']} Reports (zip)",
+                data=f,
+                file_name=f"Business_Reports_{report_period}_{end_date.strftime('%Y%m%d')}.zip",
+                mime="application/zip",
+                key="portfolio_batch_download"
+            )
 
 def show_report_generation():
     """Display report generation interface"""
@@ -1569,59 +1989,27 @@ def show_report_generation():
         
         with col2:
             report_format = st.selectbox("Report Format", ["PDF", "Excel"])
+            report_detail = report_format == "PDF" and st.checkbox(
+                "Full transaction detail",
+                help="List every transaction of the period with category subtotals instead of the 20 most recent",
+                key="report_detail"
+            )
         
-        if st.button("Generate Report", type="primary"):
-            with st.spinner("Generating report..."):
-                # Get data
-                transactions = get_transactions(st.session_state.current_business_id)
-                inventory = get_inventory(st.session_state.current_business_id)
-                
-                if report_format == "PDF":
-                    pdf_buffer = generate_pdf_report(
-                        st.session_state.current_business_name,
-                        transactions,
-                        inventory,
-                        report_period
-                    )
-                    
-                    st.download_button(
-                        label="📥 Download PDF Report",
-                        data=pdf_buffer,
-                        file_name=f"{st.session_state.current_business_name}_{report_period}_Report_{datetime.now().strftime('%Y%m%d')}.pdf",
-                        mime="application/pdf"
-                    )
-                    
-                    st.success("✅ Report generated successfully!")
-                else:
-                    # Excel format
-                    df_trans = pd.DataFrame(
-                        transactions,
-                        columns=['ID', 'Business ID', 'Type', 'Amount', 'Category', 'Description', 'Date', 'Receipt', 'Created At']
-                    ) if transactions else pd.DataFrame()
-                    
-                    df_inv = pd.DataFrame(
-                        inventory,
-                        columns=['ID', 'Business ID', 'Item Name', 'Quantity', 'Unit Price', 'Reorder Level', 'Last Updated']
-                    ) if inventory else pd.DataFrame()
-                    
-                    # Create Excel file
-                    excel_buffer = BytesIO()
-                    with pd.ExcelWriter(excel_buffer, engine='xlsxwriter') as writer:
-                        if not df_trans.empty:
-                            df_trans.to_excel(writer, sheet_name='Transactions', index=False)
-                        if not df_inv.empty:
-                            df_inv.to_excel(writer, sheet_name='Inventory', index=False)
-                    
-                    excel_buffer.seek(0)
-                    
-                    st.download_button(
-                        label="📥 Download Excel Report",
-                        data=excel_buffer,
-                        file_name=f"{st.session_state.current_business_name}_{report_period}_Report_{datetime.now().strftime('%Y%m%d')}.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                    )
-                    
-                    st.success("✅ Excel report generated successfully!")
+        show_report_builder(
+            report_period,
+            report_format,
+            start_date if report_period == "Custom Range" else None,
+            end_date if report_period == "Custom Range" else None,
+            report_detail
+        )
+        
+        show_portfolio_reports(
+            report_period,
+            report_format,
+            start_date if report_period == "Custom Range" else None,
+            end_date if report_period == "Custom Range" else None,
+            report_detail
+        )
     
     with tab2:
         st.markdown("### Schedule Automated Reports")
@@ -1665,14 +2053,593 @@ def show_report_generation():
         
         if scheduled:
             for report in scheduled:
-                report_type = "Weekly" if report[3] == "weekly" else "Monthly"
-                st.info(f"📧 {report_type} reports to {report[4]} (Day: {report[5]})")
+                report_type = "Weekly" if report[2] == "weekly" else "Monthly"
+                last_sent = f", last sent {report[6]}" if report[6] else ", not sent yet"
+                st.info(f"📧 {report_type} reports to {report[3]} (Day: {report[4]}{last_sent})")
         else:
             st.info("📭 No scheduled reports yet.")
 
 # ============================================================
 # ANALYTICS MODULE (FROM FIRST CODE)
 # ============================================================
+def show_grid_sweep(base_scenario):
+    """Sweep two or three simulator parameters over a grid and chart predicted profit"""
+    params = st.multiselect(
+        "Parameters to Sweep",
+        list(SIMULATION_PARAMETERS),
+        default=["marketing_spend", "avg_daily_footfall"],
+        max_selections=3,
+        format_func=lambda p: SIMULATION_PARAMETERS[p]['label'],
+        key="sim_grid_params"
+    )
+    if len(params) < 2:
+        st.info("💡 Select two or three parameters to sweep")
+        return
+    
+    # A form keeps range edits from rerunning the page until the sweep is submitted
+    with st.form("sim_grid_form"):
+        axes = {}
+        range_cols = st.columns(len(params))
+        for param, col in zip(params, range_cols):
+            spec = SIMULATION_PARAMETERS[param]
+            with col:
+                low, high = st.slider(
+                    spec['label'],
+                    spec['min'],
+                    spec['max'],
+                    spec['range'],
+                    key=f"sim_grid_range_{param}"
+                )
+                steps = st.number_input("Points", 2, 1000, 50 if len(params) == 3 else 100, key=f"sim_grid_steps_{param}")
+                axes[param] = (low, high, steps)
+        submitted = st.form_submit_button("Run Grid Sweep", type="primary")
+    
+    if submitted:
+        axes = {param: sweep_values(param, low, high, steps) for param, (low, high, steps) in axes.items()}
+        n_points = int(np.prod([len(values) for values in axes.values()]))
+        if n_points > 1_000_000:
+            st.error(f"❌ Grid has {n_points:,} points; reduce the points per axis (max 1,000,000)")
+        else:
+            st.session_state.sim_grid_result = run_grid_sweep(model, base_scenario, axes, REQUIRED_COLUMNS)
+    
+    result = st.session_state.get('sim_grid_result')
+    if result is None or list(result['axes']) != params:
+        return
+    
+    axis_names = list(result['axes'])
+    profit = result['profit']
+    sales = result['sales']
+    
+    metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
+    with metric_col1:
+        st.metric("Grid Points Scored", f"{result['n_points']:,}")
+    with metric_col2:
+        st.metric("Sweep Runtime", f"{result['seconds']:.3f}s")
+    with metric_col3:
+        st.metric("Points / Second", f"{result['points_per_sec']:,.0f}")
+    with metric_col4:
+        best = np.unravel_index(np.argmax(profit), profit.shape)
+        st.metric("Best Predicted Profit", f"₹{profit[best]:,.0f}")
+    
+    best_scenario = {
+        SIMULATION_PARAMETERS[name]['label']: result['axes'][name][idx]
+        for name, idx in zip(axis_names, best)
+    }
+    st.caption("Best grid point: " + ", ".join(f"{label} = {value:,.2f}" for label, value in best_scenario.items()))
+    
+    # Three-parameter sweeps are charted one slice of the third axis at a time
+    if len(axis_names) == 3:
+        third = axis_names[2]
+        third_values = result['axes'][third].tolist()
+        slice_value = st.select_slider(
+            SIMULATION_PARAMETERS[third]['label'],
+            options=third_values,
+            value=third_values[best[2]],
+            key="sim_grid_slice"
+        )
+        slice_idx = third_values.index(slice_value)
+        profit = profit[:, :, slice_idx]
+        sales = sales[:, :, slice_idx]
+    
+    x_name, y_name = axis_names[0], axis_names[1]
+    x_label = SIMULATION_PARAMETERS[x_name]['label']
+    y_label = SIMULATION_PARAMETERS[y_name]['label']
+    chart_type = st.radio("Chart", ["Heatmap", "Surface"], horizontal=True, key="sim_grid_chart")
+    if chart_type == "Heatmap":
+        fig = go.Figure(go.Heatmap(
+            x=result['axes'][x_name],
+            y=result['axes'][y_name],
+            z=profit.T,
+            colorscale='RdYlGn',
+            colorbar=dict(title="Profit (₹)"),
+            customdata=sales.T,
+            hovertemplate=f"{x_label}: %{{x}}<br>{y_label}: %{{y}}<br>Profit: ₹%{{z:,.0f}}<br>Sales: ₹%{{customdata:,.0f}}<extra></extra>"
+        ))
+        fig.update_layout(xaxis_title=x_label, yaxis_title=y_label)
+    else:
+        fig = go.Figure(go.Surface(
+            x=result['axes'][x_name],
+            y=result['axes'][y_name],
+            z=profit.T,
+            colorscale='RdYlGn',
+            colorbar=dict(title="Profit (₹)")
+        ))
+        fig.update_layout(scene=dict(xaxis_title=x_label, yaxis_title=y_label, zaxis_title="Profit (₹)"))
+    fig.update_layout(title="Predicted Monthly Profit", height=550)
+    st.plotly_chart(fig, use_container_width=True)
+
+def show_profit_drivers(dataset, mask):
+    """Feature attributions and partial dependence for the loaded dataset (cached)"""
+    if not model:
+        st.info("💡 Profit driver analysis needs the trained model; it is unavailable in demonstration mode")
+        return
+    
+    fingerprint = get_dataset_fingerprint(dataset)
+    version = MODEL_VERSION
+    cache = get_explanation_cache()
+    
+    control_col1, control_col2, control_col3 = st.columns([2, 2, 1])
+    with control_col1:
+        method = st.radio(
+            "Attribution Method",
+            ["Exact (TreeSHAP)", "Fast (approximate)"],
+            horizontal=True,
+            key="explain_method"
+        )
+    with control_col2:
+        row_options = [n for n in [5_000, 20_000] if n < len(dataset)] + [None]
+        sample_rows = st.selectbox(
+            "Rows to Explain",
+            row_options,
+            format_func=lambda n: f"All {len(dataset):,} rows" if n is None else f"Sample of {n:,}",
+            key="explain_rows"
+        )
+    exact = method.startswith("Exact")
+    cache_key = ("contribs", fingerprint, version, exact, sample_rows)
+    explanation = cache.get(cache_key)
+    
+    job_manager = get_job_manager()
+    job_id = st.session_state.get('analytics_explain_job_id')
+    job = job_manager.get(job_id) if job_id else None
+    with control_col3:
+        st.markdown("<br>", unsafe_allow_html=True)
+        if st.button("Compute", type="primary", key="explain_run", disabled=explanation is not None or (job is not None and not job.finished)):
+            job = job_manager.submit("Explain dataset", explain_dataset, dataset, cache_key, sample_rows, exact)
+            st.session_state.analytics_explain_job_id = job.id
+    
+    if job is not None and not job.finished:
+        show_job_progress(job.id)
+    elif job is not None and job.status == FAILED:
+        st.error(f"❌ Attribution failed: {job.error}")
+    
+    if explanation is None:
+        st.caption(f"Attributions are cached per dataset ({fingerprint}) and model version ({version})")
+    else:
+        # Narrow the explained rows to the active filters without recomputing
+        positions = explanation['positions']
+        contributions = explanation['contributions']
+        if mask is not None and not mask.all():
+            keep = mask[positions]
+            positions = positions[keep]
+            contributions = contributions[keep]
+        
+        if len(positions) == 0:
+            st.warning("⚠️ No explained rows match the current filters")
+        else:
+            summary = attribution_summary(contributions, explanation['columns'])
+            top = summary.head(15).iloc[::-1]
+            
+            driver_col1, driver_col2 = st.columns(2)
+            with driver_col1:
+                fig = px.bar(top, x='Mean |Contribution|', y='Feature', orientation='h',
+                            title=f'Global Feature Importance ({len(positions):,} rows)',
+                            color='Mean |Contribution|', color_continuous_scale='Blues')
+                st.plotly_chart(fig, use_container_width=True)
+            with driver_col2:
+                fig = px.bar(top, x='Mean Contribution', y='Feature', orientation='h',
+                            title='Average Effect on Predicted Profit',
+                            color='Mean Contribution', color_continuous_scale='RdYlGn')
+                st.plotly_chart(fig, use_container_width=True)
+            
+            # Single-row breakdown from the cached matrix
+            row_number = st.number_input(
+                "Explain Row (position within the explained rows)",
+                0, len(positions) - 1, 0,
+                key="explain_row_number"
+            )
+            row_contrib = pd.Series(contributions[row_number], index=explanation['columns'])
+            row_top = row_contrib.reindex(row_contrib.abs().sort_values(ascending=False).index[:10])
+            other = row_contrib.sum() - row_top.sum()
+            fig = go.Figure(go.Waterfall(
+                x=["Base value"] + row_top.index.tolist() + ["Other features", "Prediction"],
+                y=[explanation['bias']] + row_top.tolist() + [other, 0],
+                measure=["absolute"] + ["relative"] * (len(row_top) + 1) + ["total"],
+            ))
+            fig.update_layout(title=f"Profit Breakdown for Dataset Row {positions[row_number]:,}", height=450)
+            st.plotly_chart(fig, use_container_width=True)
+    
+    # Partial dependence from batched grid predictions
+    pd_col1, pd_col2 = st.columns([1, 3])
+    with pd_col1:
+        pd_feature = st.selectbox(
+            "Partial Dependence Feature",
+            REQUIRED_COLUMNS,
+            index=REQUIRED_COLUMNS.index('marketing_spend') if 'marketing_spend' in REQUIRED_COLUMNS else 0,
+            key="explain_pd_feature"
+        )
+        pd_grid = st.slider("Grid Points", 5, 50, 20, key="explain_pd_grid")
+        pd_sample = st.select_slider("Sample Rows", [250, 500, 1000, 2000, 5000], value=1000, key="explain_pd_sample")
+    pd_key = ("pdp", fingerprint, version, pd_feature, pd_grid, pd_sample)
+    curve = cache.get(pd_key)
+    if curve is None:
+        curve = partial_dependence(model, dataset, REQUIRED_COLUMNS, pd_feature, pd_grid, pd_sample)
+        cache.put(pd_key, curve)
+    with pd_col2:
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=curve['grid'], y=curve['p90'], mode='lines', line=dict(width=0), showlegend=False))
+        fig.add_trace(go.Scatter(x=curve['grid'], y=curve['p10'], mode='lines', line=dict(width=0),
+                                fill='tonexty', fillcolor='rgba(59, 130, 246, 0.2)', name='P10-P90'))
+        fig.add_trace(go.Scatter(x=curve['grid'], y=curve['average'], mode='lines+markers', name='Average prediction'))
+        fig.update_layout(
+            title=f"Partial Dependence of Profit on {pd_feature} ({curve['sample_rows']:,} rows)",
+            xaxis_title=pd_feature,
+            yaxis_title="Predicted Profit (₹)",
+            height=400
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+def show_model_comparison(dataset, mask):
+    """Score the loaded dataset with two registry versions side by side"""
+    registry = get_model_registry()
+    versions = [entry['version'] for entry in registry.versions()]
+    if len(versions) < 2:
+        st.info("💡 Register a second model version (e.g. by retraining) to compare versions")
+        return
+    
+    compare_col1, compare_col2, compare_col3 = st.columns([2, 2, 1])
+    with compare_col1:
+        version_a = st.selectbox("Version A", versions, index=versions.index(MODEL_VERSION) if MODEL_VERSION in versions else 0, key="compare_version_a")
+    with compare_col2:
+        others = [v for v in versions if v != version_a]
+        version_b = st.selectbox("Version B", others, index=len(others) - 1, key="compare_version_b")
+    
+    cache_key = ("compare", get_dataset_fingerprint(dataset), version_a, version_b)
+    cache = get_explanation_cache()
+    comparison = cache.get(cache_key)
+    with compare_col3:
+        st.markdown("<br>", unsafe_allow_html=True)
+        if st.button("Compare", type="primary", key="compare_run", disabled=comparison is not None):
+            with st.spinner(f"Scoring {len(dataset):,} rows with {version_a} and {version_b}..."):
+                start = time.perf_counter()
+                predictions_a, predictions_b = compare_versions(registry.load(version_a), registry.load(version_b), dataset)
+                comparison = {
+                    'a': predictions_a,
+                    'b': predictions_b,
+                    'seconds': time.perf_counter() - start,
+                }
+            cache.put(cache_key, comparison)
+    
+    if comparison is None:
+        return
+    
+    predictions_a = comparison['a']
+    predictions_b = comparison['b']
+    if mask is not None and not mask.all():
+        predictions_a = predictions_a[mask]
+        predictions_b = predictions_b[mask]
+    if len(predictions_a) == 0:
+        st.warning("⚠️ No rows match the current filters")
+        return
+    difference = predictions_b - predictions_a
+    
+    # Risk bands (profit terciles) under each version
+    bands_a = pd.qcut(predictions_a, 3, labels=False, duplicates='drop')
+    bands_b = pd.qcut(predictions_b, 3, labels=False, duplicates='drop')
+    
+    metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
+    with metric_col1:
+        st.metric(f"Mean Profit ({version_a})", f"₹{predictions_a.mean():,.0f}")
+    with metric_col2:
+        st.metric(f"Mean Profit ({version_b})", f"₹{predictions_b.mean():,.0f}", f"₹{difference.mean():,.0f}")
+    with metric_col3:
+        st.metric("Mean Absolute Change", f"₹{np.abs(difference).mean():,.0f}")
+    with metric_col4:
+        st.metric("Risk Band Changes", f"{(bands_a != bands_b).mean() * 100:.1f}%")
+    st.caption(
+        f"Correlation {np.corrcoef(predictions_a, predictions_b)[0, 1]:.4f} · "
+        f"{len(comparison['a']):,} rows scored by both versions in {comparison['seconds']:.2f}s"
+    )
+    
+    chart_col1, chart_col2 = st.columns(2)
+    with chart_col1:
+        sample = np.random.default_rng(42).choice(len(predictions_a), min(2000, len(predictions_a)), replace=False)
+        fig = px.scatter(x=predictions_a[sample], y=predictions_b[sample], opacity=0.5,
+                        labels={'x': f'{version_a} Predicted Profit', 'y': f'{version_b} Predicted Profit'},
+                        title='Prediction Agreement')
+        low, high = float(min(predictions_a.min(), predictions_b.min())), float(max(predictions_a.max(), predictions_b.max()))
+        fig.add_shape(type='line', x0=low, y0=low, x1=high, y1=high, line=dict(dash='dash', color='gray'))
+        st.plotly_chart(fig, use_container_width=True)
+    with chart_col2:
+        counts, edges = np.histogram(difference, bins=60)
+        fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges)))
+        fig.update_layout(title=f'Prediction Change ({version_b} − {version_a})',
+                         xaxis_title='Profit Change (₹)', yaxis_title='Rows', bargap=0)
+        st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment
+def show_monte_carlo(base_scenario, dataset):
+    """Monte Carlo simulation over per-parameter distributions (reruns only this panel)"""
+    numeric_params = [p for p, v in base_scenario.items() if not isinstance(v, str)]
+    params = st.multiselect(
+        "Uncertain Parameters",
+        numeric_params,
+        default=["marketing_spend", "avg_daily_footfall", "conversion_rate", "avg_transaction_value"],
+        format_func=parameter_label,
+        key="sim_mc_params"
+    )
+    if not params:
+        st.info("💡 Select at least one parameter to randomize; the rest stay at the scenario values above")
+        return
+    
+    distributions = {}
+    empirical = {}
+    for param in params:
+        base_value = float(base_scenario[param])
+        has_empirical = param in dataset.columns
+        dist_col, first_col, second_col = st.columns([2, 1, 1])
+        with dist_col:
+            dist = st.selectbox(
+                parameter_label(param),
+                DISTRIBUTIONS if has_empirical else DISTRIBUTIONS[:2],
+                key=f"sim_mc_dist_{param}"
+            )
+        if dist == "Normal":
+            with first_col:
+                mean = st.number_input("Mean", value=base_value, key=f"sim_mc_mean_{param}")
+            with second_col:
+                std = st.number_input("Std Dev", min_value=0.0, value=abs(base_value) * 0.1, key=f"sim_mc_std_{param}")
+            distributions[param] = {"dist": dist, "mean": mean, "std": std}
+        elif dist == "Uniform":
+            with first_col:
+                low = st.number_input("Low", value=base_value * 0.8, key=f"sim_mc_low_{param}")
+            with second_col:
+                high = st.number_input("High", value=base_value * 1.2, key=f"sim_mc_high_{param}")
+            distributions[param] = {"dist": dist, "low": min(low, high), "high": max(low, high)}
+        else:
+            # Bootstrap from the loaded (filtered) dataset
+            values = dataset[param].to_numpy()
+            with first_col:
+                st.metric("Dataset Median", f"{np.median(values):,.2f}")
+            with second_col:
+                st.metric("Values", f"{len(values):,}")
+            distributions[param] = {"dist": dist}
+            empirical[param] = values
+    
+    run_col1, run_col2, run_col3 = st.columns([2, 1, 1])
+    with run_col1:
+        n_samples = st.select_slider(
+            "Samples",
+            options=[10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000],
+            value=100_000,
+            format_func=lambda n: f"{n:,}",
+            key="sim_mc_samples"
+        )
+    with run_col2:
+        seed = st.number_input("Random Seed", 0, 2**32 - 1, 42, key="sim_mc_seed")
+    with run_col3:
+        st.markdown("<br>", unsafe_allow_html=True)
+        run = st.button("Run Monte Carlo", type="primary", key="sim_mc_run")
+    
+    if run:
+        with st.spinner(f"Scoring {n_samples:,} scenarios..."):
+            st.session_state.sim_mc_result = run_monte_carlo(
+                model, base_scenario, distributions, REQUIRED_COLUMNS,
+                n_samples, seed=int(seed), empirical=empirical
+            )
+    
+    result = st.session_state.get('sim_mc_result')
+    if result is None:
+        return
+    
+    metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
+    with metric_col1:
+        st.metric("Mean Predicted Profit", f"₹{result['mean']:,.0f}", f"σ ₹{result['std']:,.0f}", delta_color="off")
+    with metric_col2:
+        st.metric("Probability of Loss", f"{result['prob_loss'] * 100:.1f}%")
+    with metric_col3:
+        st.metric("Runtime", f"{result['seconds']:.2f}s")
+    with metric_col4:
+        st.metric("Samples / Second", f"{result['samples_per_sec']:,.0f}")
+    st.caption(f"{result['n_samples']:,} samples · seed {result['seed']}")
+    
+    hist_col, pct_col = st.columns([3, 1])
+    with hist_col:
+        # Plot the pre-binned histogram rather than shipping every sample to the browser
+        counts, edges = result['histogram']
+        percentiles = result['percentiles']
+        fig = go.Figure(go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=counts,
+            width=np.diff(edges),
+            marker_color=np.where(edges[:-1] < 0, '#ef4444', '#10b981'),
+            hovertemplate="Profit: ₹%{x:,.0f}<br>Scenarios: %{y:,}<extra></extra>"
+        ))
+        for pct, dash in [(5, 'dot'), (50, 'dash'), (95, 'dot')]:
+            fig.add_vline(x=percentiles[pct], line_dash=dash, annotation_text=f"P{pct}")
+        fig.update_layout(
+            title="Predicted Monthly Profit Distribution",
+            xaxis_title="Profit (₹)",
+            yaxis_title="Scenarios",
+            bargap=0,
+            height=450
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    with pct_col:
+        st.markdown("#### Percentiles")
+        st.dataframe(
+            pd.DataFrame({
+                "Percentile": [f"P{p}" for p in percentiles],
+                "Profit (₹)": [f"{v:,.0f}" for v in percentiles.values()],
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+
+@st.fragment
+def show_profit_optimizer(base_scenario):
+    """Search the controllable levers for maximum predicted profit under a spend budget"""
+    params = st.multiselect(
+        "Parameters to Optimize",
+        OPTIMIZABLE_PARAMETERS,
+        default=["marketing_spend", "employee_count", "discount_percentage"],
+        format_func=parameter_label,
+        key="sim_opt_params"
+    )
+    if not params:
+        st.info("💡 Select at least one parameter to optimize")
+        return
+    
+    bounds = {}
+    bound_cols = st.columns(len(params))
+    for param, col in zip(params, bound_cols):
+        spec = SIMULATION_PARAMETERS[param]
+        with col:
+            bounds[param] = st.slider(
+                f"{spec['label']} Bounds",
+                spec['min'],
+                spec['max'],
+                spec['range'],
+                key=f"sim_opt_bounds_{param}"
+            )
+    
+    current_spend = base_scenario['marketing_spend'] + base_scenario['employee_count'] * base_scenario['avg_employee_salary']
+    budget_col, evals_col, pop_col, seed_col = st.columns(4)
+    with budget_col:
+        budget = st.number_input(
+            "Monthly Budget (₹)",
+            min_value=0,
+            value=int(current_spend),
+            step=10000,
+            help="Marketing spend plus payroll (employees × average salary)",
+            key="sim_opt_budget"
+        )
+    with evals_col:
+        max_evaluations = st.select_slider(
+            "Evaluation Budget",
+            options=[5_000, 10_000, 20_000, 50_000, 100_000],
+            value=20_000,
+            format_func=lambda n: f"{n:,}",
+            key="sim_opt_evals"
+        )
+    with pop_col:
+        population = st.number_input("Population Size", 100, 10_000, 1_000, 100, key="sim_opt_population")
+    with seed_col:
+        seed = st.number_input("Random Seed", 0, 2**32 - 1, 42, key="sim_opt_seed")
+    
+    if st.button("Optimize Scenario", type="primary", key="sim_opt_run"):
+        with st.spinner("Searching for the most profitable configuration..."):
+            st.session_state.sim_opt_result = optimize_scenario(
+                model, base_scenario, bounds, REQUIRED_COLUMNS, budget,
+                max_evaluations=max_evaluations, population=int(population), seed=int(seed)
+            )
+    
+    result = st.session_state.get('sim_opt_result')
+    if result is None:
+        return
+    if result['best_scenario'] is None:
+        st.warning("⚠️ No configuration within the bounds fits the budget")
+        return
+    
+    metric_col1, metric_col2, metric_col3, metric_col4 = st.columns(4)
+    with metric_col1:
+        st.metric(
+            "Best Predicted Profit",
+            f"₹{result['best_profit']:,.0f}",
+            f"₹{result['best_profit'] - result['baseline_profit']:,.0f} vs current"
+        )
+    with metric_col2:
+        st.metric("Budget Used", f"₹{result['best_spend']:,.0f}")
+    with metric_col3:
+        st.metric("Model Evaluations", f"{result['evaluations']:,}")
+    with metric_col4:
+        st.metric("Evaluations / Second", f"{result['evals_per_sec']:,.0f}")
+    
+    config_col, trace_col = st.columns([1, 2])
+    with config_col:
+        st.markdown("#### Best Configuration")
+        st.dataframe(
+            pd.DataFrame({
+                "Parameter": [parameter_label(p) for p in result['best_scenario']],
+                "Current": [f"{base_scenario[p]:,.2f}" for p in result['best_scenario']],
+                "Optimized": [f"{v:,.2f}" for v in result['best_scenario'].values()],
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.caption(f"Search took {result['seconds']:.2f}s")
+    with trace_col:
+        trace = result['trace']
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=trace['evaluations'], y=trace['best_profit'], mode='lines+markers', name='Best so far'))
+        fig.add_trace(go.Scatter(x=trace['evaluations'], y=trace['elite_mean_profit'], mode='lines', name='Elite mean', line=dict(dash='dot')))
+        fig.update_layout(title="Convergence", xaxis_title="Model Evaluations", yaxis_title="Predicted Profit (₹)", height=400)
+        st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment(run_every=1.0)
+def show_job_progress(job_id):
+    """Poll a background job; reruns the whole page once it finishes"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return
+    if job.finished:
+        st.rerun()
+    
+    st.progress(job.progress, text=f"{job.phase}... {job.progress:.0%}")
+    st.caption(f"{job.rows_done:,} rows · {job.rows_per_sec:,.0f} rows/sec · {job.elapsed:.1f}s · job {job.id}")
+    if st.button("Cancel", key=f"analytics_cancel_{job.id}", disabled=job.cancel_requested):
+        job.cancel()
+
+def show_data_export(df):
+    """Export the analyzed frame in chunks and offer the finished file for download"""
+    formats = list(EXPORT_FORMATS)
+    columns = st.multiselect("Columns", df.columns.tolist(), default=df.columns.tolist(), key="export_columns")
+    fmt = st.selectbox("Format", formats, index=formats.index(default_format(len(df))), key="export_format")
+    
+    job_manager = get_job_manager()
+    job = job_manager.get(st.session_state.get('export_job_id')) if st.session_state.get('export_job_id') else None
+    running = job is not None and not job.finished
+    if st.button("📥 Export Analyzed Data", key="export_csv", disabled=running or not columns):
+        job = job_manager.submit(f"Export {len(df):,} rows", export_dataset, df, fmt, columns)
+        st.session_state.export_job_id = job.id
+        running = True
+    
+    if job is None:
+        return
+    if running:
+        show_job_progress(job.id)
+    elif job.status == DONE:
+        result = job.result
+        if not result['path'].exists():
+            st.session_state.export_job_id = None
+            return
+        st.caption(
+            f"{result['rows']:,} rows × {result['columns']} columns · {result['format']} · "
+            f"{result['bytes'] / 1024 ** 2:,.1f} MB · {result['seconds']:.1f}s"
+        )
+        with open(result['path'], 'rb') as f:
+            st.download_button(
+                label=f"Download {result['format']}",
+                data=f,
+                file_name=f"business_analysis_results.{EXPORT_FORMATS[result['format']]['extension']}",
+                mime=EXPORT_FORMATS[result['format']]['mime'],
+                key="download_csv"
+            )
+    elif job.status == FAILED:
+        st.error(f"Export failed: {job.error}")
+    elif job.status == CANCELLED:
+        st.warning("⚠️ Export cancelled")
+        st.session_state.export_job_id = None
+
 def show_analytics_dashboard():
     """Display the analytics dashboard"""
     st.markdown("<h2 class='section-header'>📈 Advanced Business Analytics</h2>", unsafe_allow_html=True)
@@ -1682,8 +2649,24 @@ def show_analytics_dashboard():
         st.session_state.analytics_data_loaded = False
     if 'analytics_df' not in st.session_state:
         st.session_state.analytics_df = None
-    if 'analytics_df_raw' not in st.session_state:
-        st.session_state.analytics_df_raw = None
+    if 'analytics_schema_report' not in st.session_state:
+        st.session_state.analytics_schema_report = None
+    if 'analytics_memory_report' not in st.session_state:
+        st.session_state.analytics_memory_report = None
+    if 'analytics_mask' not in st.session_state:
+        st.session_state.analytics_mask = None
+    if 'analytics_incremental' not in st.session_state:
+        st.session_state.analytics_incremental = None
+    if 'analytics_upload_token' not in st.session_state:
+        st.session_state.analytics_upload_token = None
+    if 'analytics_job_id' not in st.session_state:
+        st.session_state.analytics_job_id = None
+    
+    # Simulation results belong to the model version that produced them
+    if st.session_state.get('analytics_model_version') != MODEL_VERSION:
+        for key in ['sim_grid_result', 'sim_mc_result', 'sim_opt_result']:
+            st.session_state.pop(key, None)
+        st.session_state.analytics_model_version = MODEL_VERSION
     
     # Sidebar for analytics
     with st.sidebar:
@@ -1705,98 +2688,117 @@ def show_analytics_dashboard():
             )
         
         # Load data based on user selection
-        df_raw = None
+        df = None
+        job_manager = get_job_manager()
+        job = job_manager.get(st.session_state.analytics_job_id) if st.session_state.analytics_job_id else None
+        if job is not None and (data_source != "Upload your own file" or uploaded_file is None):
+            # Leaving the upload source or removing the file abandons its ingestion
+            job.cancel()
+            job = st.session_state.analytics_job_id = st.session_state.analytics_upload_token = None
+        
         if data_source == "Upload your own file" and uploaded_file is not None:
-            df_raw = load_data(uploaded_file)
-            if df_raw is not None and not df_raw.empty:
-                st.success("✅ Data loaded successfully!")
-        elif data_source == "Use sample data (100K records)":
-            df_raw = load_data(sample=True)
-            st.success("✅ Sample data with 100,000 records loaded")
-        elif data_source == "Use advanced sample dataset (50K records)":
-            df_raw = load_data(advanced_sample=True)
-            st.success("✅ Advanced sample data with 50,000 records loaded")
+            columns = read_upload_columns(uploaded_file.file_id, uploaded_file.name, uploaded_file)
+            if columns:
+                key_options = ["(none)"] + columns
+                key_choice = st.selectbox(
+                    "Dedupe Key Column",
+                    key_options,
+                    index=key_options.index('business_id') if 'business_id' in key_options else 0,
+                    help="Appended records replace existing rows with the same key",
+                    key="analytics_key_column"
+                )
+                key_column = None if key_choice == "(none)" else key_choice
+                
+                # Ingest once per uploaded file, key and model version in the background; widget
+                # interaction while the job runs no longer restarts the work
+                upload_token = (uploaded_file.file_id, key_column, MODEL_VERSION)
+                if st.session_state.analytics_upload_token != upload_token:
+                    if job is not None:
+                        job.cancel()
+                    job = job_manager.submit(
+                        f"Ingest {uploaded_file.name}",
+                        ingest_upload,
+                        uploaded_file.getvalue(),
+                        uploaded_file.name,
+                        key_column
+                    )
+                    st.session_state.analytics_job_id = job.id
+                    st.session_state.analytics_upload_token = upload_token
+                
+                if job is not None and job.status == DONE:
+                    # Swap in the finished dataset, taking the job so the manager stops holding it
+                    job_manager.take(job.id)
+                    result = job.result
+                    st.session_state.analytics_incremental = result['dataset']
+                    st.session_state.analytics_schema_report = result['schema_report']
+                    st.session_state.analytics_memory_report = result['memory_report']
+                    st.session_state.analytics_job_id = None
+                    st.success(f"✅ Data loaded successfully! ({len(result['dataset'].frame):,} rows in {job.elapsed:.1f}s)")
+                    job = result = None
+                elif job is not None and job.status == FAILED:
+                    st.error(f"Error loading file: {job.error}")
+                elif job is not None and job.status == CANCELLED:
+                    st.warning("⚠️ Ingestion cancelled")
+                    if st.button("Restart Ingestion", key="analytics_restart_job"):
+                        st.session_state.analytics_upload_token = None
+                        st.rerun()
+                elif job is not None:
+                    st.info(f"⏳ Processing {uploaded_file.name} in the background")
+                    show_job_progress(job.id)
+                
+                incremental = st.session_state.analytics_incremental
+                if incremental is not None and job is None:
+                    schema_report = st.session_state.analytics_schema_report
+                    memory_report = st.session_state.analytics_memory_report
+                    
+                    with st.expander("➕ Append Delta Records"):
+                        delta_file = st.file_uploader(
+                            "Upload new or updated records",
+                            type=["csv", "xlsx"],
+                            key="analytics_delta_file"
+                        )
+                        if st.button("Append to Dataset", key="analytics_delta_append", disabled=delta_file is None):
+                            delta_raw = load_data(delta_file)
+                            if delta_raw.empty:
+                                st.warning("⚠️ The delta file has no rows")
+                            elif key_column and key_column not in delta_raw.columns:
+                                st.error(f"❌ Delta file is missing the key column '{key_column}'")
+                            else:
+                                summary = incremental.append(delta_raw)
+                                st.success(
+                                    f"✅ {summary['added']:,} new and {summary['replaced']:,} updated rows "
+                                    f"scored in {summary['seconds']:.2f}s "
+                                    f"({summary['duplicates_dropped']:,} duplicates dropped)"
+                                )
+                    
+                    df = incremental.frame
+        elif data_source in SAMPLE_DATASETS:
+            # Shared read-only view; every session references the same buffers
+            df, extras = get_shared_dataset(data_source)
+            st.session_state.analytics_incremental = None
+            schema_report = extras['schema_report']
+            memory_report = extras['memory_report']
+            if data_source == "Use sample data (100K records)":
+                st.success("✅ Sample data with 100,000 records loaded")
+            else:
+                st.success("✅ Advanced sample data with 50,000 records loaded")
         else:
             if not st.session_state.analytics_data_loaded:
                 st.info("💡 Please select a data source to begin analytics")
         
-        if df_raw is not None and not df_raw.empty:
-            # Process data
-            df = align_schema(df_raw.copy())
-            
-            # Calculate monthly_sales
-            df["monthly_sales"] = (
-                df["avg_daily_footfall"] * df["conversion_rate"] * df["avg_transaction_value"] * 30
-            )
-            
-            # Add derived metrics
-            df["sales_per_sqft"] = df["monthly_sales"] / df["store_size_sqft"].replace(0, 1)
-            df["sales_per_employee"] = df["monthly_sales"] / df["employee_count"].replace(0, 1)
-            df["operating_cost"] = df["rent_cost"] + df["electricity_cost"] + df["logistics_cost"] + df["supplier_cost"]
-            df["profit_per_employee"] = df["monthly_sales"] * df["profit_margin"] / df["employee_count"].replace(0, 1)
-            df["cost_to_sales_ratio"] = df["operating_cost"] / df["monthly_sales"].replace(0, 1)
-            df["roi_per_employee"] = df["employee_efficiency"] / df["avg_employee_salary"].replace(0, 1)
-            
-            # Model prediction
-            if model:
-                df["predicted_profit"] = model.predict(df)
-            else:
-                # Generate synthetic predictions for demonstration
-                np.random.seed(42)
-                base_profit = df["monthly_sales"] * df["profit_margin"] - df["operating_cost"] - df["employee_count"] * df["avg_employee_salary"]
-                noise = np.random.normal(0, 0.1 * abs(base_profit).mean(), len(df))
-                df["predicted_profit"] = np.maximum(base_profit + noise, 0)
-            
-            df["risk_band"] = pd.qcut(df["predicted_profit"], 3, labels=["Low", "Medium", "High"])
-            
-            # Add advanced scores
-            df['profitability_score'] = (df['profit_margin'].clip(-0.5, 0.5) * 0.4 + 
-                                        (df['customer_rating'].clip(1, 5) / 5) * 0.3 + 
-                                        (1 - df['cost_to_sales_ratio'].clip(0, 1)) * 0.3) * 100
-            
-            if 'employee_efficiency' in df.columns:
-                emp_eff_norm = df['employee_efficiency'] / df['employee_efficiency'].replace(0, 1).max()
-            else:
-                emp_eff_norm = 0.5
-            
-            if 'sales_per_sqft' in df.columns:
-                sales_sqft_norm = df['sales_per_sqft'] / df['sales_per_sqft'].replace(0, 1).max()
-            else:
-                sales_sqft_norm = 0.5
-            
-            if 'inventory_turnover' in df.columns:
-                inv_turn_norm = df['inventory_turnover'] / df['inventory_turnover'].replace(0, 1).max()
-            else:
-                inv_turn_norm = 0.5
-            
-            df['efficiency_score'] = (emp_eff_norm * 0.4 +
-                                     sales_sqft_norm * 0.3 +
-                                     inv_turn_norm * 0.3) * 100
-            
-            df['growth_potential'] = ((df['years_of_operation'].clip(0, 30) / 30) * 0.3 +
-                                     (df['city_tier'].clip(1, 3) / 3) * 0.2 +
-                                     (df['employee_count'].clip(1, 200) / 200) * 0.3 +
-                                     (df['store_size_sqft'].clip(500, 10000) / 10000) * 0.2) * 100
-            
-            # Create performance tiers
-            if 'predicted_profit' in df.columns and 'monthly_sales' in df.columns and 'employee_efficiency' in df.columns:
-                performance_score = (df['predicted_profit'].rank(pct=True) * 0.4 + 
-                                   df['monthly_sales'].rank(pct=True) * 0.3 + 
-                                   df['employee_efficiency'].rank(pct=True) * 0.3)
-                df['performance_tier'] = pd.qcut(performance_score, 5, 
-                                                labels=['Poor', 'Below Avg', 'Average', 'Good', 'Excellent'])
-            else:
-                df['performance_tier'] = 'Average'
-            
-            # Store in session state
+        if df is not None:
+            # Store in session state (the raw frame is not kept; it is cached by load_data)
             st.session_state.analytics_data_loaded = True
-            st.session_state.analytics_df_raw = df_raw
             st.session_state.analytics_df = df
+            st.session_state.analytics_schema_report = schema_report
+            st.session_state.analytics_memory_report = memory_report
             
-            # Filters
+            # Filters (kept as a row mask so the dataset itself is never copied)
             st.markdown("---")
             st.markdown("### 🔍 Data Filters")
             
+            mask = np.ones(len(df), dtype=bool)
+            
             if 'risk_band' in df.columns:
                 risk_filter = st.multiselect(
                     "Select Risk Levels",
@@ -1804,7 +2806,7 @@ def show_analytics_dashboard():
                     default=["Low", "Medium", "High"],
                     key="analytics_risk_filter"
                 )
-                df = df[df['risk_band'].isin(risk_filter)]
+                mask &= df['risk_band'].isin(risk_filter).to_numpy()
             
             if 'business_type' in df.columns:
                 business_types = ["All"] + sorted(df['business_type'].unique().tolist())
@@ -1815,10 +2817,10 @@ def show_analytics_dashboard():
                     key="analytics_business_filter"
                 )
                 if business_filter and "All" not in business_filter:
-                    df = df[df['business_type'].isin(business_filter)]
+                    mask &= df['business_type'].isin(business_filter).to_numpy()
             
-            # Update the filtered dataframe
-            st.session_state.analytics_df = df
+            # Update the filter mask
+            st.session_state.analytics_mask = mask
     
     # Main analytics content
     if not st.session_state.analytics_data_loaded or st.session_state.analytics_df is None:
@@ -1836,16 +2838,48 @@ def show_analytics_dashboard():
         return
     
     df = st.session_state.analytics_df
-    
-    # Calculate metrics
-    avg_profit = df["predicted_profit"].mean()
-    avg_sales = df["monthly_sales"].mean()
-    risk_percentage = (df["risk_band"] == 'High').mean() * 100 if 'risk_band' in df.columns else 0
-    total_records = len(df)
-    profit_margin_val = (df['predicted_profit'].sum() / df['monthly_sales'].sum() * 100) if df['monthly_sales'].sum() > 0 else 0
-    avg_roi = df['marketing_roi'].mean() if 'marketing_roi' in df.columns else 2.0
-    inventory_turnover = (df['monthly_sales'].sum() / df['inventory_level'].sum()) if df['inventory_level'].sum() > 0 else 0
-    employee_productivity = df['employee_efficiency'].mean() if 'employee_efficiency' in df.columns else 50000
+    mask = st.session_state.analytics_mask
+    if mask is not None and not mask.all():
+        df = df[mask]
+    
+    # Calculate metrics (an unfiltered uploaded dataset keeps them as running aggregates)
+    incremental = st.session_state.analytics_incremental
+    if incremental is not None and df is incremental.frame:
+        kpis = incremental.aggregates()
+        avg_profit = kpis['avg_profit']
+        avg_sales = kpis['avg_sales']
+        risk_percentage = kpis['risk_percentage']
+        total_records = kpis['total_records']
+        profit_margin_val = kpis['profit_margin']
+        avg_roi = kpis['avg_roi']
+        inventory_turnover = kpis['inventory_turnover']
+        employee_productivity = kpis['employee_productivity']
+    else:
+        avg_profit = df["predicted_profit"].mean()
+        avg_sales = df["monthly_sales"].mean()
+        risk_percentage = (df["risk_band"] == 'High').mean() * 100 if 'risk_band' in df.columns else 0
+        total_records = len(df)
+        profit_margin_val = (df['predicted_profit'].sum() / df['monthly_sales'].sum() * 100) if df['monthly_sales'].sum() > 0 else 0
+        avg_roi = df['marketing_roi'].mean() if 'marketing_roi' in df.columns else 2.0
+        inventory_turnover = (df['monthly_sales'].sum() / df['inventory_level'].sum()) if df['inventory_level'].sum() > 0 else 0
+        employee_productivity = df['employee_efficiency'].mean() if 'employee_efficiency' in df.columns else 50000
+    
+    # Deltas compare the unfiltered dataset with itself before the latest delta upload
+    last_append = incremental.history[-1] if incremental is not None and df is incremental.frame and incremental.history else None
+    if last_append is None:
+        baseline = "<div style='font-size: 0.85rem; color: #6B7280; margin-top: 0.5rem;'>No delta uploads yet</div>"
+        profit_delta = sales_delta = risk_delta = records_delta = efficiency_delta = baseline
+    else:
+        previous = last_append['previous_kpis']
+        profit_delta = delta_line(percent_change(avg_profit, previous['avg_profit']), "since last upload")
+        sales_delta = delta_line(percent_change(avg_sales, previous['avg_sales']), "since last upload")
+        risk_delta = delta_line(
+            risk_percentage - previous['risk_percentage'], "since last upload", unit=" pts", higher_is_better=False
+        )
+        records_delta = delta_line(total_records - previous['total_records'], "new entries", unit="", digits=0)
+        efficiency_delta = delta_line(
+            percent_change(employee_productivity, previous['employee_productivity']), "since last upload"
+        )
     
     # Display metrics
     st.markdown("<h2 class='section-header'>Executive Dashboard</h2>", unsafe_allow_html=True)
@@ -1857,9 +2891,7 @@ def show_analytics_dashboard():
         <div class='metric-card metric-card-primary'>
             <div class='metric-value'>₹{avg_profit:,.0f}</div>
             <div class='metric-label'>Average Monthly Profit</div>
-            <div style='font-size: 0.85rem; color: #10B981; margin-top: 0.5rem;'>
-                ▲ 12.5% from last quarter
-            </div>
+            {profit_delta}
         </div>
         """, unsafe_allow_html=True)
     
@@ -1868,9 +2900,7 @@ def show_analytics_dashboard():
         <div class='metric-card metric-card-secondary'>
             <div class='metric-value'>₹{avg_sales:,.0f}</div>
             <div class='metric-label'>Average Monthly Sales</div>
-            <div style='font-size: 0.85rem; color: #10B981; margin-top: 0.5rem;'>
-                ▲ 18.2% from last quarter
-            </div>
+            {sales_delta}
         </div>
         """, unsafe_allow_html=True)
     
@@ -1879,9 +2909,7 @@ def show_analytics_dashboard():
         <div class='metric-card metric-card-warning'>
             <div class='metric-value'>{risk_percentage:.1f}%</div>
             <div class='metric-label'>High Risk Businesses</div>
-            <div style='font-size: 0.85rem; color: #EF4444; margin-top: 0.5rem;'>
-                ▼ 5.1% from last quarter
-            </div>
+            {risk_delta}
         </div>
         """, unsafe_allow_html=True)
     
@@ -1890,9 +2918,7 @@ def show_analytics_dashboard():
         <div class='metric-card metric-card-danger'>
             <div class='metric-value'>{total_records:,}</div>
             <div class='metric-label'>Total Records Analyzed</div>
-            <div style='font-size: 0.85rem; color: #10B981; margin-top: 0.5rem;'>
-                ▲ 25,000 new entries
-            </div>
+            {records_delta}
         </div>
         """, unsafe_allow_html=True)
     
@@ -1937,15 +2963,13 @@ def show_analytics_dashboard():
         <div class='metric-card' style='border-left: 4px solid #10B981;'>
             <div class='metric-value'>₹{employee_productivity:,.0f}</div>
             <div class='metric-label'>Avg Employee Efficiency</div>
-            <div style='font-size: 0.85rem; color: #10B981; margin-top: 0.5rem;'>
-                ▲ 8.3% YoY
-            </div>
+            {efficiency_delta}
         </div>
         """, unsafe_allow_html=True)
     
     # Data preview
     with st.expander("Dataset Overview", expanded=False):
-        tab1, tab2, tab3 = st.tabs(["Data Preview", "Statistics", "Data Quality"])
+        tab1, tab2, tab3, tab4 = st.tabs(["Data Preview", "Statistics", "Data Quality", "Memory"])
         
         with tab1:
             st.dataframe(df.head(100), use_container_width=True)
@@ -1954,12 +2978,49 @@ def show_analytics_dashboard():
             st.dataframe(df.describe(), use_container_width=True)
         
         with tab3:
+            schema_report = st.session_state.analytics_schema_report
+            if schema_report is not None:
+                st.markdown("#### Schema Validation")
+                fixed_cols = (schema_report['Status'] != 'OK').sum()
+                q_col1, q_col2, q_col3, q_col4 = st.columns(4)
+                with q_col1:
+                    st.metric("Columns Fixed", f"{fixed_cols} / {len(schema_report)}")
+                with q_col2:
+                    st.metric("Values Coerced", f"{schema_report['Coerced'].sum():,}")
+                with q_col3:
+                    st.metric("Values Defaulted", f"{schema_report['Defaulted'].sum():,}")
+                with q_col4:
+                    st.metric("Out of Range (clipped)", f"{schema_report['Out of Range'].sum():,}")
+                st.dataframe(schema_report, use_container_width=True, hide_index=True)
+            
+            st.markdown("#### Missing Values")
             missing_df = pd.DataFrame({
                 'Column': df.columns,
                 'Missing Values': df.isnull().sum(),
                 'Missing %': (df.isnull().sum() / len(df) * 100).round(2)
             })
             st.dataframe(missing_df, use_container_width=True)
+        
+        with tab4:
+            memory_report = st.session_state.analytics_memory_report
+            if memory_report is not None:
+                total_before = memory_report['Before (MB)'].sum()
+                total_after = memory_report['After (MB)'].sum()
+                saved_pct = (1 - total_after / total_before) * 100 if total_before > 0 else 0
+                
+                mem_col1, mem_col2, mem_col3 = st.columns(3)
+                with mem_col1:
+                    st.metric("Memory Before", f"{total_before:,.1f} MB")
+                with mem_col2:
+                    st.metric("Memory After", f"{total_after:,.1f} MB")
+                with mem_col3:
+                    st.metric("Saved", f"{saved_pct:.1f}%")
+                
+                st.dataframe(
+                    memory_report.sort_values('Before (MB)', ascending=False),
+                    use_container_width=True,
+                    hide_index=True
+                )
     
     # Visualizations
     st.markdown("<h2 class='section-header'>Comprehensive Analytics Dashboard</h2>", unsafe_allow_html=True)
@@ -1976,7 +3037,7 @@ def show_analytics_dashboard():
         
         with col1:
             if 'business_type' in df.columns:
-                sales_by_type = df.groupby('business_type')['monthly_sales'].mean().reset_index()
+                sales_by_type = df.groupby('business_type', observed=True)['monthly_sales'].mean().reset_index()
                 fig = px.bar(sales_by_type, x='business_type', y='monthly_sales',
                             title='Average Sales by Business Type',
                             color='monthly_sales',
@@ -1985,7 +3046,7 @@ def show_analytics_dashboard():
         
         with col2:
             if 'city' in df.columns:
-                city_sales = df.groupby('city')['monthly_sales'].mean().reset_index().head(10)
+                city_sales = df.groupby('city', observed=True)['monthly_sales'].mean().reset_index().head(10)
                 fig = px.bar(city_sales, x='city', y='monthly_sales',
                             title='Top 10 Cities by Sales',
                             color='monthly_sales',
@@ -1997,7 +3058,7 @@ def show_analytics_dashboard():
         
         with col1:
             if 'business_type' in df.columns:
-                profit_by_type = df.groupby('business_type')['predicted_profit'].mean().reset_index()
+                profit_by_type = df.groupby('business_type', observed=True)['predicted_profit'].mean().reset_index()
                 fig = px.bar(profit_by_type, x='business_type', y='predicted_profit',
                             title='Average Profit by Business Type',
                             color='predicted_profit',
@@ -2027,7 +3088,7 @@ def show_analytics_dashboard():
         
         with col2:
             if all(col in df.columns for col in ['risk_band', 'predicted_profit']):
-                risk_profit = df.groupby('risk_band')['predicted_profit'].mean().reset_index()
+                risk_profit = df.groupby('risk_band', observed=True)['predicted_profit'].mean().reset_index()
                 fig = px.bar(risk_profit, x='risk_band', y='predicted_profit',
                             title='Average Profit by Risk Category',
                             color='predicted_profit',
@@ -2057,6 +3118,15 @@ def show_analytics_dashboard():
                                 trendline='ols')
                 st.plotly_chart(fig, use_container_width=True)
     
+    # Model Explainability
+    st.markdown("<h2 class='section-header'>Profit Drivers & Explainability</h2>", unsafe_allow_html=True)
+    show_profit_drivers(st.session_state.analytics_df, mask)
+    
+    # Model Version Comparison
+    if model:
+        with st.expander("⚖️ Compare Model Versions"):
+            show_model_comparison(st.session_state.analytics_df, mask)
+    
     # Predictive Simulation
     st.markdown("<h2 class='section-header'>Business Scenario Simulation</h2>", unsafe_allow_html=True)
     
@@ -2083,30 +3153,43 @@ def show_analytics_dashboard():
         
         festival_season = st.checkbox("Festival Season", value=False, key="sim_festival")
         
-        if st.button("Run Predictive Simulation", type="primary", key="sim_run"):
-            # Create simulation data
-            simulation_data = {
-                "city_tier": city_tier,
-                "avg_employee_salary": avg_salary,
-                "inventory_level": inventory_level,
-                "conversion_rate": conversion_rate,
-                "is_festival_season": 1 if festival_season else 0,
-                "avg_transaction_value": 900,
-                "avg_daily_footfall": avg_footfall,
-                "rent_cost": rent_cost,
-                "supplier_cost": 50000,
-                "discount_percentage": discount_pct,
-                "business_type": "General",
-                "store_size_sqft": 1200,
-                "logistics_cost": 15000,
-                "years_of_operation": 5,
-                "profit_margin": 0.2,
-                "marketing_roi": 2.0,
-                "employee_efficiency": 50000,
-                "marketing_spend": marketing_spend,
-                "employee_count": employee_count
-            }
-            
+        # Base scenario shared by every simulation mode
+        simulation_data = {
+            "city_tier": city_tier,
+            "avg_employee_salary": avg_salary,
+            "inventory_level": inventory_level,
+            "conversion_rate": conversion_rate,
+            "is_festival_season": 1 if festival_season else 0,
+            "avg_transaction_value": 900,
+            "avg_daily_footfall": avg_footfall,
+            "rent_cost": rent_cost,
+            "supplier_cost": 50000,
+            "discount_percentage": discount_pct,
+            "business_type": "General",
+            "store_size_sqft": 1200,
+            "logistics_cost": 15000,
+            "years_of_operation": 5,
+            "profit_margin": 0.2,
+            "marketing_roi": 2.0,
+            "employee_efficiency": 50000,
+            "marketing_spend": marketing_spend,
+            "employee_count": employee_count
+        }
+        
+        sim_mode = st.radio(
+            "Simulation Mode",
+            ["Single Scenario", "Grid Sweep", "Monte Carlo", "Optimizer"],
+            horizontal=True,
+            key="sim_mode"
+        )
+        
+        if sim_mode == "Grid Sweep":
+            show_grid_sweep(simulation_data)
+        elif sim_mode == "Monte Carlo":
+            show_monte_carlo(simulation_data, df)
+        elif sim_mode == "Optimizer":
+            show_profit_optimizer(simulation_data)
+        elif st.button("Run Predictive Simulation", type="primary", key="sim_run"):
             # Convert to DataFrame and align schema
             sim_df = pd.DataFrame([simulation_data])
             sim_df = align_schema(sim_df)
@@ -2119,6 +3202,7 @@ def show_analytics_dashboard():
             # Predict profit
             if model:
                 predicted_profit = model.predict(sim_df)[0]
+                startup_timings.mark("first_prediction")
             else:
                 predicted_profit = expected_sales * 0.2 - marketing_spend - salary_cost
             
@@ -2150,15 +3234,7 @@ def show_analytics_dashboard():
     export_col1, export_col2 = st.columns(2)
     
     with export_col1:
-        if st.button("📥 Download Analyzed Data (CSV)", key="export_csv"):
-            csv = df.to_csv(index=False)
-            st.download_button(
-                label="Click to download CSV",
-                data=csv,
-                file_name="business_analysis_results.csv",
-                mime="text/csv",
-                key="download_csv"
-            )
+        show_data_export(df)
     
     with export_col2:
         if st.button("📊 Generate Executive Summary", key="export_summary"):
@@ -2253,6 +3329,163 @@ def main_app():
         elif page == "Settings":
             show_settings()
 
+def describe_anomaly(kind, transaction_type, category, amount, expected):
+    """One-line explanation of a flagged anomaly"""
+    if kind == "sales_drop":
+        return f"Sales dropped to ₹{amount:,.0f} for the day (usually ~₹{expected:,.0f})"
+    direction = "above" if amount > expected else "below"
+    return f"Unusual {transaction_type} of ₹{amount:,.0f} in '{category}' (well {direction} the usual ~₹{expected:,.0f})"
+
+def show_anomaly_panel(business_id):
+    """Unreviewed anomalies flagged as transactions arrived"""
+    conn = sqlite3.connect('bizsight.db')
+    if not is_replayed(conn, business_id):
+        # Transactions recorded before the detector existed: replay them once, even if
+        # transactions added since then already gave the detector some state
+        rebuild_state(conn, business_id)
+    anomalies = get_anomalies(conn, business_id)
+    conn.close()
+    
+    st.markdown("### 🚨 Anomalies")
+    if not anomalies:
+        st.success("✅ No unusual transactions or sales drops detected")
+        return
+    
+    df_anomalies = pd.DataFrame(
+        anomalies,
+        columns=['ID', 'Transaction ID', 'Kind', 'Type', 'Category', 'Day', 'Amount', 'Expected', 'Z-Score', 'Acknowledged', 'Detected At']
+    )
+    df_anomalies['Details'] = [
+        describe_anomaly(row.Kind, row.Type, row.Category, row.Amount, row.Expected)
+        for row in df_anomalies.itertuples()
+    ]
+    st.warning(f"⚠️ {len(df_anomalies)} anomalies need review (|z| > {Z_THRESHOLD} against the running EWMA baseline)")
+    st.dataframe(
+        df_anomalies[['Day', 'Kind', 'Type', 'Category', 'Amount', 'Expected', 'Z-Score', 'Details']].round({'Expected': 0, 'Z-Score': 2}),
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    review_col1, review_col2 = st.columns([3, 1])
+    with review_col1:
+        reviewed = st.selectbox(
+            "Anomaly to mark as reviewed",
+            df_anomalies['ID'].tolist(),
+            format_func=lambda anomaly_id: df_anomalies.set_index('ID').loc[anomaly_id, 'Details'],
+            key="dashboard_anomaly_choice"
+        )
+    with review_col2:
+        st.markdown("<br>", unsafe_allow_html=True)
+        if st.button("Mark Reviewed", key="dashboard_anomaly_ack"):
+            conn = sqlite3.connect('bizsight.db')
+            acknowledge_anomaly(conn, reviewed)
+            conn.close()
+            st.rerun()
+
+def show_forecast_panel(business_id):
+    """Sales and expense forecasts with 80%/95% intervals"""
+    st.markdown("### 🔮 Sales & Expense Forecast")
+    with st.spinner("Updating forecasts..."):
+        forecasts = get_business_forecast(business_id, get_transactions_version(business_id), last_complete_day())
+    if all(forecasts[series]['forecast'] is None for series in forecasts):
+        st.info("💡 Forecasts appear once there are at least three weeks of dated transactions")
+        return
+    
+    horizon = st.radio(
+        "Forecast Horizon",
+        list(HORIZONS),
+        format_func=lambda days: f"{days} days",
+        horizontal=True,
+        key="dashboard_forecast_horizon"
+    )
+    
+    totals = {}
+    fig = go.Figure()
+    for series, label, color in [('sale', 'Sales', '#10B981'), ('expense', 'Expenses', '#EF4444')]:
+        history = forecasts[series]['history']
+        forecast = forecasts[series]['forecast']
+        if forecast is None:
+            continue
+        forecast = forecast.iloc[:horizon]
+        totals[series] = forecast['mean'].sum()
+        recent = history.iloc[-90:]
+        fig.add_trace(go.Scatter(x=recent.index, y=recent.values, mode='lines', name=f'{label} (actual)', line=dict(color=color)))
+        fig.add_trace(go.Scatter(
+            x=list(forecast.index) + list(forecast.index[::-1]),
+            y=list(forecast['upper_80']) + list(forecast['lower_80'][::-1]),
+            fill='toself', fillcolor=color, opacity=0.2, line=dict(width=0),
+            name=f'{label} 80% interval', hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=forecast.index, y=forecast['upper_95'], mode='lines',
+            line=dict(color=color, width=1, dash='dot'), name=f'{label} 95% interval', showlegend=False
+        ))
+        fig.add_trace(go.Scatter(
+            x=forecast.index, y=forecast['lower_95'], mode='lines',
+            line=dict(color=color, width=1, dash='dot'), showlegend=False
+        ))
+        fig.add_trace(go.Scatter(x=forecast.index, y=forecast['mean'], mode='lines', name=f'{label} (forecast)', line=dict(color=color, dash='dash')))
+    fig.update_layout(title=f'Daily Forecast - Next {horizon} Days', xaxis_title='Date', yaxis_title='Amount (₹)', height=450)
+    st.plotly_chart(fig, use_container_width=True)
+    
+    forecast_col1, forecast_col2, forecast_col3 = st.columns(3)
+    with forecast_col1:
+        st.metric(f"Projected Sales ({horizon}d)", f"₹{totals['sale']:,.0f}" if 'sale' in totals else "n/a")
+    with forecast_col2:
+        st.metric(f"Projected Expenses ({horizon}d)", f"₹{totals['expense']:,.0f}" if 'expense' in totals else "n/a")
+    with forecast_col3:
+        if len(totals) == 2:
+            st.metric(f"Projected Net ({horizon}d)", f"₹{totals['sale'] - totals['expense']:,.0f}")
+    modes = ", ".join(f"{series}: {forecasts[series]['mode']}" for series in forecasts)
+    st.caption(f"Weekly-seasonal SARIMAX on daily totals through {last_complete_day():%Y-%m-%d} ({modes})")
+
+def delta_line(change, label, unit="%", higher_is_better=True, digits=1):
+    """Metric-card footer with an arrow, the size of ``change`` and what it is compared against"""
+    if change is None:
+        return f"<div style='font-size: 0.85rem; color: #6B7280; margin-top: 0.5rem;'>No data {label}</div>"
+    arrow = "▲" if change >= 0 else "▼"
+    color = "#10B981" if (change >= 0) == higher_is_better else "#EF4444"
+    return (
+        f"<div style='font-size: 0.85rem; color: {color}; margin-top: 0.5rem;'>"
+        f"{arrow} {abs(change):,.{digits}f}{unit} {label}</div>"
+    )
+
+def show_period_comparison(business_id):
+    """Sales, expenses, profit and margin of the current period with deltas against the previous one"""
+    header_col, period_col = st.columns([2, 1])
+    with header_col:
+        st.markdown("### Period Comparison")
+    with period_col:
+        period = st.radio("Period", list(PERIODS), index=1, horizontal=True, key="dashboard_period")
+    
+    comparison = get_period_comparison(business_id, period)
+    current, deltas = comparison['current'], comparison['deltas']
+    start, end = comparison['current_range']
+    label = f"vs previous {comparison['days']} days"
+    cards = [
+        ("metric-card-primary", f"₹{current['sales']:,.0f}", f"Sales ({start:%d %b} – {end:%d %b})",
+         delta_line(deltas['sales'], label)),
+        ("metric-card-danger", f"₹{current['expenses']:,.0f}", "Expenses",
+         delta_line(deltas['expenses'], label, higher_is_better=False)),
+        ("metric-card-secondary", f"₹{current['profit']:,.0f}", "Profit",
+         delta_line(deltas['profit'], label)),
+        ("metric-card-warning", f"{current['margin']:.1f}%", "Margin",
+         delta_line(deltas['margin'], label, unit=" pts")),
+    ]
+    for col, (card_class, value, name, footer) in zip(st.columns(4), cards):
+        with col:
+            st.markdown(f"""
+            <div class='metric-card {card_class}'>
+                <div style='font-size: 1.6rem; font-weight: 800; color: #1F2937; margin-bottom: 0.5rem;'>
+                    {value}
+                </div>
+                <div style='font-size: 1rem; color: #6B7280; font-weight: 500;'>
+                    {name}
+                </div>
+                {footer}
+            </div>
+            """, unsafe_allow_html=True)
+
 def show_dashboard():
     """Display main dashboard"""
     st.markdown("<h1 class='main-header'>BizSight AI Dashboard</h1>", unsafe_allow_html=True)
@@ -2261,19 +3494,16 @@ def show_dashboard():
     transactions = get_transactions(st.session_state.current_business_id)
     inventory = get_inventory(st.session_state.current_business_id)
     
-    # Calculate metrics
+    # Calculate metrics (summed from the daily rollup rather than the transaction rows)
+    totals = get_kpi_totals(st.session_state.current_business_id)
+    total_sales = totals['sales']
+    net_profit = totals['profit']
+    profit_margin = totals['margin']
     if transactions:
         df_trans = pd.DataFrame(
             transactions,
             columns=['ID', 'Business ID', 'Type', 'Amount', 'Category', 'Description', 'Date', 'Receipt', 'Created At']
         )
-        
-        total_sales = df_trans[df_trans['Type'] == 'sale']['Amount'].sum()
-        total_expenses = df_trans[df_trans['Type'] == 'expense']['Amount'].sum()
-        net_profit = total_sales - total_expenses
-        profit_margin = (net_profit / total_sales * 100) if total_sales > 0 else 0
-    else:
-        total_sales = total_expenses = net_profit = profit_margin = 0
     
     if inventory:
         df_inv = pd.DataFrame(
@@ -2340,6 +3570,8 @@ def show_dashboard():
         </div>
         """, unsafe_allow_html=True)
     
+    show_period_comparison(st.session_state.current_business_id)
+    
     # Charts row
     col1, col2 = st.columns(2)
     
@@ -2371,6 +3603,10 @@ def show_dashboard():
             )
             st.plotly_chart(fig, use_container_width=True)
     
+    if transactions:
+        show_anomaly_panel(st.session_state.current_business_id)
+        show_forecast_panel(st.session_state.current_business_id)
+    
     # Recent transactions
     st.markdown("### Recent Transactions")
     if transactions:
@@ -2380,11 +3616,179 @@ def show_dashboard():
     else:
         st.info("📭 No transactions yet. Start by adding your first transaction!")
 
+def show_model_training():
+    """Train a new model version on an uploaded file in the background"""
+    st.markdown("### Train a New Version")
+    training_file = st.file_uploader(
+        "Training data with a profit column",
+        type=["csv", "xlsx"],
+        help="Rows with the model features plus the actual profit to learn from",
+        key="training_file"
+    )
+    
+    job_manager = get_job_manager()
+    job_id = st.session_state.get('training_job_id')
+    job = job_manager.get(job_id) if job_id else None
+    
+    if training_file is not None:
+        columns = read_upload_columns(training_file.file_id, training_file.name, training_file) or []
+        guessed = guess_target(columns)
+        train_col1, train_col2 = st.columns(2)
+        with train_col1:
+            target = st.selectbox(
+                "Target Column",
+                columns,
+                index=columns.index(guessed) if guessed else 0,
+                key="training_target"
+            )
+            start_options = ["Fresh model"] + ([f"Continue training {MODEL_VERSION}"] if model is not None else [])
+            start_from = st.radio("Start From", start_options, horizontal=True, key="training_start")
+            is_csv = training_file.name.endswith('.csv')
+            external_memory = st.checkbox(
+                "Stream from disk (external memory)",
+                value=is_csv and training_file.size > EXTERNAL_MEMORY_BYTES,
+                disabled=not is_csv,
+                help="Trains chunk by chunk from an on-disk cache; for CSV files too large for memory",
+                key="training_external"
+            )
+            activate = st.checkbox("Activate when finished", value=False, key="training_activate")
+        with train_col2:
+            rounds = st.number_input("Max Boosting Rounds", 10, 5000, DEFAULT_PARAMS['n_estimators'], 10, key="training_rounds")
+            learning_rate = st.select_slider("Learning Rate", [0.01, 0.02, 0.05, 0.1, 0.2, 0.3], DEFAULT_PARAMS['learning_rate'], key="training_lr")
+            max_depth = st.slider("Max Tree Depth", 2, 12, DEFAULT_PARAMS['max_depth'], key="training_depth")
+            holdout = st.slider("Holdout Split (%)", 5, 40, 20, key="training_holdout")
+            early_stopping = st.slider("Early Stopping Rounds", 5, 100, 25, key="training_early_stopping")
+        
+        if st.button("🚀 Train", type="primary", key="training_run", disabled=not columns or (job is not None and not job.finished)):
+            continue_training = start_from != "Fresh model"
+            job = job_manager.submit(
+                f"Train on {training_file.name}",
+                train_model,
+                training_file.getvalue(),
+                training_file.name,
+                target,
+                model,
+                MODEL_VERSION if model is not None else None,
+                continue_training,
+                {'n_estimators': int(rounds), 'learning_rate': learning_rate, 'max_depth': max_depth},
+                holdout / 100,
+                early_stopping,
+                external_memory,
+                activate
+            )
+            st.session_state.training_job_id = job.id
+    
+    if job is None:
+        return
+    if not job.finished:
+        st.info(f"⏳ {job.label} in the background")
+        show_job_progress(job.id)
+    elif job.status == FAILED:
+        st.error(f"❌ Training failed: {job.error}")
+    elif job.status == CANCELLED:
+        st.warning("⚠️ Training cancelled")
+    else:
+        result = job.result
+        stats = result['stats']
+        metrics = result['metrics']
+        st.success(
+            f"✅ Registered {result['version']}" + (" and made it the active model" if result['activated'] else "")
+            + f" ({stats['rounds']} new rounds, best holdout round kept)"
+        )
+        result_col1, result_col2, result_col3, result_col4 = st.columns(4)
+        with result_col1:
+            baseline = metrics.get('baseline_rmse')
+            st.metric(
+                "Holdout RMSE", f"₹{metrics['rmse']:,.0f}",
+                f"₹{metrics['rmse'] - baseline:,.0f} vs active" if baseline is not None else None,
+                delta_color="inverse"
+            )
+        with result_col2:
+            st.metric("Holdout R²", f"{metrics['r2']:.3f}")
+        with result_col3:
+            st.metric("Training Throughput", f"{stats['rows_per_sec']:,.0f} rows/s")
+        with result_col4:
+            st.metric("Training Time", f"{stats['train_seconds']:.1f}s", f"+{stats['prepare_seconds']:.1f}s prep", delta_color="off")
+        st.caption(
+            f"{stats['train_rows']:,} training rows · {stats['holdout_rows']:,} holdout rows · "
+            f"{stats['total_rounds']} trees in total · "
+            f"{'external-memory' if stats['external_memory'] else 'in-memory'} hist training on {os.cpu_count()} cores"
+        )
+
+def show_archive_export():
+    """Archive the current business's data (with receipts) as a zip and offer it for download"""
+    fmt = st.radio("Table Format", ARCHIVE_FORMATS, horizontal=True, key="archive_format")
+    job_manager = get_job_manager()
+    job_id = st.session_state.get('archive_job_id')
+    job = job_manager.get(job_id) if job_id else None
+    running = job is not None and not job.finished
+    if st.button("Export All Data", disabled=running, key="archive_export"):
+        job = job_manager.submit("Export all data", archive_business, st.session_state.current_business_id, fmt)
+        st.session_state.archive_job_id = job.id
+        running = True
+    
+    if job is None:
+        return
+    if running:
+        show_job_progress(job.id)
+    elif job.status == DONE and not job.result['path'].exists():
+        # The temp file was cleaned up since; start over
+        st.session_state.archive_job_id = None
+    elif job.status == DONE:
+        result = job.result
+        st.caption(
+            f"{result['transactions']:,} transactions · {result['inventory']:,} inventory items · "
+            f"{result['receipts']:,} receipts · {result['bytes'] / 1024 ** 2:,.1f} MB · {result['seconds']:.1f}s"
+        )
+        with open(result['path'], 'rb') as f:
+            st.download_button(
+                label="📥 Download Archive",
+                data=f,
+                file_name=f"{st.session_state.current_business_name}_data_{datetime.now().strftime('%Y%m%d')}.zip",
+                mime="application/zip",
+                key="archive_download"
+            )
+    elif job.status == FAILED:
+        st.error(f"Export failed: {job.error}")
+    elif job.status == CANCELLED:
+        st.info("Archive export cancelled")
+        st.session_state.archive_job_id = None
+
+def show_archive_import():
+    """Bulk-import an exported archive into the current business"""
+    archive_file = st.file_uploader("BizSight archive", type=["zip"], key="archive_file")
+    job_manager = get_job_manager()
+    job_id = st.session_state.get('archive_import_job_id')
+    job = job_manager.get(job_id) if job_id else None
+    running = job is not None and not job.finished
+    if st.button("Import into This Business", disabled=archive_file is None or running, key="archive_import"):
+        job = job_manager.submit(
+            f"Import {archive_file.name}", restore_archive, archive_file.getvalue(), st.session_state.current_business_id
+        )
+        st.session_state.archive_import_job_id = job.id
+        running = True
+    
+    if job is None:
+        return
+    if running:
+        show_job_progress(job.id)
+    elif job.status == DONE:
+        result = job.result
+        st.success(
+            f"✅ Imported {result['transactions']:,} transactions, {result['inventory']:,} inventory items "
+            f"and {result['receipts']:,} receipts in {result['seconds']:.1f}s"
+        )
+    elif job.status == FAILED:
+        st.error(f"Import failed: {job.error}")
+    elif job.status == CANCELLED:
+        st.info("Import cancelled; nothing was imported")
+        st.session_state.archive_import_job_id = None
+
 def show_settings():
     """Display settings page"""
     st.markdown("<h2 class='section-header'>⚙️ Settings</h2>", unsafe_allow_html=True)
     
-    tab1, tab2 = st.tabs(["Business Profile", "Account Settings"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Business Profile", "Account Settings", "Performance", "Models"])
     
     with tab1:
         st.markdown("### Business Information")
@@ -2402,23 +3806,57 @@ def show_settings():
         st.info(f"**User ID:** {st.session_state.user_id}")
         
         st.markdown("### Export Data")
-        if st.button("Export All Data"):
-            transactions = get_transactions(st.session_state.current_business_id)
-            inventory = get_inventory(st.session_state.current_business_id)
-            
-            data = {
-                'business_name': st.session_state.current_business_name,
-                'transactions': transactions,
-                'inventory': inventory,
-                'exported_at': datetime.now().isoformat()
-            }
-            
-            st.download_button(
-                label="📥 Download JSON Data",
-                data=json.dumps(data, indent=2),
-                file_name=f"{st.session_state.current_business_name}_data_{datetime.now().strftime('%Y%m%d')}.json",
-                mime="application/json"
-            )
+        show_archive_export()
+        
+        st.markdown("### Import Data")
+        show_archive_import()
+    
+    with tab3:
+        st.markdown("### Startup Timings")
+        loader = get_model_loader()
+        perf_col1, perf_col2, perf_col3 = st.columns(3)
+        with perf_col1:
+            st.metric("Model Unpickle", f"{loader.load_seconds:.2f}s" if loader.load_seconds is not None else "n/a")
+        with perf_col2:
+            st.metric("Warm-up Predict", f"{loader.warmup_seconds * 1000:.0f} ms" if loader.warmup_seconds is not None else "n/a")
+        with perf_col3:
+            st.metric("Model Status", "Ready" if loader.model is not None else ("Loading" if not loader.ready else "Demo mode"))
+        st.dataframe(startup_timings.as_frame(), use_container_width=True, hide_index=True)
+        st.caption("Milestones are measured from the first script run of this server process")
+    
+    with tab4:
+        st.markdown("### Model Registry")
+        registry = get_model_registry()
+        versions = registry.versions()
+        if not versions:
+            st.info("💡 No model versions registered; the app is running in demonstration mode")
+        else:
+            registry_df = pd.DataFrame([{
+                'Version': entry['version'],
+                'Active': '✅' if entry['version'] == registry.active else '',
+                'Trained': entry['trained_at'],
+                'Registered': entry['registered_at'],
+                'Features': len(entry['features']),
+                'Validation Metrics': ", ".join(f"{k}={v:,.4g}" for k, v in entry['metrics'].items()) or "n/a",
+                'Parent': entry.get('parent') or '',
+                'Fingerprint': entry['fingerprint'],
+                'Notes': entry['notes'],
+            } for entry in versions])
+            st.dataframe(registry_df, use_container_width=True, hide_index=True)
+            
+            version_ids = [entry['version'] for entry in versions]
+            swap_col1, swap_col2 = st.columns([3, 1])
+            with swap_col1:
+                selected = st.selectbox("Active Model Version", version_ids, index=version_ids.index(registry.active), key="registry_active_choice")
+            with swap_col2:
+                st.markdown("<br>", unsafe_allow_html=True)
+                if st.button("Activate", key="registry_activate", disabled=selected == registry.active):
+                    registry.activate(selected)
+                    st.success(f"✅ {selected} is now the active model for all sessions")
+                    st.rerun()
+        
+        st.markdown("---")
+        show_model_training()
 
 # ============================================================
 # MAIN EXECUTION
@@ -2429,7 +3867,9 @@ def main():
     # Check authentication
     if not st.session_state.authenticated:
         show_auth_page()
+        startup_timings.mark("login_page_rendered")
     else:
+        load_model()
         main_app()
 
 # ============================================================
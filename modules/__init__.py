@@ -0,0 +1 @@
+"""BizSight AI backend modules (data, prediction, simulation and reporting engines)"""
@@ -0,0 +1,266 @@
+"""Streaming anomaly detection on incoming transactions.
+
+Every (business, transaction type, category) stream keeps an exponentially
+weighted mean and variance of log amounts in the ``anomaly_state`` table.
+Scoring a transaction reads and rewrites that one row by primary key, so
+the cost is O(1) regardless of history length. A second stream per
+business tracks closed daily sales totals to catch sudden sales drops.
+Flagged transactions and days are recorded in ``transaction_anomalies``.
+"""
+import argparse
+import math
+import sqlite3
+from datetime import datetime
+
+# Weight of the newest observation in the running mean/variance
+EWMA_ALPHA = 0.1
+# |z| above which an observation is flagged
+Z_THRESHOLD = 3.5
+# Observations a stream needs before it may flag anything
+WARMUP_OBSERVATIONS = 10
+# Floor for the standard deviation in log space (about 5%), so near-constant streams do not flag tiny changes
+MIN_LOG_STD = 0.05
+# Category of the per-business stream of closed daily sales totals
+DAILY_SALES_STREAM = "__daily_sales__"
+
+ANOMALY_STATE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS anomaly_state (
+        business_id INTEGER NOT NULL,
+        transaction_type TEXT NOT NULL,
+        category TEXT NOT NULL,
+        n INTEGER NOT NULL DEFAULT 0,
+        mean REAL NOT NULL DEFAULT 0,
+        var REAL NOT NULL DEFAULT 0,
+        last_day TEXT, -- daily stream only: the still-open day
+        day_total REAL NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP,
+        PRIMARY KEY (business_id, transaction_type, category),
+        FOREIGN KEY (business_id) REFERENCES business_profiles(id)
+    )
+'''
+
+TRANSACTION_ANOMALIES_TABLE = '''
+    CREATE TABLE IF NOT EXISTS transaction_anomalies (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        business_id INTEGER NOT NULL,
+        transaction_id INTEGER, -- NULL for daily sales drops
+        kind TEXT NOT NULL, -- 'unusual_amount' or 'sales_drop'
+        transaction_type TEXT NOT NULL,
+        category TEXT,
+        day TEXT NOT NULL,
+        amount REAL NOT NULL,
+        expected REAL NOT NULL,
+        z_score REAL NOT NULL,
+        acknowledged BOOLEAN DEFAULT 0,
+        detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (business_id) REFERENCES business_profiles(id),
+        FOREIGN KEY (transaction_id) REFERENCES transactions(id)
+    )
+'''
+
+TRANSACTION_ANOMALIES_INDEX = '''
+    CREATE INDEX IF NOT EXISTS idx_transaction_anomalies_business
+    ON transaction_anomalies (business_id, acknowledged, day)
+'''
+
+# Businesses whose full history has been replayed into the detector. Live
+# scoring creates stream state too, so state alone does not mean the
+# baselines cover transactions recorded before the detector existed.
+ANOMALY_REPLAYS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS anomaly_replays (
+        business_id INTEGER PRIMARY KEY,
+        replayed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (business_id) REFERENCES business_profiles(id)
+    )
+'''
+
+def ensure_anomaly_schema(conn):
+    """Create the detector's tables if they do not exist"""
+    conn.execute(ANOMALY_STATE_TABLE)
+    conn.execute(TRANSACTION_ANOMALIES_TABLE)
+    conn.execute(TRANSACTION_ANOMALIES_INDEX)
+    conn.execute(ANOMALY_REPLAYS_TABLE)
+
+# ============================================================
+# EWMA STREAM
+# ============================================================
+class EwmaStream:
+    """Running EWMA mean/variance of log amounts for one stream"""
+
+    __slots__ = ("n", "mean", "var", "last_day", "day_total")
+
+    def __init__(self, n=0, mean=0.0, var=0.0, last_day=None, day_total=0.0):
+        self.n = n
+        self.mean = mean
+        self.var = var
+        self.last_day = last_day
+        self.day_total = day_total
+
+    def std(self):
+        return max(math.sqrt(self.var), MIN_LOG_STD)
+
+    def score(self, amount):
+        """z-score of ``amount`` against the stream so far (None while warming up)"""
+        if self.n < WARMUP_OBSERVATIONS:
+            return None
+        return (math.log1p(max(amount, 0.0)) - self.mean) / self.std()
+
+    def expected(self):
+        return math.expm1(self.mean)
+
+    def update(self, amount):
+        """Fold one observation in; flagged values are clipped so one outlier cannot skew the baseline"""
+        x = math.log1p(max(amount, 0.0))
+        if self.n == 0:
+            self.mean, self.var = x, 0.0
+        else:
+            if self.n >= WARMUP_OBSERVATIONS:
+                limit = Z_THRESHOLD * self.std()
+                x = min(max(x, self.mean - limit), self.mean + limit)
+            diff = x - self.mean
+            increment = EWMA_ALPHA * diff
+            self.mean += increment
+            self.var = (1 - EWMA_ALPHA) * (self.var + diff * increment)
+        self.n += 1
+
+# ============================================================
+# DETECTOR
+# ============================================================
+def _category_key(category):
+    return (category or "").strip().lower()
+
+def _load_streams(conn, keys):
+    """EwmaStream per (business_id, transaction_type, category) key, new streams for unseen keys"""
+    streams = {}
+    for key in keys:
+        row = conn.execute(
+            '''SELECT n, mean, var, last_day, day_total FROM anomaly_state
+            WHERE business_id = ? AND transaction_type = ? AND category = ?''',
+            key
+        ).fetchone()
+        streams[key] = EwmaStream(*row) if row else EwmaStream()
+    return streams
+
+def _save_streams(conn, streams):
+    now = datetime.now().isoformat(timespec="seconds")
+    conn.executemany(
+        '''INSERT OR REPLACE INTO anomaly_state
+        (business_id, transaction_type, category, n, mean, var, last_day, day_total, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        [
+            (*key, stream.n, stream.mean, stream.var, stream.last_day, stream.day_total, now)
+            for key, stream in streams.items()
+        ]
+    )
+
+def _observe(streams, business_id, transaction_id, transaction_type, amount, category, day):
+    """Score and fold one transaction into its streams; returns the anomalies it raised"""
+    anomalies = []
+    stream = streams[(business_id, transaction_type, _category_key(category))]
+    z = stream.score(amount)
+    if z is not None and abs(z) > Z_THRESHOLD:
+        anomalies.append((
+            business_id, transaction_id, "unusual_amount", transaction_type, category,
+            day, amount, stream.expected(), z
+        ))
+    stream.update(amount)
+
+    if transaction_type == "sale":
+        daily = streams[(business_id, "sale", DAILY_SALES_STREAM)]
+        if daily.last_day is None or day > daily.last_day:
+            if daily.last_day is not None:
+                # The previous day is complete: flag it if sales dropped sharply
+                z = daily.score(daily.day_total)
+                if z is not None and z < -Z_THRESHOLD:
+                    anomalies.append((
+                        business_id, None, "sales_drop", "sale", None,
+                        daily.last_day, daily.day_total, daily.expected(), z
+                    ))
+                daily.update(daily.day_total)
+            daily.last_day, daily.day_total = day, amount
+        elif day == daily.last_day:
+            daily.day_total += amount
+        # Back-dated sales cannot reopen a closed day; they only feed the category stream
+    return anomalies
+
+def _record(conn, anomalies):
+    conn.executemany(
+        '''INSERT INTO transaction_anomalies
+        (business_id, transaction_id, kind, transaction_type, category, day, amount, expected, z_score)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        anomalies
+    )
+
+def score_transactions(conn, transactions):
+    """Score new transactions in arrival order and persist the updated streams.
+
+    ``transactions`` are (business_id, transaction_id, transaction_type,
+    amount, category, day) tuples with ``day`` as YYYY-MM-DD. Each touched
+    stream is read and written once, so a bulk import costs O(rows +
+    streams). The caller commits, keeping the insert and its scoring in
+    one database transaction. Returns the anomalies raised.
+    """
+    keys = set()
+    for business_id, _, transaction_type, _, category, _ in transactions:
+        keys.add((business_id, transaction_type, _category_key(category)))
+        if transaction_type == "sale":
+            keys.add((business_id, "sale", DAILY_SALES_STREAM))
+    streams = _load_streams(conn, sorted(keys))
+
+    anomalies = []
+    for business_id, transaction_id, transaction_type, amount, category, day in transactions:
+        anomalies.extend(_observe(streams, business_id, transaction_id, transaction_type, amount, category, day))
+    _save_streams(conn, streams)
+    if anomalies:
+        _record(conn, anomalies)
+    return anomalies
+
+def rebuild_state(conn, business_id):
+    """Replay a business's history in date order to (re)build its streams and anomalies"""
+    conn.execute('DELETE FROM anomaly_state WHERE business_id = ?', (business_id,))
+    conn.execute('DELETE FROM transaction_anomalies WHERE business_id = ?', (business_id,))
+    rows = conn.execute(
+        '''SELECT business_id, id, transaction_type, amount, category, date(date)
+        FROM transactions WHERE business_id = ? ORDER BY date, id''',
+        (business_id,)
+    ).fetchall()
+    anomalies = score_transactions(conn, rows) if rows else []
+    mark_replayed(conn, business_id)
+    conn.commit()
+    return len(rows), len(anomalies)
+
+def mark_replayed(conn, business_id):
+    """Record that the detector has seen all of a business's history (committed by the caller)"""
+    conn.execute('INSERT OR REPLACE INTO anomaly_replays (business_id) VALUES (?)', (business_id,))
+
+def is_replayed(conn, business_id):
+    return conn.execute('SELECT 1 FROM anomaly_replays WHERE business_id = ?', (business_id,)).fetchone() is not None
+
+def has_state(conn, business_id):
+    return conn.execute('SELECT 1 FROM anomaly_state WHERE business_id = ? LIMIT 1', (business_id,)).fetchone() is not None
+
+def get_anomalies(conn, business_id, include_acknowledged=False, limit=50):
+    """Most recent flagged anomalies of a business"""
+    query = '''SELECT id, transaction_id, kind, transaction_type, category, day, amount, expected,
+        z_score, acknowledged, detected_at
+        FROM transaction_anomalies WHERE business_id = ?'''
+    if not include_acknowledged:
+        query += ' AND acknowledged = 0'
+    query += ' ORDER BY day DESC, id DESC LIMIT ?'
+    return conn.execute(query, (business_id, limit)).fetchall()
+
+def acknowledge_anomaly(conn, anomaly_id):
+    conn.execute('UPDATE transaction_anomalies SET acknowledged = 1 WHERE id = ?', (anomaly_id,))
+    conn.commit()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild anomaly detector state from transaction history")
+    parser.add_argument("--db", default="bizsight.db")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    ensure_anomaly_schema(conn)
+    for (business_id,) in conn.execute('SELECT DISTINCT business_id FROM transactions').fetchall():
+        n_rows, n_anomalies = rebuild_state(conn, business_id)
+        print(f"Business {business_id}: replayed {n_rows:,} transactions, {n_anomalies} anomalies")
+    conn.close()
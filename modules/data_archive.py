@@ -0,0 +1,297 @@
+"""Zip archives of a business's transactions, inventory and receipts.
+
+An archive holds ``manifest.json``, ``transactions`` and ``inventory`` as
+NDJSON or Parquet, and every receipt as its own file under
+``receipts/``. Rows are read from the database in chunks and written
+into the zip as they arrive, so neither export nor import ever holds a
+whole table (or its receipt blobs) in memory.
+
+Run ``python -m modules.data_archive export 1 shop.zip`` to export
+business 1 and ``python -m modules.data_archive import shop.zip --user 1``
+to restore an archive as a new business.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+
+from modules.anomaly_detection import ensure_anomaly_schema, has_state, mark_replayed, rebuild_state, score_transactions
+
+ARCHIVE_VERSION = 1
+ARCHIVE_FORMATS = ("NDJSON", "Parquet")
+ARCHIVE_CHUNK_ROWS = 5000
+
+# (column, Arrow type) of each archived table; timestamps stay text as stored
+TRANSACTION_FIELDS = (
+    ("id", "int64"), ("transaction_type", "string"), ("amount", "float64"), ("category", "string"),
+    ("description", "string"), ("date", "string"), ("created_at", "string"),
+)
+INVENTORY_FIELDS = (
+    ("id", "int64"), ("item_name", "string"), ("quantity", "int64"), ("unit_price", "float64"),
+    ("reorder_level", "int64"), ("last_updated", "string"),
+)
+
+# Leading bytes of the receipt types the app accepts
+RECEIPT_TYPES = ((b"\x89PNG", "png"), (b"\xff\xd8\xff", "jpg"), (b"%PDF", "pdf"))
+
+def receipt_extension(data):
+    for magic, extension in RECEIPT_TYPES:
+        if data.startswith(magic):
+            return extension
+    return "bin"
+
+def _chunks(cursor, chunk_rows):
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            return
+        yield rows
+
+# ============================================================
+# EXPORT
+# ============================================================
+def _write_table(archive, name, fmt, fields, chunks, on_chunk):
+    """Stream row chunks into archive member ``name``; returns the row count"""
+    n_rows = 0
+    names = [field for field, _ in fields]
+    if fmt == "NDJSON":
+        with archive.open(f"{name}.ndjson", "w", force_zip64=True) as member:
+            for rows in chunks:
+                member.write("".join(json.dumps(dict(zip(names, row))) + "\n" for row in rows).encode())
+                n_rows += len(rows)
+                on_chunk(len(rows))
+        return n_rows
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    # Parquet writes its footer last, so it is spooled to disk and then copied in
+    with tempfile.TemporaryDirectory() as workdir:
+        spool = os.path.join(workdir, f"{name}.parquet")
+        schema = pa.schema([(field, pa.type_for_alias(arrow_type)) for field, arrow_type in fields])
+        with pq.ParquetWriter(spool, schema, compression="zstd") as writer:
+            for rows in chunks:
+                writer.write_table(pa.Table.from_pylist([dict(zip(names, row)) for row in rows], schema=schema))
+                n_rows += len(rows)
+                on_chunk(len(rows))
+        # Already compressed; stored members also stay seekable for the import
+        archive.write(spool, f"{name}.parquet", compress_type=zipfile.ZIP_STORED)
+    return n_rows
+
+def export_archive(db_path, business_id, path, fmt="NDJSON", chunk_rows=ARCHIVE_CHUNK_ROWS, job=None):
+    """Write business ``business_id`` to a zip archive at ``path``; returns counts, bytes and seconds"""
+    if fmt not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unknown archive format: {fmt}")
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        profile = conn.execute(
+            'SELECT business_name, business_type, city FROM business_profiles WHERE id = ?', (business_id,)
+        ).fetchone()
+        if profile is None:
+            raise ValueError(f"Business {business_id} does not exist")
+        total = conn.execute(
+            'SELECT (SELECT COUNT(*) FROM transactions WHERE business_id = ?), (SELECT COUNT(*) FROM inventory WHERE business_id = ?)',
+            (business_id, business_id)
+        ).fetchone()
+        done = 0
+
+        def on_chunk(n_rows):
+            nonlocal done
+            done += n_rows
+            if job is not None:
+                job.check_cancelled()
+                job.update(rows_done=done)
+
+        if job is not None:
+            job.update(rows_done=0, total_rows=sum(total), phase="Archiving")
+        counts = {"receipts": 0}
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+            cursor = conn.execute(
+                '''SELECT id, transaction_type, amount, category, description, date, created_at
+                FROM transactions WHERE business_id = ? ORDER BY date, id''',
+                (business_id,)
+            )
+            counts["transactions"] = _write_table(
+                archive, "transactions", fmt, TRANSACTION_FIELDS, _chunks(cursor, chunk_rows), on_chunk
+            )
+            cursor = conn.execute(
+                '''SELECT id, item_name, quantity, unit_price, reorder_level, last_updated
+                FROM inventory WHERE business_id = ? ORDER BY id''',
+                (business_id,)
+            )
+            counts["inventory"] = _write_table(
+                archive, "inventory", fmt, INVENTORY_FIELDS, _chunks(cursor, chunk_rows), on_chunk
+            )
+
+            # Receipts are read one row at a time; images are already compressed
+            if job is not None:
+                job.update(phase="Archiving receipts")
+            for transaction_id, data in conn.execute(
+                'SELECT id, receipt_image FROM transactions WHERE business_id = ? AND receipt_image IS NOT NULL',
+                (business_id,)
+            ):
+                archive.writestr(
+                    f"receipts/{transaction_id}.{receipt_extension(data)}", data, compress_type=zipfile.ZIP_STORED
+                )
+                counts["receipts"] += 1
+
+            archive.writestr("manifest.json", json.dumps({
+                "archive_version": ARCHIVE_VERSION,
+                "format": fmt,
+                "business": dict(zip(("business_name", "business_type", "city"), profile)),
+                "counts": counts,
+                "exported_at": datetime.now().isoformat(timespec="seconds"),
+            }, indent=2))
+        os.replace(tmp_path, path)
+    finally:
+        conn.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return {**counts, "bytes": os.path.getsize(path), "seconds": time.perf_counter() - started}
+
+# ============================================================
+# IMPORT
+# ============================================================
+def _read_table(archive, name, fmt, chunk_rows):
+    """Yield lists of row dicts from archive member ``name``"""
+    if fmt == "NDJSON":
+        member_name = f"{name}.ndjson"
+        if member_name not in archive.namelist():
+            return
+        with archive.open(member_name) as member:
+            rows = []
+            for line in member:
+                rows.append(json.loads(line))
+                if len(rows) >= chunk_rows:
+                    yield rows
+                    rows = []
+            if rows:
+                yield rows
+        return
+
+    import pyarrow.parquet as pq
+    member_name = f"{name}.parquet"
+    if member_name not in archive.namelist():
+        return
+    with archive.open(member_name) as member:
+        for batch in pq.ParquetFile(member).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pylist()
+
+def _receipts(archive):
+    """Archive member of each exported transaction id's receipt"""
+    receipts = {}
+    for name in archive.namelist():
+        if name.startswith("receipts/") and not name.endswith("/"):
+            receipts[int(os.path.splitext(os.path.basename(name))[0])] = name
+    return receipts
+
+def import_archive(db_path, path, business_id=None, user_id=None, chunk_rows=ARCHIVE_CHUNK_ROWS, job=None):
+    """Restore an archive into ``business_id``, or into a new business of ``user_id``.
+
+    Rows get new ids. Everything is inserted in one database transaction
+    with batched ``executemany`` calls, and imported transactions are fed
+    to the anomaly detector. Returns the target business id and counts.
+    """
+    if business_id is None and user_id is None:
+        raise ValueError("Pass the business to import into or the user to create it for")
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    try:
+        with zipfile.ZipFile(path) as archive:
+            manifest = json.loads(archive.read("manifest.json"))
+            if manifest.get("archive_version") != ARCHIVE_VERSION:
+                raise ValueError(f"Unsupported archive version: {manifest.get('archive_version')}")
+            fmt = manifest["format"]
+            receipts = _receipts(archive)
+            if job is not None:
+                job.update(rows_done=0, total_rows=sum(manifest["counts"].get(k, 0) for k in ("transactions", "inventory")), phase="Importing")
+
+            ensure_anomaly_schema(conn)
+            if business_id is None:
+                business = manifest["business"]
+                business_id = conn.execute(
+                    'INSERT INTO business_profiles (user_id, business_name, business_type, city) VALUES (?, ?, ?, ?)',
+                    (user_id, business["business_name"], business.get("business_type"), business.get("city"))
+                ).lastrowid
+                # The archive's rows, scored as they are inserted, are the new business's whole history
+                mark_replayed(conn, business_id)
+            # Scoring row by row is only right when the detector has no prior state for the
+            # business; otherwise back-dated history would be scored against newer baselines,
+            # so skip it and replay the business's whole history once everything is inserted
+            rebuild_after = has_state(conn, business_id)
+
+            counts = {"transactions": 0, "inventory": 0, "receipts": 0}
+            for rows in _read_table(archive, "transactions", fmt, chunk_rows):
+                members = [receipts.get(row["id"]) for row in rows]
+                conn.executemany(
+                    '''INSERT INTO transactions
+                    (business_id, transaction_type, amount, category, description, date, receipt_image, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                    (
+                        (business_id, row["transaction_type"], row["amount"], row["category"], row["description"],
+                         row["date"], archive.read(member) if member else None, row["created_at"])
+                        for row, member in zip(rows, members)
+                    )
+                )
+                if not rebuild_after:
+                    # The connection holds the write lock, so the batch got consecutive ids
+                    last_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+                    score_transactions(conn, [
+                        (business_id, transaction_id, row["transaction_type"], row["amount"], row["category"],
+                         (row["date"] or "")[:10])
+                        for transaction_id, row in zip(range(last_id - len(rows) + 1, last_id + 1), rows)
+                    ])
+                counts["receipts"] += sum(member is not None for member in members)
+                counts["transactions"] += len(rows)
+                if job is not None:
+                    job.check_cancelled()
+                    job.update(rows_done=counts["transactions"])
+
+            for rows in _read_table(archive, "inventory", fmt, chunk_rows):
+                conn.executemany(
+                    '''INSERT INTO inventory (business_id, item_name, quantity, unit_price, reorder_level, last_updated)
+                    VALUES (?, ?, ?, ?, ?, ?)''',
+                    [(business_id, row["item_name"], row["quantity"], row["unit_price"], row["reorder_level"],
+                      row["last_updated"]) for row in rows]
+                )
+                counts["inventory"] += len(rows)
+                if job is not None:
+                    job.check_cancelled()
+                    job.update(rows_done=counts["transactions"] + counts["inventory"])
+        conn.commit()
+        if rebuild_after:
+            if job is not None:
+                job.update(phase="Rebuilding anomaly baselines")
+            rebuild_state(conn, business_id)
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return {"business_id": business_id, **counts, "seconds": time.perf_counter() - started}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import BizSight business archives")
+    parser.add_argument("--db", default="bizsight.db")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write a business to a zip archive")
+    export_parser.add_argument("business_id", type=int)
+    export_parser.add_argument("path")
+    export_parser.add_argument("--format", choices=ARCHIVE_FORMATS, default="NDJSON")
+    import_parser = commands.add_parser("import", help="Restore a zip archive")
+    import_parser.add_argument("path")
+    target = import_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--user", type=int, help="Create a new business for this user id")
+    target.add_argument("--business", type=int, help="Append to this existing business id")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        result = export_archive(args.db, args.business_id, args.path, args.format)
+    else:
+        result = import_archive(args.db, args.path, business_id=args.business, user_id=args.user)
+    print(json.dumps(result, indent=2))
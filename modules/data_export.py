@@ -0,0 +1,118 @@
+"""Chunked export of analytics frames to compressed files.
+
+Frames are written a slice at a time straight to a temp file, so no
+format ever materializes the whole export as one string or buffer.
+Parquet and Feather slices are converted to Arrow record batches and
+appended to a single open writer; CSV slices go through a gzip stream.
+"""
+import gzip
+import os
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+EXPORT_FORMATS = {
+    "Parquet": {"extension": "parquet", "mime": "application/vnd.apache.parquet"},
+    "CSV (gzip)": {"extension": "csv.gz", "mime": "application/gzip"},
+    "Feather": {"extension": "feather", "mime": "application/vnd.apache.arrow.file"},
+}
+# Frames at least this long default to Parquet; smaller ones to the more familiar CSV
+PARQUET_DEFAULT_ROWS = 50_000
+EXPORT_CHUNK_ROWS = 50_000
+DEFAULT_EXPORT_DIR = Path(tempfile.gettempdir()) / "bizsight_exports"
+
+def default_format(n_rows):
+    return "Parquet" if n_rows >= PARQUET_DEFAULT_ROWS else "CSV (gzip)"
+
+def _chunks(df, chunk_rows):
+    for start in range(0, len(df), chunk_rows):
+        yield start, df.iloc[start:start + chunk_rows]
+
+def _write_csv(df, path, chunk_rows, progress):
+    with gzip.open(path, "wt", compresslevel=6, newline="") as f:
+        if df.empty:
+            df.to_csv(f, index=False)
+        for start, chunk in _chunks(df, chunk_rows):
+            chunk.to_csv(f, header=start == 0, index=False)
+            progress(start + len(chunk))
+
+def _arrow_schema(df, chunk_rows):
+    """Arrow schema inferred from the first chunk's values, which later chunks are cast to.
+
+    An empty slice types every object column as ``null``, so the schema
+    comes from real rows; columns still all-null there are typed from
+    their first non-null values further down (or as strings).
+    """
+    schema = pa.Schema.from_pandas(df.iloc[:chunk_rows], preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            values = df[field.name].dropna()
+            arrow_type = pa.array(values.iloc[:chunk_rows]).type if len(values) else pa.string()
+            schema = schema.set(i, field.with_type(arrow_type))
+    return schema
+
+def _write_arrow(df, path, chunk_rows, progress, fmt):
+    schema = _arrow_schema(df, chunk_rows)
+    if fmt == "Parquet":
+        writer = pq.ParquetWriter(path, schema, compression="zstd")
+    else:
+        # Feather v2 is the Arrow IPC file format
+        writer = pa.ipc.new_file(path, schema, options=pa.ipc.IpcWriteOptions(compression="lz4"))
+    try:
+        for start, chunk in _chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            progress(start + len(chunk))
+    finally:
+        writer.close()
+
+def export_frame(df, path, fmt, columns=None, chunk_rows=EXPORT_CHUNK_ROWS, job=None):
+    """Write ``df`` (optionally only ``columns``) to ``path`` in ``fmt``, slice by slice.
+
+    The file appears under ``path`` only once complete. Returns rows,
+    bytes and seconds of the export.
+    """
+    if columns is not None:
+        df = df[list(columns)]
+    started = time.perf_counter()
+    if job is not None:
+        job.update(rows_done=0, total_rows=len(df), phase="Exporting")
+
+    def progress(rows_done):
+        if job is not None:
+            job.check_cancelled()
+            job.update(rows_done=rows_done)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        if fmt == "CSV (gzip)":
+            _write_csv(df, tmp_path, chunk_rows, progress)
+        elif fmt in ("Parquet", "Feather"):
+            _write_arrow(df, tmp_path, chunk_rows, progress, fmt)
+        else:
+            raise ValueError(f"Unknown export format: {fmt}")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return {
+        "rows": len(df),
+        "columns": len(df.columns),
+        "bytes": os.path.getsize(path),
+        "seconds": time.perf_counter() - started,
+    }
+
+def new_export_path(extension, export_dir=DEFAULT_EXPORT_DIR, keep=20):
+    """Fresh ``.extension`` file path in ``export_dir``, dropping all but the ``keep`` newest exports"""
+    export_dir = Path(export_dir)
+    export_dir.mkdir(parents=True, exist_ok=True)
+    exports = sorted(
+        (p for p in export_dir.iterdir() if not p.name.endswith(".tmp")),
+        key=lambda p: p.stat().st_mtime
+    )
+    for old in exports[:-keep] if keep else exports:
+        old.unlink(missing_ok=True)
+    return export_dir / f"{uuid.uuid4().hex}.{extension}"
@@ -0,0 +1,218 @@
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# FEATURE SCHEMA
+# ============================================================
+# Every model feature declares its logical type, the inclusive valid range
+# (None = unbounded) and the default used when a value or column is missing.
+FEATURE_SCHEMA = {
+    "business_type": {"dtype": "category", "default": "General"},
+    "city": {"dtype": "category", "default": "Unknown"},
+    "city_tier": {"dtype": "int", "min": 1, "max": 3, "default": 1},
+    "store_size_sqft": {"dtype": "int", "min": 0, "max": None, "default": 1200},
+    "years_of_operation": {"dtype": "int", "min": 0, "max": 200, "default": 5},
+    "month": {"dtype": "int", "min": 1, "max": 12, "default": 1},
+    "year": {"dtype": "int", "min": 1900, "max": 2100, "default": 2024},
+    "is_festival_season": {"dtype": "int", "min": 0, "max": 1, "default": 0},
+    "avg_daily_footfall": {"dtype": "int", "min": 0, "max": None, "default": 200},
+    "conversion_rate": {"dtype": "float", "min": 0.0, "max": 1.0, "default": 0.2},
+    "avg_transaction_value": {"dtype": "float", "min": 0.0, "max": None, "default": 900},
+    "customer_rating": {"dtype": "float", "min": 0.0, "max": 5.0, "default": 4.0},
+    "marketing_spend": {"dtype": "float", "min": 0.0, "max": None, "default": 50000},
+    "discount_percentage": {"dtype": "float", "min": 0.0, "max": 100.0, "default": 10},
+    "inventory_level": {"dtype": "int", "min": 0, "max": None, "default": 500},
+    "supplier_cost": {"dtype": "float", "min": 0.0, "max": None, "default": 50000},
+    "logistics_cost": {"dtype": "float", "min": 0.0, "max": None, "default": 15000},
+    "rent_cost": {"dtype": "float", "min": 0.0, "max": None, "default": 30000},
+    "employee_count": {"dtype": "int", "min": 0, "max": None, "default": 10},
+    "avg_employee_salary": {"dtype": "float", "min": 0.0, "max": None, "default": 20000},
+    "electricity_cost": {"dtype": "float", "min": 0.0, "max": None, "default": 8000},
+    "profit_margin": {"dtype": "float", "min": -1.0, "max": 1.0, "default": 0.2},
+    "marketing_roi": {"dtype": "float", "min": 0.0, "max": None, "default": 2.0},
+    "employee_efficiency": {"dtype": "float", "min": 0.0, "max": None, "default": 50000},
+}
+
+DEFAULTS = {col: spec["default"] for col, spec in FEATURE_SCHEMA.items()}
+
+# Thousands separators, currency symbols and whitespace found in exported spreadsheets
+_NUMERIC_NOISE = r"[,\s₹$€£]"
+
+# ============================================================
+# SCHEMA VALIDATION & COERCION
+# ============================================================
+def _coerce_numeric(series, spec):
+    """Coerce one column to a numeric dtype; returns (series, coerced_count)"""
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series, 0
+
+    if pd.api.types.is_bool_dtype(series):
+        return series.astype(np.int8), 0
+
+    cleaned = series
+    if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+        cleaned = series.astype(str).str.replace(_NUMERIC_NOISE, "", regex=True)
+    numeric = pd.to_numeric(cleaned, errors="coerce")
+    # Values parsed from a non-numeric representation; unparseable ones
+    # become NaN and are reported as defaulted by the caller
+    coerced = int(numeric.notna().sum())
+    return numeric, coerced
+
+def _downcast(series, spec):
+    """Downcast a numeric column to the narrowest lossless dtype.
+
+    Count-like features become the smallest integer type. Monetary and ratio
+    features stay floating point (so derived sums cannot wrap around) and are
+    narrowed to float32 only when every value survives the round trip.
+    """
+    values = series.to_numpy()
+    if spec["dtype"] == "int":
+        if series.dtype.kind == "f" and not np.array_equal(values, np.floor(values)):
+            return series
+        return pd.to_numeric(series, downcast="integer")
+
+    if series.dtype == np.float32:
+        return series
+    narrow = values.astype(np.float32)
+    if np.array_equal(narrow, values):
+        return pd.Series(narrow, index=series.index, name=series.name)
+    if series.dtype.kind in "iu":
+        return series.astype(np.float64)
+    return series
+
+def validate_schema(df, columns):
+    """Coerce, validate and downcast the model features of a dataframe.
+
+    Returns the aligned frame (only ``columns``, in order) and a per-column
+    validation report. Columns that are already clean are reused without
+    copying; every check is a single vectorized pass over the column.
+    """
+    n_rows = len(df)
+    aligned = {}
+    report = []
+
+    for col in columns:
+        spec = FEATURE_SCHEMA.get(col, {"dtype": "float", "default": 0})
+        coerced = defaulted = out_of_range = 0
+
+        if col not in df.columns:
+            default = spec["default"]
+            if spec["dtype"] == "category":
+                series = pd.Series([default] * n_rows, index=df.index, dtype=object)
+            else:
+                series = pd.Series(np.full(n_rows, default), index=df.index)
+                series = _downcast(series, spec)
+            aligned[col] = series
+            report.append({
+                "Column": col,
+                "Expected Type": spec["dtype"],
+                "Source Type": "missing",
+                "Final Type": str(series.dtype),
+                "Coerced": 0,
+                "Defaulted": n_rows,
+                "Out of Range": 0,
+                "Status": "Missing (defaulted)",
+            })
+            continue
+
+        series = df[col]
+        source_type = str(series.dtype)
+
+        if spec["dtype"] == "category":
+            missing = series.isna()
+            defaulted = int(missing.sum())
+            if not (pd.api.types.is_object_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype)):
+                coerced = n_rows - defaulted
+                series = series.astype(str).where(~missing, None)
+            if defaulted:
+                series = series.fillna(spec["default"])
+        else:
+            series, coerced = _coerce_numeric(series, spec)
+
+            missing = series.isna()
+            defaulted = int(missing.sum())
+            if defaulted:
+                series = series.fillna(spec["default"])
+
+            low, high = spec.get("min"), spec.get("max")
+            if low is not None or high is not None:
+                violations = np.zeros(n_rows, dtype=bool)
+                if low is not None:
+                    violations |= series.to_numpy() < low
+                if high is not None:
+                    violations |= series.to_numpy() > high
+                out_of_range = int(violations.sum())
+                if out_of_range:
+                    series = series.clip(lower=low, upper=high)
+
+            series = _downcast(series, spec)
+
+        aligned[col] = series
+        if coerced or defaulted or out_of_range:
+            status = "Fixed"
+        else:
+            status = "OK"
+        report.append({
+            "Column": col,
+            "Expected Type": spec["dtype"],
+            "Source Type": source_type,
+            "Final Type": str(series.dtype),
+            "Coerced": coerced,
+            "Defaulted": defaulted,
+            "Out of Range": out_of_range,
+            "Status": status,
+        })
+
+    aligned_df = pd.DataFrame(aligned, index=df.index, copy=False)
+    return aligned_df, pd.DataFrame(report)
+
+# ============================================================
+# MEMORY OPTIMIZATION
+# ============================================================
+def column_memory(df):
+    """Deep memory usage in bytes per column (index excluded)"""
+    return df.memory_usage(deep=True, index=False)
+
+def optimize_memory(df, source=None, category_ratio=0.5):
+    """Shrink a dataframe in place and report per-column memory.
+
+    Low-cardinality string columns (unique/rows <= ``category_ratio``)
+    become categoricals, integers are downcast to the narrowest type and
+    float64 columns become float32 when that is lossless. ``source`` is the
+    frame as originally loaded; columns it shares with ``df`` are reported
+    against their as-loaded footprint.
+    """
+    before_bytes = column_memory(df)
+    before_types = df.dtypes.astype(str)
+    if source is not None:
+        shared = [col for col in df.columns if col in source.columns]
+        before_bytes.loc[shared] = column_memory(source[shared])
+        before_types.loc[shared] = source[shared].dtypes.astype(str)
+
+    n_rows = len(df)
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            if n_rows and series.nunique(dropna=False) / n_rows <= category_ratio:
+                df[col] = series.astype("category")
+        elif pd.api.types.is_bool_dtype(series) or isinstance(series.dtype, pd.CategoricalDtype):
+            continue
+        elif series.dtype.kind in "iu":
+            df[col] = pd.to_numeric(series, downcast="integer")
+        elif series.dtype == np.float64:
+            narrow = series.to_numpy().astype(np.float32)
+            if np.array_equal(narrow, series.to_numpy(), equal_nan=True):
+                df[col] = narrow
+
+    after_bytes = column_memory(df)
+    report = pd.DataFrame({
+        "Column": df.columns,
+        "Type Before": before_types.to_numpy(),
+        "Type After": df.dtypes.astype(str).to_numpy(),
+        "Before (MB)": (before_bytes.to_numpy() / 1024 ** 2).round(3),
+        "After (MB)": (after_bytes.to_numpy() / 1024 ** 2).round(3),
+    })
+    report["Saved %"] = (
+        (1 - report["After (MB)"] / report["Before (MB)"].replace(0, np.nan)) * 100
+    ).fillna(0).round(1)
+    return df, report
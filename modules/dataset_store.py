@@ -0,0 +1,79 @@
+import os
+import threading
+from pathlib import Path
+
+import pyarrow as pa
+
+# ============================================================
+# SHARED DATASET STORE
+# ============================================================
+class SharedDatasetStore:
+    """Process-wide store of enriched datasets held in memory-mapped Arrow files.
+
+    Each dataset is built once per process, written to an uncompressed Arrow
+    IPC file and mapped back read-only. Every session receives the same
+    zero-copy pandas view over the mapping, so memory grows with the number
+    of distinct datasets rather than the number of users. Sessions narrow
+    the view with boolean masks instead of keeping filtered copies.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._entries = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _key_lock(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, key, builder):
+        """Return (view, extras) for ``key``, building it with ``builder()`` on first use.
+
+        ``builder`` returns the enriched dataframe and a dict of small
+        extras (reports, metadata) that are shared alongside it.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry
+
+        # Concurrent sessions asking for the same dataset wait for a single build
+        with self._key_lock(key):
+            entry = self._entries.get(key)
+            if entry is None:
+                frame, extras = builder()
+                entry = (self._publish(key, frame), extras)
+                self._entries[key] = entry
+        return entry
+
+    def _publish(self, key, frame):
+        """Write a frame to the store and return a read-only view over the mapping"""
+        path = self.cache_dir / f"{key}.arrow"
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        del frame
+
+        # Write beside the target and swap atomically so another process
+        # that still maps an older file keeps a valid inode
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        del table
+
+        mapped = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+        # split_blocks keeps one block per column so numeric columns and
+        # categorical codes stay zero-copy views of the mapped buffers
+        return mapped.to_pandas(split_blocks=True)
+
+    def keys(self):
+        """Keys of the datasets currently held by the store"""
+        return list(self._entries)
+
+    def nbytes(self):
+        """Total size of the mapped dataset files in bytes"""
+        return sum(
+            (self.cache_dir / f"{key}.arrow").stat().st_size
+            for key in self._entries
+        )
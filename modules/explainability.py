@@ -0,0 +1,152 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# FINGERPRINTS
+# ============================================================
+def dataset_fingerprint(df, columns):
+    """Content hash of the model features of a dataframe"""
+    present = [col for col in columns if col in df.columns]
+    row_hashes = pd.util.hash_pandas_object(df[present], index=False).to_numpy()
+    digest = hashlib.sha1(row_hashes.tobytes())
+    digest.update(",".join(present).encode())
+    return digest.hexdigest()[:16]
+
+def model_fingerprint(pipeline):
+    """Content hash of the fitted booster, used as the model version in cache keys"""
+    booster = pipeline.named_steps["model"].get_booster()
+    return hashlib.sha1(bytes(booster.save_raw("ubj"))).hexdigest()[:12]
+
+# ============================================================
+# RESULT CACHE
+# ============================================================
+class ExplanationCache:
+    """Small thread-safe LRU of explanation results shared by all sessions"""
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._guard = threading.Lock()
+
+    def get(self, key):
+        with self._guard:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._guard:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+# ============================================================
+# FEATURE ATTRIBUTIONS
+# ============================================================
+def feature_owner_matrix(preprocessor, columns):
+    """0/1 matrix mapping each transformed feature to its original input column.
+
+    Scaled numeric features map one-to-one; one-hot outputs are summed back
+    into the categorical column they were expanded from.
+    """
+    owners = []
+    for name, transformer, cols in preprocessor.transformers_:
+        if transformer == "drop":
+            continue
+        cols = list(cols)
+        if hasattr(transformer, "categories_"):
+            drop_idx = getattr(transformer, "drop_idx_", None)
+            for i, (col, categories) in enumerate(zip(cols, transformer.categories_)):
+                width = len(categories) - (1 if drop_idx is not None and drop_idx[i] is not None else 0)
+                owners.extend([col] * width)
+        else:
+            owners.extend(cols)
+
+    matrix = np.zeros((len(owners), len(columns)), dtype=np.float32)
+    position = {col: i for i, col in enumerate(columns)}
+    for row, col in enumerate(owners):
+        matrix[row, position[col]] = 1.0
+    return matrix
+
+def explain_rows(pipeline, df, columns, exact=True, chunk_rows=2000, job=None):
+    """Per-row profit attributions for every original feature, via XGBoost pred_contribs.
+
+    Rows are transformed and explained in chunks so memory stays bounded
+    and ``job`` can report progress and cancel between chunks; XGBoost
+    parallelizes each chunk across all cores. ``exact=False`` uses the
+    much cheaper approximate (Saabas) contributions.
+    Returns float32 contributions of shape (rows, len(columns)) and the bias.
+    """
+    # Imported here so loading this module does not pull in XGBoost before the model loads
+    import xgboost as xgb
+
+    preprocessor = pipeline.named_steps["preprocessing"]
+    booster = pipeline.named_steps["model"].get_booster()
+    owners = feature_owner_matrix(preprocessor, columns)
+
+    n_rows = len(df)
+    contributions = np.empty((n_rows, len(columns)), dtype=np.float32)
+    bias = 0.0
+    for start in range(0, n_rows, chunk_rows):
+        if job is not None:
+            job.check_cancelled()
+        stop = min(start + chunk_rows, n_rows)
+        transformed = preprocessor.transform(df.iloc[start:stop][columns])
+        raw = booster.predict(
+            xgb.DMatrix(transformed, nthread=-1),
+            pred_contribs=True,
+            approx_contribs=not exact
+        )
+        # Last column is the bias term, identical for every row
+        contributions[start:stop] = raw[:, :-1] @ owners
+        bias = float(raw[0, -1])
+        if job is not None:
+            job.update(rows_done=stop)
+    return {"contributions": contributions, "bias": bias, "columns": list(columns)}
+
+def attribution_summary(contributions, columns):
+    """Global importance (mean |contribution|) and mean signed contribution per feature"""
+    summary = pd.DataFrame({
+        "Feature": columns,
+        "Mean |Contribution|": np.abs(contributions).mean(axis=0),
+        "Mean Contribution": contributions.mean(axis=0),
+    })
+    return summary.sort_values("Mean |Contribution|", ascending=False, ignore_index=True)
+
+# ============================================================
+# PARTIAL DEPENDENCE
+# ============================================================
+def partial_dependence(pipeline, df, columns, feature, grid_points=20, sample_rows=1000, seed=42):
+    """Average predicted profit as ``feature`` sweeps a grid, other features as observed.
+
+    A random sample of rows is replicated once per grid value and scored
+    in a single batched predict. Numeric grids span the 2nd-98th
+    percentiles; categorical grids use the most frequent categories.
+    """
+    rng = np.random.default_rng(seed)
+    n_sample = min(sample_rows, len(df))
+    sample = df[columns].iloc[np.sort(rng.choice(len(df), n_sample, replace=False))]
+
+    values = df[feature]
+    if pd.api.types.is_numeric_dtype(values):
+        grid = np.unique(np.nanpercentile(values.to_numpy(dtype=np.float64), np.linspace(2, 98, grid_points)))
+    else:
+        grid = values.value_counts().index[:grid_points].to_numpy()
+
+    stacked = pd.concat([sample] * len(grid), ignore_index=True)
+    stacked[feature] = np.repeat(grid, n_sample)
+    predictions = np.asarray(pipeline.predict(stacked)).reshape(len(grid), n_sample)
+    return {
+        "feature": feature,
+        "grid": grid,
+        "average": predictions.mean(axis=1),
+        "p10": np.percentile(predictions, 10, axis=1),
+        "p90": np.percentile(predictions, 90, axis=1),
+        "sample_rows": n_sample,
+    }
@@ -0,0 +1,277 @@
+"""Daily sales and expense forecasting per business.
+
+Each business's transactions are rolled up to daily sale and expense
+totals (days without transactions count as zero) and modelled with a
+weekly-seasonal SARIMAX. The fitted parameters are persisted in the
+``forecast_models`` table. When new days arrive, the stored parameters
+are re-applied with a Kalman filter pass instead of a new maximum
+likelihood fit. A full refit happens only when already-fitted history
+changes (back-dated or edited transactions) or after ``REFIT_AFTER_DAYS``
+new days.
+
+Run ``python -m modules.forecasting --workers 8`` to fit every business in
+the database in parallel processes.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+SERIES = ("sale", "expense")
+HORIZONS = (30, 90)
+SEASONAL_PERIOD = 7
+# Three seasonal cycles are the least a weekly model can be fitted on
+MIN_HISTORY_DAYS = 3 * SEASONAL_PERIOD
+REFIT_AFTER_DAYS = 28
+MODEL_ORDER = (1, 1, 1)
+SEASONAL_ORDER = (1, 0, 1, SEASONAL_PERIOD)
+
+FORECAST_MODELS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS forecast_models (
+        business_id INTEGER NOT NULL,
+        series TEXT NOT NULL, -- 'sale' or 'expense'
+        start_date TEXT NOT NULL,
+        n_obs INTEGER NOT NULL,
+        signature TEXT NOT NULL,
+        params TEXT NOT NULL,
+        fitted_at TIMESTAMP NOT NULL,
+        PRIMARY KEY (business_id, series),
+        FOREIGN KEY (business_id) REFERENCES business_profiles(id)
+    )
+'''
+
+# ============================================================
+# DAILY ROLLUPS
+# ============================================================
+def last_complete_day():
+    """Yesterday; today's totals are still growing and would bias the fit"""
+    return date.today() - timedelta(days=1)
+
+def daily_rollups(conn, business_ids=None, end_day=None):
+    """Zero-filled daily totals per (business_id, series), from one grouped query"""
+    end_day = end_day or last_complete_day()
+    query = '''
+        SELECT business_id, transaction_type, date(date) AS day, SUM(amount)
+        FROM transactions
+        WHERE date(date) <= ?
+    '''
+    params = [end_day.isoformat()]
+    if business_ids is not None:
+        query += f' AND business_id IN ({",".join("?" * len(business_ids))})'
+        params.extend(business_ids)
+    query += ' GROUP BY business_id, transaction_type, day'
+    rows = pd.DataFrame(
+        conn.execute(query, params).fetchall(),
+        columns=["business_id", "series", "day", "amount"]
+    )
+    if rows.empty:
+        return {}
+    rows["day"] = pd.to_datetime(rows["day"])
+
+    rollups = {}
+    for business_id, group in rows.groupby("business_id"):
+        # Every series of a business shares its first transaction day
+        days = pd.date_range(group["day"].min(), pd.Timestamp(end_day), freq="D")
+        for series in SERIES:
+            values = group[group["series"] == series].set_index("day")["amount"]
+            rollups[(int(business_id), series)] = values.reindex(days, fill_value=0.0).astype(np.float64)
+    return rollups
+
+def _signature(values):
+    return hashlib.sha1(np.ascontiguousarray(values, dtype=np.float64).tobytes()).hexdigest()
+
+# ============================================================
+# MODEL FITTING
+# ============================================================
+def _model(history):
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+    return SARIMAX(history, order=MODEL_ORDER, seasonal_order=SEASONAL_ORDER)
+
+def fit_series(history, state=None):
+    """Fitted SARIMAX results for a daily series, reusing ``state`` when possible.
+
+    Returns (results, state, mode): mode is "updated" when the stored
+    parameters were re-applied to the extended series with a filter pass,
+    "refit" when parameters were estimated again.
+    """
+    values = history.to_numpy()
+    reusable = (
+        state is not None
+        and state["start_date"] == history.index[0].date().isoformat()
+        and state["n_obs"] <= len(values) < state["n_obs"] + REFIT_AFTER_DAYS
+        and state["signature"] == _signature(values[:state["n_obs"]])
+    )
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model = _model(history)
+        if reusable:
+            return model.filter(np.asarray(state["params"])), state, "updated"
+        results = model.fit(disp=False)
+    state = {
+        "start_date": history.index[0].date().isoformat(),
+        "n_obs": len(values),
+        "signature": _signature(values),
+        "params": np.asarray(results.params).tolist(),
+        "fitted_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    return results, state, "refit"
+
+def forecast_frame(results, horizon=max(HORIZONS)):
+    """Daily point forecast with 80% and 95% intervals, floored at zero"""
+    forecast = results.get_forecast(horizon)
+    ci80 = forecast.conf_int(alpha=0.2).to_numpy()
+    ci95 = forecast.conf_int(alpha=0.05).to_numpy()
+    frame = pd.DataFrame({
+        "mean": forecast.predicted_mean.to_numpy(),
+        "lower_80": ci80[:, 0],
+        "upper_80": ci80[:, 1],
+        "lower_95": ci95[:, 0],
+        "upper_95": ci95[:, 1],
+    }, index=forecast.predicted_mean.index)
+    return frame.clip(lower=0)
+
+def forecast_history(history, state=None, horizon=max(HORIZONS)):
+    """Forecast one daily series; returns (forecast frame or None, new state, mode)"""
+    if len(history) < MIN_HISTORY_DAYS or not history.any():
+        return None, state, "insufficient"
+    results, state, mode = fit_series(history, state)
+    return forecast_frame(results, horizon), state, mode
+
+# ============================================================
+# STATE PERSISTENCE
+# ============================================================
+def load_states(conn, business_ids=None):
+    """Stored model states keyed by (business_id, series)"""
+    query = 'SELECT business_id, series, start_date, n_obs, signature, params, fitted_at FROM forecast_models'
+    params = []
+    if business_ids is not None:
+        query += f' WHERE business_id IN ({",".join("?" * len(business_ids))})'
+        params = list(business_ids)
+    return {
+        (business_id, series): {
+            "start_date": start_date, "n_obs": n_obs, "signature": signature,
+            "params": json.loads(params_json), "fitted_at": fitted_at,
+        }
+        for business_id, series, start_date, n_obs, signature, params_json, fitted_at in conn.execute(query, params)
+    }
+
+def save_states(conn, states):
+    """Upsert model states keyed by (business_id, series)"""
+    conn.executemany(
+        '''INSERT OR REPLACE INTO forecast_models
+        (business_id, series, start_date, n_obs, signature, params, fitted_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)''',
+        [
+            (business_id, series, state["start_date"], state["n_obs"], state["signature"],
+             json.dumps(state["params"]), state["fitted_at"])
+            for (business_id, series), state in states.items()
+        ]
+    )
+    conn.commit()
+
+# ============================================================
+# PER-BUSINESS & BATCH FORECASTS
+# ============================================================
+def forecast_business(db_path, business_id, horizon=max(HORIZONS)):
+    """Sale and expense forecasts for one business, persisting refreshed model states.
+
+    Returns {series: {"history", "forecast", "mode"}}; "forecast" is None
+    when the business has fewer than ``MIN_HISTORY_DAYS`` days of history.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        rollups = daily_rollups(conn, [business_id])
+        states = load_states(conn, [business_id])
+        output, changed = {}, {}
+        for series in SERIES:
+            history = rollups.get((business_id, series))
+            if history is None:
+                output[series] = {"history": pd.Series(dtype=np.float64), "forecast": None, "mode": "insufficient"}
+                continue
+            key = (business_id, series)
+            forecast, state, mode = forecast_history(history, states.get(key), horizon)
+            if mode == "refit":
+                changed[key] = state
+            output[series] = {"history": history, "forecast": forecast, "mode": mode}
+        if changed:
+            save_states(conn, changed)
+        return output
+    finally:
+        conn.close()
+
+def _forecast_task(task):
+    """Process-pool worker: forecast one series from its values and stored state"""
+    key, start_date, values, state, horizon = task
+    history = pd.Series(values, index=pd.date_range(start_date, periods=len(values), freq="D"))
+    forecast, state, mode = forecast_history(history, state, horizon)
+    return key, forecast, state, mode
+
+def forecast_all(db_path, business_ids=None, workers=None, horizon=max(HORIZONS)):
+    """Forecast every (or the given) business across ``workers`` processes.
+
+    Rollups come from one grouped query and states from one read; workers
+    receive plain arrays and return forecasts plus refreshed states, which
+    are written back in a single transaction.
+    Returns the forecasts keyed by (business_id, series) and run statistics.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(FORECAST_MODELS_TABLE)
+        rollups = daily_rollups(conn, business_ids)
+        states = load_states(conn, business_ids)
+    finally:
+        conn.close()
+
+    tasks = [
+        (key, history.index[0].date().isoformat(), history.to_numpy(), states.get(key), horizon)
+        for key, history in rollups.items()
+    ]
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    forecasts, changed = {}, {}
+    modes = {"refit": 0, "updated": 0, "insufficient": 0}
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_forecast_task, tasks, chunksize=max(1, len(tasks) // (workers * 8))))
+    else:
+        results = [_forecast_task(task) for task in tasks]
+    for key, forecast, state, mode in results:
+        forecasts[key] = forecast
+        modes[mode] += 1
+        if mode == "refit":
+            changed[key] = state
+    elapsed = time.perf_counter() - start
+
+    if changed:
+        conn = sqlite3.connect(db_path)
+        try:
+            save_states(conn, changed)
+        finally:
+            conn.close()
+    stats = {
+        "businesses": len({business_id for business_id, _ in rollups}),
+        "series": len(tasks),
+        "workers": workers,
+        "seconds": elapsed,
+        "series_per_sec": len(tasks) / elapsed if elapsed > 0 else 0.0,
+        **modes,
+    }
+    return forecasts, stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fit sales/expense forecasts for every business")
+    parser.add_argument("--db", default="bizsight.db")
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: all cores)")
+    parser.add_argument("--horizon", type=int, default=max(HORIZONS))
+    args = parser.parse_args()
+
+    _, stats = forecast_all(args.db, workers=args.workers, horizon=args.horizon)
+    print(json.dumps(stats, indent=2))
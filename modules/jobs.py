@@ -0,0 +1,177 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+class JobCancelled(Exception):
+    """Raised inside a job function when cancellation was requested"""
+
+# ============================================================
+# BACKGROUND JOB
+# ============================================================
+class BackgroundJob:
+    """Progress, timing and cancellation state of one background task.
+
+    The worker thread reports progress with ``update`` and calls
+    ``check_cancelled`` between units of work; the UI only reads the
+    attributes, so no locking is needed for display.
+    """
+
+    def __init__(self, label, total_rows=0):
+        self.id = uuid.uuid4().hex[:12]
+        self.label = label
+        self.status = QUEUED
+        self.phase = "Queued"
+        self.total_rows = total_rows
+        self.rows_done = 0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.phase_started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+
+    def update(self, rows_done=None, phase=None, total_rows=None):
+        """Report progress from the worker; progress and throughput are per phase"""
+        if phase is not None and phase != self.phase:
+            self.phase = phase
+            self.phase_started_at = time.time()
+        if total_rows is not None:
+            self.total_rows = total_rows
+        if rows_done is not None:
+            self.rows_done = rows_done
+
+    def cancel(self):
+        """Ask the worker to stop at its next checkpoint"""
+        self._cancel.set()
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        """Raise JobCancelled if cancellation was requested"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    @property
+    def progress(self):
+        """Completed fraction of the current phase in [0, 1]"""
+        if self.status == DONE:
+            return 1.0
+        if not self.total_rows:
+            return 0.0
+        return min(self.rows_done / self.total_rows, 1.0)
+
+    @property
+    def elapsed(self):
+        """Seconds spent running (so far, or in total once finished)"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def rows_per_sec(self):
+        """Throughput of the current phase"""
+        if self.phase_started_at is None:
+            return 0.0
+        elapsed = (self.finished_at or time.time()) - self.phase_started_at
+        return self.rows_done / elapsed if elapsed > 0 else 0.0
+
+# ============================================================
+# JOB MANAGER
+# ============================================================
+class JobManager:
+    """Runs job functions on a thread pool and keeps them addressable by id.
+
+    Threads (rather than processes) let jobs use the already-loaded model
+    and return dataframes without pickling; pandas, NumPy and XGBoost
+    release the GIL for the heavy lifting, so the script thread stays
+    responsive.
+    """
+
+    def __init__(self, max_workers=2, keep_seconds=3600):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bizsight-job")
+        self._jobs = {}
+        self._guard = threading.Lock()
+        self.keep_seconds = keep_seconds
+
+    def submit(self, label, fn, *args, total_rows=0, **kwargs):
+        """Schedule ``fn(job, *args, **kwargs)`` and return the job; its return value becomes job.result"""
+        job = BackgroundJob(label, total_rows)
+        with self._guard:
+            self._prune()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.started_at = job.phase_started_at = time.time()
+        job.status = RUNNING
+        try:
+            # Cancelled while still queued
+            job.check_cancelled()
+            job.result = fn(job, *args, **kwargs)
+            status, phase = DONE, "Done"
+        except JobCancelled:
+            status, phase = CANCELLED, "Cancelled"
+        except Exception as e:
+            job.error = str(e)
+            status, phase = FAILED, "Failed"
+        # Other threads treat the terminal status as "finished_at is set", so publish it last
+        job.finished_at = time.time()
+        job.phase = phase
+        job.status = status
+
+    def get(self, job_id):
+        """Job with ``job_id`` or None if unknown, taken or pruned"""
+        with self._guard:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def take(self, job_id):
+        """Remove a finished job and return it, so its result lives only as long as the caller keeps it"""
+        with self._guard:
+            job = self._jobs.get(job_id)
+            if job is None or not job.finished:
+                return None
+            return self._jobs.pop(job_id)
+
+    def cancel(self, job_id):
+        with self._guard:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            job.cancel()
+
+    def active(self):
+        """Jobs that have not finished yet"""
+        with self._guard:
+            self._prune()
+            jobs = list(self._jobs.values())
+        return [job for job in jobs if not job.finished]
+
+    def _prune(self):
+        """Forget finished jobs older than ``keep_seconds`` and the results of abandoned ones (caller holds the lock)"""
+        cutoff = time.time() - self.keep_seconds
+        for job_id, job in list(self._jobs.items()):
+            if not job.finished or job.finished_at is None:
+                continue
+            if job.finished_at < cutoff:
+                del self._jobs[job_id]
+            elif job.cancel_requested:
+                # Cancelled after its last checkpoint: nobody will collect the result
+                job.result = None
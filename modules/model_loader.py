@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pandas as pd
+
+from modules.data_loader import DEFAULTS, validate_schema
+
+# ============================================================
+# PIPELINE LOADING
+# ============================================================
+def warm_up_pipeline(pipeline):
+    """One prediction on a DEFAULTS row so the first real request skips first-call costs"""
+    row, _ = validate_schema(pd.DataFrame([DEFAULTS]), pipeline.feature_names_in_.tolist())
+    pipeline.predict(row)
+
+def load_pipeline(path, warm_up=True):
+    """Unpickle a profit pipeline, optionally warming it up"""
+    import joblib
+    pipeline = joblib.load(path)
+    if warm_up:
+        warm_up_pipeline(pipeline)
+    return pipeline
+
+# ============================================================
+# STARTUP TIMINGS
+# ============================================================
+class StartupTimings:
+    """First occurrence of each startup milestone, in seconds since ``boot`` (default: construction)"""
+
+    def __init__(self, boot=None):
+        self.boot = time.perf_counter() if boot is None else boot
+        self.events = {}
+        self._guard = threading.Lock()
+
+    def mark(self, event):
+        """Record ``event`` the first time it happens; later calls are ignored"""
+        with self._guard:
+            if event not in self.events:
+                self.events[event] = time.perf_counter() - self.boot
+
+    def as_frame(self):
+        return pd.DataFrame(
+            sorted(self.events.items(), key=lambda item: item[1]),
+            columns=["Milestone", "Seconds Since Boot"]
+        )
+
+# ============================================================
+# BACKGROUND MODEL LOADER
+# ============================================================
+class BackgroundModelLoader:
+    """Unpickles the profit pipeline on a background thread and warms it up.
+
+    The thread starts on construction, so pages that never score (login,
+    registration) render without waiting for sklearn/XGBoost imports and
+    unpickling. After loading, one prediction on a DEFAULTS row pays the
+    first-call costs (lazy imports, booster configuration) before any
+    real request does.
+    """
+
+    def __init__(self, path, timings=None, version=None):
+        self.path = path
+        self.version = version
+        self.timings = timings
+        self.model = None
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._load, name="model-loader", daemon=True)
+        self._thread.start()
+
+    def _load(self):
+        try:
+            start = time.perf_counter()
+            model = load_pipeline(self.path, warm_up=False)
+            self.load_seconds = time.perf_counter() - start
+            if self.timings is not None:
+                self.timings.mark("model_loaded")
+
+            start = time.perf_counter()
+            warm_up_pipeline(model)
+            self.warmup_seconds = time.perf_counter() - start
+            if self.timings is not None:
+                self.timings.mark("model_warmed_up")
+            self.model = model
+        except Exception as e:
+            self.error = e
+        finally:
+            self._ready.set()
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def get(self, timeout=None):
+        """Wait for loading to finish; returns the model, or None if loading failed"""
+        self._ready.wait(timeout)
+        return self.model
@@ -0,0 +1,230 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from modules.data_loader import validate_schema
+from modules.explainability import model_fingerprint
+from modules.model_loader import load_pipeline
+
+REGISTRY_FILE = "registry.json"
+LOCK_FILE = "registry.lock"
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock_file(f):
+        fcntl.flock(f, fcntl.LOCK_EX)
+
+    def _unlock_file(f):
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+# ============================================================
+# MODEL REGISTRY
+# ============================================================
+class ModelRegistry:
+    """Versioned profit pipelines on disk plus an active-version pointer.
+
+    ``registry.json`` in ``root`` lists every version with its pipeline
+    file, feature list, training date, validation metrics and content
+    fingerprint. Switching the active version only rewrites the pointer,
+    so a running app picks it up on the next script run. Loaded pipelines
+    are kept in a small in-memory LRU shared by all sessions.
+    """
+
+    def __init__(self, root, max_loaded=3):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_loaded = max_loaded
+        self._loaded = OrderedDict()
+        self._guard = threading.RLock()
+        self._load_locks = {}
+        self._index = self._read_index()
+
+    # Index persistence
+    def _index_path(self):
+        return self.root / REGISTRY_FILE
+
+    def _read_index(self):
+        path = self._index_path()
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        return {"active": None, "versions": []}
+
+    def _write_index(self):
+        # Atomic swap so concurrent readers never see a partial file
+        tmp_path = self._index_path().with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp_path, self._index_path())
+
+    def refresh(self):
+        """Re-read the index (another process may have registered or activated a version)"""
+        with self._guard:
+            self._index = self._read_index()
+
+    @contextmanager
+    def _updating(self):
+        """Hold the cross-process registry lock over a fresh copy of the index.
+
+        Every read-modify-write of ``registry.json`` runs inside this, so
+        version numbers are assigned from what is on disk rather than from
+        this process's possibly stale copy, and no writer drops another's
+        entries when it writes the index back.
+        """
+        with self._guard, open(self.root / LOCK_FILE, "a+b") as lock:
+            _lock_file(lock)
+            try:
+                self._index = self._read_index()
+                yield
+            finally:
+                _unlock_file(lock)
+
+    def _next_version(self):
+        return f"v{len(self._index['versions']) + 1}"
+
+    def _add_entry(self, version, pipeline, file_name, trained_at, metrics, notes, parent=None):
+        # Callers hold _updating() from choosing the version until the index is written
+        entry = {
+            "version": version,
+            "file": str(file_name),
+            "features": pipeline.feature_names_in_.tolist(),
+            "trained_at": trained_at,
+            "registered_at": datetime.now().isoformat(timespec="seconds"),
+            "metrics": metrics,
+            "fingerprint": model_fingerprint(pipeline),
+            "parent": parent,
+            "notes": notes,
+        }
+        self._index["versions"].append(entry)
+        if self._index["active"] is None:
+            self._index["active"] = version
+        self._write_index()
+        return entry
+
+    # Public API
+    def versions(self):
+        """Metadata of every registered version, oldest first"""
+        with self._guard:
+            return [dict(entry) for entry in self._index["versions"]]
+
+    def info(self, version):
+        for entry in self.versions():
+            if entry["version"] == version:
+                return entry
+        raise KeyError(f"Unknown model version '{version}'")
+
+    @property
+    def active(self):
+        with self._guard:
+            return self._index["active"]
+
+    def path(self, version):
+        return self.root / self.info(version)["file"]
+
+    def register(self, pipeline, metrics=None, trained_at=None, notes="", parent=None, activate=False):
+        """Persist a fitted pipeline as a new version; returns its metadata"""
+        import joblib
+        with self._updating():
+            version = self._next_version()
+            file_name = f"profit_pipeline_{version}.pkl"
+            joblib.dump(pipeline, self.root / file_name)
+            entry = self._add_entry(
+                version, pipeline, file_name,
+                trained_at or datetime.now().isoformat(timespec="seconds"),
+                metrics or {}, notes, parent
+            )
+            if activate:
+                self._index["active"] = version
+                self._write_index()
+            self._loaded[version] = pipeline
+            return entry
+
+    def register_existing(self, path, pipeline, notes=""):
+        """Register an already-loaded pipeline in place (no copy); idempotent per file"""
+        file_name = os.path.relpath(path, self.root)
+        with self._updating():
+            for entry in self._index["versions"]:
+                if entry["file"] == file_name:
+                    return dict(entry)
+            trained_at = datetime.fromtimestamp(Path(path).stat().st_mtime).isoformat(timespec="seconds")
+            entry = self._add_entry(self._next_version(), pipeline, file_name, trained_at, {}, notes)
+            self._loaded[entry["version"]] = pipeline
+            return entry
+
+    def activate(self, version):
+        """Make ``version`` the active model for every session"""
+        with self._updating():
+            if not any(entry["version"] == version for entry in self._index["versions"]):
+                raise KeyError(f"Unknown model version '{version}'")
+            self._index["active"] = version
+            self._write_index()
+
+    def load(self, version):
+        """Loaded (and warmed-up) pipeline for ``version``, cached across sessions"""
+        with self._guard:
+            if version in self._loaded:
+                self._loaded.move_to_end(version)
+                return self._loaded[version]
+            lock = self._load_locks.setdefault(version, threading.Lock())
+        # Load outside the registry lock so other versions stay available meanwhile
+        with lock:
+            with self._guard:
+                if version in self._loaded:
+                    return self._loaded[version]
+            pipeline = load_pipeline(self.path(version))
+            with self._guard:
+                self._loaded[version] = pipeline
+                while len(self._loaded) > self.max_loaded:
+                    self._loaded.popitem(last=False)
+            return pipeline
+
+    def adopt(self, version, pipeline):
+        """Cache a pipeline loaded elsewhere (e.g. by the background loader)"""
+        with self._guard:
+            self._loaded.setdefault(version, pipeline)
+
+    def is_loaded(self, version):
+        with self._guard:
+            return version in self._loaded
+
+# ============================================================
+# SIDE-BY-SIDE SCORING
+# ============================================================
+def compare_versions(pipeline_a, pipeline_b, df, chunk_rows=20000):
+    """Score ``df`` with two pipelines in a single chunked pass.
+
+    Each chunk is aligned to each pipeline's own feature list (versions may
+    differ in features) and scored by both before moving on, so the
+    dataset is only traversed once.
+    """
+    features_a = pipeline_a.feature_names_in_.tolist()
+    features_b = pipeline_b.feature_names_in_.tolist()
+    predictions_a = np.empty(len(df), dtype=np.float64)
+    predictions_b = np.empty(len(df), dtype=np.float64)
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        aligned_a, _ = validate_schema(chunk, features_a)
+        predictions_a[start:start + len(chunk)] = pipeline_a.predict(aligned_a)
+        if features_b == features_a:
+            aligned_b = aligned_a
+        else:
+            aligned_b, _ = validate_schema(chunk, features_b)
+        predictions_b[start:start + len(chunk)] = pipeline_b.predict(aligned_b)
+    return predictions_a, predictions_b
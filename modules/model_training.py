@@ -0,0 +1,437 @@
+"""Retraining of the profit pipeline on a shop's own data.
+
+Produces the same ``ColumnTransformer`` + ``XGBRegressor`` pipeline as the
+bundled model, trained with the ``hist`` tree method on every core and
+early-stopped on a holdout split. ``train_pipeline`` works on an in-memory
+frame; ``train_pipeline_from_csv`` streams a CSV through an XGBoost data
+iterator into an on-disk cache for files that do not fit in RAM. Both can
+continue boosting from an existing pipeline instead of starting fresh.
+
+Run ``python -m modules.model_training data.csv --target profit`` to train
+from the command line and register the result.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.data_loader import FEATURE_SCHEMA, validate_schema
+
+# Likely names of the profit column in uploaded training data
+TARGET_CANDIDATES = ("profit", "monthly_profit", "net_profit", "actual_profit")
+
+# Hyperparameters of the bundled pipeline
+DEFAULT_PARAMS = {
+    "n_estimators": 300,
+    "learning_rate": 0.05,
+    "max_depth": 6,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8,
+    "random_state": 42,
+}
+
+# ============================================================
+# FEATURES & PIPELINE STRUCTURE
+# ============================================================
+def guess_target(columns):
+    """First likely profit column in ``columns``, or None"""
+    for candidate in TARGET_CANDIDATES:
+        if candidate in columns:
+            return candidate
+    return None
+
+def training_columns(columns, target):
+    """Schema features present in the data, in schema order (numeric first, like the bundled model)"""
+    present = [col for col in FEATURE_SCHEMA if col in columns and col != target]
+    numeric = [col for col in present if FEATURE_SCHEMA[col]["dtype"] != "category"]
+    categorical = [col for col in present if FEATURE_SCHEMA[col]["dtype"] == "category"]
+    return numeric, categorical
+
+def build_preprocessor(numeric, categorical, categories="auto"):
+    """Scaler for numeric features and one-hot encoder for categorical ones"""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+    return ColumnTransformer(transformers=[
+        ("num", StandardScaler(), numeric),
+        ("cat", OneHotEncoder(handle_unknown="ignore", categories=categories), categorical),
+    ])
+
+def _booster_params(params):
+    """Native XGBoost parameters: histogram trees on every core"""
+    return {
+        "objective": "reg:squarederror",
+        "eval_metric": "rmse",
+        "tree_method": "hist",
+        "nthread": os.cpu_count() or 1,
+        "eta": params["learning_rate"],
+        "max_depth": params["max_depth"],
+        "subsample": params["subsample"],
+        "colsample_bytree": params["colsample_bytree"],
+        "seed": params["random_state"],
+    }
+
+def _as_pipeline(preprocessor, booster, params):
+    """Wrap a trained booster in the bundled model's Pipeline structure"""
+    import xgboost as xgb
+    from sklearn.pipeline import Pipeline
+    regressor = xgb.XGBRegressor(
+        objective="reg:squarederror", tree_method="hist", n_jobs=-1,
+        **{key: value for key, value in params.items() if key != "n_estimators"},
+        n_estimators=booster.num_boosted_rounds()
+    )
+    regressor.load_model(bytearray(booster.save_raw("ubj")))
+    return Pipeline(steps=[("preprocessing", preprocessor), ("model", regressor)])
+
+def _continuation(base_pipeline):
+    """Columns, fitted preprocessor and booster of a pipeline to keep boosting from"""
+    preprocessor = base_pipeline.named_steps["preprocessing"]
+    booster = base_pipeline.named_steps["model"].get_booster()
+    return base_pipeline.feature_names_in_.tolist(), preprocessor, booster
+
+def _target(series):
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64)
+
+def _holdout_mask(n_rows, holdout, seed):
+    return np.random.default_rng(seed).random(n_rows) < holdout
+
+def regression_metrics(actual, predicted):
+    """Holdout RMSE, MAE and R²"""
+    errors = predicted - actual
+    total = ((actual - actual.mean()) ** 2).sum()
+    return {
+        "rmse": float(np.sqrt(np.mean(errors ** 2))),
+        "mae": float(np.mean(np.abs(errors))),
+        "r2": float(1 - (errors ** 2).sum() / total) if total > 0 else 0.0,
+    }
+
+# ============================================================
+# BOOSTING
+# ============================================================
+def _progress_callback(job, n_train_rows):
+    """XGBoost callback reporting trained row-rounds to ``job`` and honouring cancellation"""
+    import xgboost as xgb
+
+    class JobProgress(xgb.callback.TrainingCallback):
+        def after_iteration(self, model, epoch, evals_log):
+            job.check_cancelled()
+            # ``epoch`` counts the rounds of this call, also when continuing
+            job.update(rows_done=(epoch + 1) * n_train_rows)
+            return False
+
+    return JobProgress()
+
+def _boost(params, dtrain, dval, n_train_rows, base_booster=None, early_stopping_rounds=25, job=None):
+    """Boost up to ``n_estimators`` new rounds with early stopping on the holdout.
+
+    Trees after the best holdout round are dropped so the saved model (and
+    any later continuation) ends at the best iteration.
+    Returns the booster, new rounds kept, new rounds run and training seconds.
+    """
+    import xgboost as xgb
+
+    first_round = base_booster.num_boosted_rounds() if base_booster is not None else 0
+    callbacks = []
+    if job is not None:
+        job.update(rows_done=0, phase="Training", total_rows=n_train_rows * params["n_estimators"])
+        callbacks.append(_progress_callback(job, n_train_rows))
+
+    start = time.perf_counter()
+    booster = xgb.train(
+        _booster_params(params), dtrain,
+        num_boost_round=params["n_estimators"],
+        evals=[(dval, "holdout")],
+        early_stopping_rounds=early_stopping_rounds,
+        xgb_model=base_booster,
+        callbacks=callbacks,
+        verbose_eval=False
+    )
+    train_seconds = time.perf_counter() - start
+    rounds_run = booster.num_boosted_rounds() - first_round
+
+    best = getattr(booster, "best_iteration", None)
+    if best is not None and best + 1 < booster.num_boosted_rounds():
+        booster = booster[:best + 1]
+    return booster, booster.num_boosted_rounds() - first_round, rounds_run, train_seconds
+
+def _finish(preprocessor, booster, params, X_val, y_val, stats, base_pipeline=None):
+    """Pipeline plus holdout metrics (and the base pipeline's, for comparison)"""
+    pipeline = _as_pipeline(preprocessor, booster, params)
+    metrics = regression_metrics(y_val, pipeline.predict(X_val).astype(np.float64))
+    if base_pipeline is not None:
+        base_X, _ = validate_schema(X_val, base_pipeline.feature_names_in_.tolist())
+        metrics["baseline_rmse"] = regression_metrics(y_val, base_pipeline.predict(base_X).astype(np.float64))["rmse"]
+    stats["rows_per_sec"] = stats["train_rows"] * stats["rounds_run"] / stats["train_seconds"] if stats["train_seconds"] > 0 else 0.0
+    return {"pipeline": pipeline, "metrics": metrics, "stats": stats}
+
+# ============================================================
+# IN-MEMORY TRAINING
+# ============================================================
+def train_pipeline(df, target, base_pipeline=None, continue_training=False, params=None,
+                   holdout=0.2, early_stopping_rounds=25, job=None):
+    """Fit a profit pipeline on an in-memory frame.
+
+    With ``continue_training`` the base pipeline's preprocessor and feature
+    list are reused and boosting resumes from its trees; otherwise a fresh
+    preprocessor is fitted on the schema features present in ``df``. The
+    base pipeline's holdout RMSE is reported as ``baseline_rmse``.
+    Returns the pipeline, holdout metrics, throughput stats and the
+    schema report of the training features.
+    """
+    import xgboost as xgb
+
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    if target not in df.columns:
+        raise ValueError(f"Target column '{target}' not found")
+    y = _target(df[target])
+    labelled = ~np.isnan(y)
+    if labelled.sum() < 50:
+        raise ValueError(f"Need at least 50 rows with a numeric '{target}' to train")
+    df, y = df[labelled], y[labelled]
+
+    if continue_training:
+        columns, preprocessor, base_booster = _continuation(base_pipeline)
+    else:
+        numeric, categorical = training_columns(df.columns, target)
+        if not numeric:
+            raise ValueError("The training data has none of the model's numeric features")
+        columns, preprocessor, base_booster = numeric + categorical, build_preprocessor(numeric, categorical), None
+
+    if job is not None:
+        job.update(rows_done=0, phase="Preparing features", total_rows=len(df))
+    start = time.perf_counter()
+    X, schema_report = validate_schema(df, columns)
+    is_val = _holdout_mask(len(X), holdout, params["random_state"])
+    X_train, X_val = X[~is_val], X[is_val]
+    if not continue_training:
+        preprocessor.fit(X_train)
+    dtrain = xgb.QuantileDMatrix(preprocessor.transform(X_train), label=y[~is_val], nthread=-1)
+    dval = xgb.QuantileDMatrix(preprocessor.transform(X_val), label=y[is_val], ref=dtrain, nthread=-1)
+    prepare_seconds = time.perf_counter() - start
+    if job is not None:
+        job.update(rows_done=len(df))
+
+    booster, rounds, rounds_run, train_seconds = _boost(
+        params, dtrain, dval, len(X_train), base_booster, early_stopping_rounds, job
+    )
+    stats = {
+        "train_rows": int(len(X_train)),
+        "holdout_rows": int(len(X_val)),
+        "rounds": rounds,
+        "rounds_run": rounds_run,
+        "total_rounds": booster.num_boosted_rounds(),
+        "prepare_seconds": prepare_seconds,
+        "train_seconds": train_seconds,
+        "external_memory": False,
+    }
+    result = _finish(preprocessor, booster, params, X_val, y[is_val], stats, base_pipeline)
+    result["schema_report"] = schema_report
+    return result
+
+# ============================================================
+# EXTERNAL-MEMORY TRAINING
+# ============================================================
+def _read_chunks(path, chunk_rows):
+    for chunk in pd.read_csv(path, chunksize=chunk_rows):
+        chunk.columns = chunk.columns.str.lower().str.strip().str.replace(" ", "_")
+        yield chunk
+
+def _split_chunk(chunk, index, target, columns, holdout, seed):
+    """Labelled rows of one chunk split into train/holdout, identically on every pass"""
+    y = _target(chunk[target])
+    labelled = ~np.isnan(y)
+    X, _ = validate_schema(chunk[labelled], columns)
+    y = y[labelled]
+    is_val = _holdout_mask(len(X), holdout, (seed, index))
+    return X[~is_val], y[~is_val], X[is_val], y[is_val]
+
+def train_pipeline_from_csv(path, target, base_pipeline=None, continue_training=False, params=None,
+                            holdout=0.2, early_stopping_rounds=25, chunk_rows=100_000,
+                            max_holdout_rows=200_000, sample_rows=200_000, cache_dir=None, job=None):
+    """Fit a profit pipeline by streaming a CSV that may not fit in memory.
+
+    A first pass collects the holdout rows (capped at ``max_holdout_rows``),
+    the categories of every categorical feature and a uniform reservoir
+    sample for fitting the scaler. Training rows are then streamed chunk
+    by chunk through an XGBoost data iterator into a quantized on-disk
+    cache, so peak memory is one chunk plus the histogram pages.
+    """
+    import xgboost as xgb
+
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    seed = params["random_state"]
+    header = next(_read_chunks(path, 1)).columns
+    if target not in header:
+        raise ValueError(f"Target column '{target}' not found")
+    if continue_training:
+        columns, preprocessor, base_booster = _continuation(base_pipeline)
+        numeric = categorical = None
+    else:
+        numeric, categorical = training_columns(header, target)
+        if not numeric:
+            raise ValueError("The training data has none of the model's numeric features")
+        columns, base_booster = numeric + categorical, None
+
+    # Pass 1: holdout rows, categories and the scaler sample
+    if job is not None:
+        job.update(rows_done=0, phase="Scanning")
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    val_frames, val_targets = [], []
+    n_val = n_train = rows_read = 0
+    categories = {col: set() for col in categorical or []}
+    sample = sample_keys = None
+    for index, chunk in enumerate(_read_chunks(path, chunk_rows)):
+        if job is not None:
+            job.check_cancelled()
+        X_train, _, X_val, y_val = _split_chunk(chunk, index, target, columns, holdout, seed)
+        n_train += len(X_train)
+        if n_val < max_holdout_rows:
+            val_frames.append(X_val.iloc[:max_holdout_rows - n_val])
+            val_targets.append(y_val[:max_holdout_rows - n_val])
+            n_val += len(val_frames[-1])
+        if not continue_training:
+            for col in categorical:
+                categories[col].update(X_train[col].astype(str).unique())
+            # Reservoir: keep the rows with the smallest random keys seen so far
+            keys = rng.random(len(X_train))
+            sample = X_train if sample is None else pd.concat([sample, X_train])
+            sample_keys = keys if sample_keys is None else np.concatenate([sample_keys, keys])
+            if len(sample) > sample_rows:
+                keep = np.argpartition(sample_keys, sample_rows)[:sample_rows]
+                sample, sample_keys = sample.iloc[keep], sample_keys[keep]
+        rows_read += len(chunk)
+        if job is not None:
+            job.update(rows_done=rows_read)
+    if n_train < 50 or n_val == 0:
+        raise ValueError(f"Need at least 50 rows with a numeric '{target}' to train")
+
+    X_val = pd.concat(val_frames)
+    y_val = np.concatenate(val_targets)
+    if not continue_training:
+        preprocessor = build_preprocessor(
+            numeric, categorical, [sorted(categories[col]) for col in categorical]
+        )
+        preprocessor.fit(sample)
+    del sample
+
+    class TrainingChunks(xgb.DataIter):
+        """Transformed training rows of the CSV, one chunk per iteration"""
+
+        def __init__(self, cache_prefix):
+            self._chunks = None
+            self._index = 0
+            super().__init__(cache_prefix=cache_prefix)
+
+        def next(self, input_data):
+            if self._chunks is None:
+                self._chunks = _read_chunks(path, chunk_rows)
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return False
+            if job is not None:
+                job.check_cancelled()
+            X_train, y_train, _, _ = _split_chunk(chunk, self._index, target, columns, holdout, seed)
+            self._index += 1
+            input_data(data=preprocessor.transform(X_train), label=y_train)
+            return True
+
+        def reset(self):
+            self._chunks = None
+            self._index = 0
+
+    with tempfile.TemporaryDirectory(dir=cache_dir) as cache:
+        if job is not None:
+            job.update(rows_done=0, phase="Building disk cache", total_rows=n_train)
+        iterator = TrainingChunks(os.path.join(cache, "train"))
+        if hasattr(xgb, "ExtMemQuantileDMatrix"):
+            dtrain = xgb.ExtMemQuantileDMatrix(iterator, nthread=-1)
+        else:
+            dtrain = xgb.DMatrix(iterator, nthread=-1)
+        dval = xgb.DMatrix(preprocessor.transform(X_val), label=y_val, nthread=-1)
+        prepare_seconds = time.perf_counter() - start
+
+        booster, rounds, rounds_run, train_seconds = _boost(
+            params, dtrain, dval, n_train, base_booster, early_stopping_rounds, job
+        )
+        del dtrain
+
+    stats = {
+        "train_rows": int(n_train),
+        "holdout_rows": int(n_val),
+        "rounds": rounds,
+        "rounds_run": rounds_run,
+        "total_rounds": booster.num_boosted_rounds(),
+        "prepare_seconds": prepare_seconds,
+        "train_seconds": train_seconds,
+        "external_memory": True,
+    }
+    result = _finish(preprocessor, booster, params, X_val, y_val, stats, base_pipeline)
+    result["schema_report"] = validate_schema(X_val.head(0), columns)[1]
+    return result
+
+# ============================================================
+# REGISTRATION
+# ============================================================
+def training_notes(result, target, source):
+    """One-line provenance and throughput summary stored with the registered version"""
+    stats = result["stats"]
+    return (
+        f"Trained on {source} (target '{target}', {stats['train_rows']:,} rows"
+        f"{', external memory' if stats['external_memory'] else ''}): {stats['rounds']} new rounds "
+        f"in {stats['train_seconds']:.1f}s, {stats['rows_per_sec']:,.0f} rows/s"
+    )
+
+def register_result(registry, result, target, source, parent=None, activate=False):
+    """Store a training result as a new registry version; returns its metadata"""
+    return registry.register(
+        result["pipeline"],
+        metrics={key: round(value, 6) for key, value in result["metrics"].items()},
+        notes=training_notes(result, target, source),
+        parent=parent,
+        activate=activate
+    )
+
+if __name__ == "__main__":
+    from modules.model_registry import ModelRegistry
+
+    parser = argparse.ArgumentParser(description="Train a BizSight profit pipeline and register it")
+    parser.add_argument("data", help="CSV with the model features and a profit column")
+    parser.add_argument("--target", help="Profit column (default: guessed)")
+    parser.add_argument("--registry", default="models")
+    parser.add_argument("--continue-from", help="Registry version to keep boosting from")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_PARAMS["n_estimators"])
+    parser.add_argument("--learning-rate", type=float, default=DEFAULT_PARAMS["learning_rate"])
+    parser.add_argument("--max-depth", type=int, default=DEFAULT_PARAMS["max_depth"])
+    parser.add_argument("--holdout", type=float, default=0.2)
+    parser.add_argument("--early-stopping", type=int, default=25)
+    parser.add_argument("--in-memory", action="store_true", help="Load the whole CSV instead of streaming it")
+    parser.add_argument("--activate", action="store_true")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    target = args.target or guess_target(next(_read_chunks(args.data, 1)).columns)
+    if target is None:
+        parser.error("No profit column found; pass --target")
+    base_version = args.continue_from or registry.active
+    base = registry.load(base_version) if base_version else None
+    options = dict(
+        base_pipeline=base,
+        continue_training=args.continue_from is not None,
+        params={"n_estimators": args.rounds, "learning_rate": args.learning_rate, "max_depth": args.max_depth},
+        holdout=args.holdout,
+        early_stopping_rounds=args.early_stopping,
+    )
+    if args.in_memory:
+        frame = pd.concat(_read_chunks(args.data, 100_000), ignore_index=True)
+        result = train_pipeline(frame, target, **options)
+    else:
+        result = train_pipeline_from_csv(args.data, target, **options)
+    entry = register_result(
+        registry, result, target, os.path.basename(args.data),
+        parent=base_version if args.continue_from else None, activate=args.activate
+    )
+    print(f"Registered {entry['version']}: {entry['metrics']}")
+    print(entry["notes"])
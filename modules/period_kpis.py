@@ -0,0 +1,179 @@
+"""Period-over-period KPIs from an incrementally maintained daily rollup.
+
+``transaction_daily_totals`` holds one row per business and day with that
+day's sales and expense sums and counts. Triggers on ``transactions``
+adjust the row on every insert, update and delete, whichever code path
+writes the transaction, so the rollup never needs a rescan once built.
+Comparing a window with the one before it reads at most two windows of
+day rows through the primary key, so a dashboard card costs the same no
+matter how much history the business has.
+"""
+import argparse
+import sqlite3
+from datetime import date, timedelta
+
+# Window length in days of each comparison period
+PERIODS = {"Week": 7, "Month": 30, "Quarter": 91}
+
+DAILY_TOTALS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS transaction_daily_totals (
+        business_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        sales REAL NOT NULL DEFAULT 0,
+        expenses REAL NOT NULL DEFAULT 0,
+        sale_count INTEGER NOT NULL DEFAULT 0,
+        expense_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (business_id, day),
+        FOREIGN KEY (business_id) REFERENCES business_profiles(id)
+    )
+'''
+
+# Add (sign 1) or remove (sign -1) one transaction row (NEW or OLD) from its day
+_APPLY = '''
+    INSERT INTO transaction_daily_totals (business_id, day, sales, expenses, sale_count, expense_count)
+    VALUES (
+        {row}.business_id, date({row}.date),
+        {sign} * CASE WHEN {row}.transaction_type = 'sale' THEN {row}.amount ELSE 0 END,
+        {sign} * CASE WHEN {row}.transaction_type = 'expense' THEN {row}.amount ELSE 0 END,
+        {sign} * ({row}.transaction_type = 'sale'),
+        {sign} * ({row}.transaction_type = 'expense')
+    )
+    ON CONFLICT (business_id, day) DO UPDATE SET
+        sales = sales + excluded.sales,
+        expenses = expenses + excluded.expenses,
+        sale_count = sale_count + excluded.sale_count,
+        expense_count = expense_count + excluded.expense_count;
+'''
+_DROP_EMPTY = '''
+    DELETE FROM transaction_daily_totals
+    WHERE business_id = OLD.business_id AND day = date(OLD.date) AND sale_count = 0 AND expense_count = 0;
+'''
+
+# Rows without a date have no day to roll up into
+DAILY_TOTALS_TRIGGERS = (
+    f'''CREATE TRIGGER IF NOT EXISTS transaction_daily_totals_insert
+    AFTER INSERT ON transactions WHEN NEW.date IS NOT NULL
+    BEGIN {_APPLY.format(row="NEW", sign=1)} END''',
+    f'''CREATE TRIGGER IF NOT EXISTS transaction_daily_totals_delete
+    AFTER DELETE ON transactions WHEN OLD.date IS NOT NULL
+    BEGIN {_APPLY.format(row="OLD", sign=-1)} {_DROP_EMPTY} END''',
+    f'''CREATE TRIGGER IF NOT EXISTS transaction_daily_totals_update_old
+    AFTER UPDATE OF business_id, transaction_type, amount, date ON transactions WHEN OLD.date IS NOT NULL
+    BEGIN {_APPLY.format(row="OLD", sign=-1)} {_DROP_EMPTY} END''',
+    f'''CREATE TRIGGER IF NOT EXISTS transaction_daily_totals_update_new
+    AFTER UPDATE OF business_id, transaction_type, amount, date ON transactions WHEN NEW.date IS NOT NULL
+    BEGIN {_APPLY.format(row="NEW", sign=1)} END''',
+)
+
+def ensure_kpi_schema(conn):
+    """Create the rollup and its triggers, backfilling it from existing transactions on first use"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transaction_daily_totals'"
+    ).fetchone()
+    conn.execute(DAILY_TOTALS_TABLE)
+    for trigger in DAILY_TOTALS_TRIGGERS:
+        conn.execute(trigger)
+    if not exists:
+        rebuild_daily_totals(conn)
+
+def rebuild_daily_totals(conn, business_id=None):
+    """Recompute the rollup (of one business, or all) from the transactions table"""
+    scope, params = ("AND business_id = ?", (business_id,)) if business_id is not None else ("", ())
+    conn.execute(f'DELETE FROM transaction_daily_totals WHERE 1 {scope}', params)
+    conn.execute(
+        f'''INSERT INTO transaction_daily_totals (business_id, day, sales, expenses, sale_count, expense_count)
+        SELECT business_id, date(date),
+            SUM(CASE WHEN transaction_type = 'sale' THEN amount ELSE 0 END),
+            SUM(CASE WHEN transaction_type = 'expense' THEN amount ELSE 0 END),
+            SUM(transaction_type = 'sale'),
+            SUM(transaction_type = 'expense')
+        FROM transactions
+        WHERE date IS NOT NULL {scope}
+        GROUP BY business_id, date(date)''',
+        params
+    )
+    conn.commit()
+
+# ============================================================
+# WINDOWS
+# ============================================================
+def _kpis(sales, expenses, sale_count, expense_count):
+    profit = sales - expenses
+    return {
+        "sales": sales,
+        "expenses": expenses,
+        "profit": profit,
+        "margin": profit / sales * 100 if sales > 0 else 0.0,
+        "sale_count": sale_count,
+        "expense_count": expense_count,
+    }
+
+def percent_change(current, previous):
+    """Percent change, or None when there is nothing to compare against"""
+    if not previous:
+        return None
+    return (current - previous) / abs(previous) * 100
+
+def lifetime_totals(conn, business_id):
+    """KPIs over all of a business's history, summed from its day rows"""
+    row = conn.execute(
+        '''SELECT TOTAL(sales), TOTAL(expenses), TOTAL(sale_count), TOTAL(expense_count)
+        FROM transaction_daily_totals WHERE business_id = ?''',
+        (business_id,)
+    ).fetchone()
+    return _kpis(row[0], row[1], int(row[2]), int(row[3]))
+
+def period_comparison(conn, business_id, period, today=None):
+    """KPIs of the ``period`` window ending ``today`` against the window just before it.
+
+    Windows include today, which defaults to SQLite's UTC date: the same
+    clock that stamps transactions, so day rows land in the right window
+    on any host time zone. Returns ``current``, ``previous``, their date
+    ranges and ``deltas``: percent changes of sales, expenses and profit
+    (None without a previous value) and the margin change in points.
+    """
+    days = PERIODS[period]
+    today = today or date.fromisoformat(conn.execute("SELECT date('now')").fetchone()[0])
+    start = today - timedelta(days=days - 1)
+    previous_start = start - timedelta(days=days)
+    totals = {True: (0.0, 0.0, 0, 0), False: (0.0, 0.0, 0, 0)}
+    for is_current, *row in conn.execute(
+        '''SELECT day >= ?, SUM(sales), SUM(expenses), SUM(sale_count), SUM(expense_count)
+        FROM transaction_daily_totals
+        WHERE business_id = ? AND day >= ? AND day <= ?
+        GROUP BY day >= ?''',
+        (start.isoformat(), business_id, previous_start.isoformat(), today.isoformat(), start.isoformat())
+    ):
+        totals[bool(is_current)] = row
+    current, previous = _kpis(*totals[True]), _kpis(*totals[False])
+    deltas = {key: percent_change(current[key], previous[key]) for key in ("sales", "expenses", "profit")}
+    deltas["margin"] = current["margin"] - previous["margin"] if previous["sales"] > 0 else None
+    return {
+        "period": period,
+        "days": days,
+        "current": current,
+        "previous": previous,
+        "current_range": (start, today),
+        "previous_range": (previous_start, start - timedelta(days=1)),
+        "deltas": deltas,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print period-over-period KPIs of a business")
+    parser.add_argument("business_id", type=int)
+    parser.add_argument("--db", default="bizsight.db")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the daily rollup first")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    ensure_kpi_schema(conn)
+    if args.rebuild:
+        rebuild_daily_totals(conn, args.business_id)
+    for period in PERIODS:
+        comparison = period_comparison(conn, args.business_id, period)
+        current, deltas = comparison["current"], comparison["deltas"]
+        print(f"{period}: " + ", ".join(
+            f"{key} {current[key]:,.1f} ({'n/a' if deltas[key] is None else f'{deltas[key]:+.1f}'})"
+            for key in ("sales", "expenses", "profit", "margin")
+        ))
+    conn.close()
@@ -0,0 +1,482 @@
+"""Consolidated reports across every business of one owner.
+
+A portfolio report reads all of a user's businesses in a fixed number of
+grouped queries (category totals, inventory totals and daily totals from
+the ``transaction_daily_totals`` rollup), however many businesses there
+are, and renders one PDF or workbook: a portfolio summary followed by a
+section per business. Batch mode instead queues each business's own
+report on the ``ReportQueue`` pool at once, with the data versions of
+all businesses read in one pass, and zips the reports as they finish.
+
+Run ``python -m modules.portfolio_reports --businesses 1 10 50`` to time
+consolidated against one-by-one rendering on synthetic portfolios.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import time
+import zipfile
+from concurrent.futures import as_completed
+from datetime import date, datetime, timedelta
+from io import BytesIO
+
+from openpyxl import Workbook
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import KeepTogether, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from modules.period_kpis import ensure_kpi_schema
+from modules.report_charts import business_comparison, chart_path, expense_breakdown
+from modules.reports import (
+    DEFAULT_CACHE_DIR, DETAIL_TABLE_STYLE, REPORT_FORMATS, SUMMARY_TABLE_STYLE, PagedTable, _chart_image,
+    _date_bounds, data_fingerprint, ensure_report_schema, render_report_file, report_spec, summarize_categories
+)
+
+# ============================================================
+# DATA
+# ============================================================
+def fetch_businesses(conn, user_id):
+    """(id, name) of every business of ``user_id``, by name"""
+    return conn.execute(
+        'SELECT id, business_name FROM business_profiles WHERE user_id = ? ORDER BY business_name, id',
+        (user_id,)
+    ).fetchall()
+
+def business_data_versions(conn, user_id):
+    """``report_data_version`` of every business of ``user_id``, from three grouped queries"""
+    changes = dict(conn.execute(
+        '''SELECT b.id, COALESCE(v.version, 0)
+        FROM business_profiles b LEFT JOIN report_data_versions v ON v.business_id = b.id
+        WHERE b.user_id = ?''',
+        (user_id,)
+    ))
+    transactions = dict((row[0], row[1:]) for row in conn.execute(
+        '''SELECT b.id, COUNT(t.id), MAX(t.id), SUM(t.amount), MAX(t.date)
+        FROM business_profiles b LEFT JOIN transactions t ON t.business_id = b.id
+        WHERE b.user_id = ?
+        GROUP BY b.id''',
+        (user_id,)
+    ))
+    inventory = dict((row[0], row[1:]) for row in conn.execute(
+        '''SELECT b.id, COUNT(i.id), MAX(i.id), SUM(i.quantity), SUM(i.quantity * i.unit_price), MAX(i.last_updated)
+        FROM business_profiles b LEFT JOIN inventory i ON i.business_id = b.id
+        WHERE b.user_id = ?
+        GROUP BY b.id''',
+        (user_id,)
+    ))
+    return {
+        business_id: data_fingerprint(changes[business_id], transactions[business_id], inventory[business_id])
+        for business_id in transactions
+    }
+
+def portfolio_data_version(conn, user_id):
+    """Fingerprint of a whole portfolio; changes when any business or its data does"""
+    key = [fetch_businesses(conn, user_id), sorted(business_data_versions(conn, user_id).items())]
+    return hashlib.sha1(json.dumps(key).encode()).hexdigest()[:16]
+
+def fetch_portfolio(conn, user_id, start, end):
+    """Per-business period summaries and inventory totals plus portfolio totals, in one grouped pass each"""
+    low, high = _date_bounds(start, end)
+    businesses = {
+        business_id: {"business_id": business_id, "business_name": name, "categories": [],
+                      "inventory": {"items": 0, "value": 0.0, "low_stock": 0}}
+        for business_id, name in fetch_businesses(conn, user_id)
+    }
+    # Each business's rows are range-scanned on the (business_id, date) index
+    for business_id, *row in conn.execute(
+        '''SELECT t.business_id, t.transaction_type, COALESCE(t.category, ''), SUM(t.amount), COUNT(*)
+        FROM business_profiles b JOIN transactions t ON t.business_id = b.id
+        WHERE b.user_id = ? AND t.date >= ? AND t.date < ?
+        GROUP BY t.business_id, t.transaction_type, t.category
+        ORDER BY t.business_id, t.transaction_type DESC, SUM(t.amount) DESC''',
+        (user_id, low, high)
+    ):
+        businesses[business_id]["categories"].append(tuple(row))
+    for business_id, items, value, low_stock in conn.execute(
+        '''SELECT i.business_id, COUNT(*), TOTAL(i.quantity * i.unit_price), TOTAL(i.quantity <= i.reorder_level)
+        FROM business_profiles b JOIN inventory i ON i.business_id = b.id
+        WHERE b.user_id = ?
+        GROUP BY i.business_id''',
+        (user_id,)
+    ):
+        businesses[business_id]["inventory"] = {"items": items, "value": value, "low_stock": int(low_stock)}
+
+    merged = {}
+    for business in businesses.values():
+        business["summary"] = summarize_categories(business.pop("categories"))
+        for transaction_type, category, total, count in business["summary"]["categories"]:
+            totals = merged.setdefault((transaction_type, category), [0.0, 0])
+            totals[0] += total
+            totals[1] += count
+    categories = sorted(
+        ((transaction_type, category, total, count) for (transaction_type, category), (total, count) in merged.items()),
+        key=lambda row: (row[0] != "sale", -row[2])
+    )
+    businesses = list(businesses.values())
+    return {
+        "businesses": businesses,
+        "summary": summarize_categories(categories),
+        "inventory": {
+            key: sum(business["inventory"][key] for business in businesses) for key in ("items", "value", "low_stock")
+        },
+    }
+
+def portfolio_daily_totals(conn, user_id, start, end):
+    """Zero-filled (day, sales, expenses) rows summed over the portfolio, from the daily rollup"""
+    rows = conn.execute(
+        '''SELECT d.day, TOTAL(d.sales), TOTAL(d.expenses)
+        FROM business_profiles b JOIN transaction_daily_totals d ON d.business_id = b.id
+        WHERE b.user_id = ? AND d.day >= ? AND d.day <= ?
+        GROUP BY d.day''',
+        (user_id, start.isoformat(), end.isoformat())
+    ).fetchall()
+    totals = {day: (sales, expenses) for day, sales, expenses in rows}
+    days = [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+    return [(day, *totals.get(day, (0.0, 0.0))) for day in days]
+
+# ============================================================
+# RENDERERS
+# ============================================================
+def _margin(summary):
+    return (summary["sales"] - summary["expenses"]) / summary["sales"] * 100 if summary["sales"] > 0 else 0
+
+def _comparison_rows(portfolio):
+    """Business comparison rows, loss-making businesses highlighted, then the portfolio total"""
+    for business in portfolio["businesses"]:
+        summary = business["summary"]
+        profit = summary["sales"] - summary["expenses"]
+        yield [
+            business["business_name"][:32], f"{summary['sales']:,.2f}", f"{summary['expenses']:,.2f}",
+            f"{profit:,.2f}", f"{_margin(summary):.1f}%", f"{business['inventory']['value']:,.2f}"
+        ], profit < 0
+    summary = portfolio["summary"]
+    yield [
+        "Portfolio", f"{summary['sales']:,.2f}", f"{summary['expenses']:,.2f}",
+        f"{summary['sales'] - summary['expenses']:,.2f}", f"{_margin(summary):.1f}%",
+        f"{portfolio['inventory']['value']:,.2f}"
+    ], True
+
+def _business_section(business, styles):
+    summary, inventory = business["summary"], business["inventory"]
+    story = [
+        Paragraph(business["business_name"], styles['Heading3']),
+        Paragraph(
+            f"Sales ₹{summary['sales']:,.2f} · Expenses ₹{summary['expenses']:,.2f} · "
+            f"Net Profit ₹{summary['sales'] - summary['expenses']:,.2f} ({_margin(summary):.1f}%) · "
+            f"{summary['sale_count']:,} sales, {summary['expense_count']:,} expenses · "
+            f"Inventory ₹{inventory['value']:,.2f}, {inventory['low_stock']} to reorder",
+            styles['Normal']
+        ),
+        Spacer(1, 6),
+    ]
+    if summary["categories"]:
+        table = Table(
+            [['Type', 'Category', 'Transactions', 'Total (₹)']] + [
+                [transaction_type.title(), category[:40], f"{count:,}", f"{total:,.2f}"]
+                for transaction_type, category, total, count in summary["categories"]
+            ],
+            colWidths=[0.9 * inch, 2.9 * inch, 1.1 * inch, 1.3 * inch]
+        )
+        table.setStyle(TableStyle(DETAIL_TABLE_STYLE.getCommands() + [('ALIGN', (2, 1), (3, -1), 'RIGHT')]))
+        story.append(table)
+    else:
+        story.append(Paragraph("No transactions in this period.", styles['Normal']))
+    story.append(Spacer(1, 14))
+    return story
+
+def generate_portfolio_pdf(owner_name, portfolio, period="Monthly", date_range=None, charts=None, output=None):
+    """Portfolio summary, comparison table and charts, then one section per business.
+
+    Written to ``output`` (a path) if given, else returned as a buffer.
+    """
+    charts = charts or {}
+    buffer = output or BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1E3A8A'),
+        spaceAfter=30,
+        alignment=1  # Center
+    )
+
+    businesses = portfolio["businesses"]
+    story.append(Paragraph(f"BizSight AI - {period} Portfolio Report", title_style))
+    story.append(Paragraph(f"Owner: {owner_name}", styles['Normal']))
+    story.append(Paragraph(f"Businesses: {len(businesses)}", styles['Normal']))
+    if date_range is not None:
+        story.append(Paragraph(f"Period: {date_range[0]:%Y-%m-%d} to {date_range[1]:%Y-%m-%d}", styles['Normal']))
+    story.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
+    story.append(Spacer(1, 20))
+
+    # Portfolio Summary
+    story.append(Paragraph("Portfolio Summary", styles['Heading2']))
+    summary, inventory = portfolio["summary"], portfolio["inventory"]
+    net_profit = summary["sales"] - summary["expenses"]
+    summary_table = Table([
+        ['Metric', 'Value'],
+        ['Total Sales', f"₹{summary['sales']:,.2f}"],
+        ['Total Expenses', f"₹{summary['expenses']:,.2f}"],
+        ['Net Profit', f"₹{net_profit:,.2f}"],
+        ['Profit Margin', f"{_margin(summary):.1f}%"],
+        ['Transactions', f"{summary['sale_count']:,} sales, {summary['expense_count']:,} expenses"],
+        ['Inventory Value', f"₹{inventory['value']:,.2f}"],
+        ['Items Needing Reorder', f"{inventory['low_stock']:,}"],
+    ])
+    summary_table.setStyle(SUMMARY_TABLE_STYLE)
+    story.append(summary_table)
+    story.append(Spacer(1, 20))
+
+    for kind in ("daily_trend", "business_comparison", "expense_breakdown"):
+        if kind in charts:
+            story.append(_chart_image(charts[kind]))
+            story.append(Spacer(1, 12))
+
+    # Business Comparison (paged, so hundreds of businesses still split cleanly)
+    story.append(Paragraph("Business Comparison", styles['Heading2']))
+    story.append(PagedTable(
+        _comparison_rows(portfolio),
+        ['Business', 'Sales (₹)', 'Expenses (₹)', 'Net Profit (₹)', 'Margin', 'Inventory (₹)'],
+        [2.0 * inch, 1.0 * inch, 1.0 * inch, 1.0 * inch, 0.6 * inch, 1.0 * inch],
+        TableStyle(DETAIL_TABLE_STYLE.getCommands() + [('ALIGN', (1, 1), (-1, -1), 'RIGHT')])
+    ))
+
+    # Per-business sections
+    story.append(PageBreak())
+    story.append(Paragraph("Business Details", styles['Heading2']))
+    for business in businesses:
+        story.append(KeepTogether(_business_section(business, styles)))
+
+    doc.build(story)
+    if output is None:
+        buffer.seek(0)
+    return buffer
+
+def write_portfolio_excel(path, portfolio, date_range=None):
+    """Stream a workbook with Portfolio, Categories and Inventory sheets to ``path``"""
+    workbook = Workbook(write_only=True)
+    summary, inventory = portfolio["summary"], portfolio["inventory"]
+
+    sheet = workbook.create_sheet('Portfolio')
+    sheet.append(['Metric', 'Value'])
+    if date_range is not None:
+        sheet.append(['Period', f"{date_range[0]:%Y-%m-%d} to {date_range[1]:%Y-%m-%d}"])
+    sheet.append(['Businesses', len(portfolio["businesses"])])
+    sheet.append(['Total Sales', summary["sales"]])
+    sheet.append(['Total Expenses', summary["expenses"]])
+    sheet.append(['Net Profit', summary["sales"] - summary["expenses"]])
+    sheet.append(['Profit Margin (%)', round(_margin(summary), 1)])
+    sheet.append(['Sales', summary["sale_count"]])
+    sheet.append(['Expenses', summary["expense_count"]])
+    sheet.append(['Inventory Value', inventory["value"]])
+    sheet.append(['Items Needing Reorder', inventory["low_stock"]])
+    sheet.append([])
+    sheet.append(['Business', 'Total Sales', 'Total Expenses', 'Net Profit', 'Profit Margin (%)', 'Sales', 'Expenses'])
+    for business in portfolio["businesses"]:
+        business_summary = business["summary"]
+        sheet.append([
+            business["business_name"], business_summary["sales"], business_summary["expenses"],
+            business_summary["sales"] - business_summary["expenses"], round(_margin(business_summary), 1),
+            business_summary["sale_count"], business_summary["expense_count"]
+        ])
+
+    sheet = workbook.create_sheet('Categories')
+    sheet.append(['Business', 'Type', 'Category', 'Total', 'Transactions'])
+    for business in portfolio["businesses"]:
+        for row in business["summary"]["categories"]:
+            sheet.append([business["business_name"], *row])
+
+    sheet = workbook.create_sheet('Inventory')
+    sheet.append(['Business', 'Items', 'Stock Value', 'Items Needing Reorder'])
+    for business in portfolio["businesses"]:
+        sheet.append([business["business_name"], *business["inventory"].values()])
+
+    workbook.save(path)
+
+def portfolio_charts(conn, spec, portfolio, chart_dir, start, end):
+    """Cached chart images of a portfolio PDF keyed by kind; charts with nothing to plot are left out"""
+    has_transactions = bool(portfolio["summary"]["categories"])
+    data = {
+        "daily_trend": portfolio_daily_totals(conn, spec["user_id"], start, end) if has_transactions else None,
+        "business_comparison": business_comparison(portfolio["businesses"]) if has_transactions else None,
+        "expense_breakdown": expense_breakdown(portfolio["summary"]),
+    }
+    return {kind: chart_path(chart_dir, kind, rows) for kind, rows in data.items() if rows}
+
+def render_portfolio(db_path, spec, path, chart_dir=DEFAULT_CACHE_DIR / "charts"):
+    """Fetch a portfolio's data and render it into ``path``"""
+    start, end = date.fromisoformat(spec["start"]), date.fromisoformat(spec["end"])
+    conn = sqlite3.connect(db_path)
+    try:
+        portfolio = fetch_portfolio(conn, spec["user_id"], start, end)
+        if spec["report_format"] != "PDF":
+            write_portfolio_excel(path, portfolio, (start, end))
+            return
+        charts = portfolio_charts(conn, spec, portfolio, chart_dir, start, end)
+        generate_portfolio_pdf(spec["owner_name"], portfolio, spec["period"], (start, end), charts, output=path)
+    finally:
+        conn.close()
+
+def portfolio_spec(user_id, owner_name, report_format, period, start_date, end_date):
+    """Plain-dict description of a portfolio report; ``ReportQueue`` caches and renders it like a business report"""
+    return {
+        "user_id": user_id,
+        "owner_name": owner_name,
+        "report_format": report_format,
+        "period": period,
+        "start": start_date.isoformat(),
+        "end": end_date.isoformat(),
+    }
+
+# ============================================================
+# BATCH
+# ============================================================
+def batch_specs(conn, user_id, report_format, period, start_date, end_date, detail=False):
+    """(spec, data version) of every business's own report, the versions read in one pass"""
+    versions = business_data_versions(conn, user_id)
+    return [
+        (report_spec(business_id, name, report_format, period, start_date, end_date, detail), versions[business_id])
+        for business_id, name in fetch_businesses(conn, user_id)
+    ]
+
+def batch_member_name(spec):
+    name = re.sub(r"[^\w-]+", "_", spec["business_name"]).strip("_") or "Business"
+    extension = REPORT_FORMATS[spec["report_format"]]["extension"]
+    return f"{spec['business_id']}_{name}_{spec['period'].replace(' ', '_')}_Report_{spec['end'].replace('-', '')}.{extension}"
+
+def bundle_batch(report_queue, specs, path, job=None):
+    """Render every (spec, data version) on ``report_queue`` in parallel and zip the reports into ``path``.
+
+    Cached reports are added right away and fresh ones as each render
+    finishes, before the queue's pruning can evict them. Returns counts,
+    bytes and seconds.
+    """
+    started = time.perf_counter()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pending = {}
+    n_cached = 0
+    if job is not None:
+        job.update(rows_done=0, total_rows=len(specs), phase="Rendering")
+    try:
+        # PDFs and workbooks are already compressed
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for spec, data_version in specs:
+                artifact = report_queue.cached(spec, data_version)
+                if artifact is not None:
+                    archive.write(artifact, batch_member_name(spec))
+                    n_cached += 1
+                else:
+                    artifact, future = report_queue.submit(spec, data_version)
+                    pending[future] = (spec, artifact)
+            done = n_cached
+            for future in as_completed(pending):
+                spec, artifact = pending[future]
+                future.result()
+                archive.write(artifact, batch_member_name(spec))
+                done += 1
+                if job is not None:
+                    if job.cancel_requested:
+                        for queued in pending:
+                            queued.cancel()
+                    job.check_cancelled()
+                    job.update(rows_done=done)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return {
+        "reports": len(specs),
+        "cached": n_cached,
+        "bytes": os.path.getsize(path),
+        "seconds": time.perf_counter() - started,
+    }
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+def _synthetic_portfolio(db_path, n_businesses, rows_per_business, start, rng, categories=12):
+    conn = sqlite3.connect(db_path)
+    conn.execute('''CREATE TABLE business_profiles (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL, business_name TEXT NOT NULL,
+        business_type TEXT, city TEXT)''')
+    conn.execute('''CREATE TABLE transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, business_id INTEGER NOT NULL,
+        transaction_type TEXT NOT NULL, amount REAL NOT NULL, category TEXT, description TEXT,
+        date TIMESTAMP, receipt_image BLOB, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    conn.execute('''CREATE TABLE inventory (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, business_id INTEGER NOT NULL, item_name TEXT NOT NULL,
+        quantity INTEGER NOT NULL, unit_price REAL NOT NULL, reorder_level INTEGER DEFAULT 10,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+    conn.execute('CREATE INDEX idx_transactions_business_date ON transactions (business_id, date)')
+    conn.execute('CREATE INDEX idx_inventory_business ON inventory (business_id)')
+    ensure_kpi_schema(conn)
+    ensure_report_schema(conn)
+    for business_id in range(1, n_businesses + 1):
+        conn.execute('INSERT INTO business_profiles (user_id, business_name) VALUES (1, ?)', (f"Store {business_id}",))
+        conn.executemany(
+            '''INSERT INTO transactions (business_id, transaction_type, amount, category, description, date)
+            VALUES (?, ?, ?, ?, ?, ?)''',
+            [
+                (
+                    business_id, rng.choice(("sale", "expense")), round(rng.uniform(10, 5000), 2),
+                    f"Category {rng.randrange(categories)}", f"Synthetic entry {i}",
+                    f"{start + timedelta(days=rng.randrange(30))} {rng.randrange(24):02d}:00:00",
+                )
+                for i in range(rows_per_business)
+            ]
+        )
+        conn.executemany(
+            'INSERT INTO inventory (business_id, item_name, quantity, unit_price) VALUES (?, ?, ?, ?)',
+            [(business_id, f"Item {i}", rng.randrange(50), round(rng.uniform(5, 500), 2)) for i in range(20)]
+        )
+    conn.commit()
+    conn.close()
+
+def benchmark_portfolio(business_counts=(1, 10, 50), rows_per_business=2_000, seed=42):
+    """Seconds to render one consolidated PDF against each business's PDF one after another"""
+    import random
+    rng = random.Random(seed)
+    end = date.today()
+    start = end - timedelta(days=29)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_businesses in business_counts:
+            db_path = os.path.join(workdir, f"portfolio_{n_businesses}.db")
+            _synthetic_portfolio(db_path, n_businesses, rows_per_business, start, rng)
+            chart_dir = os.path.join(workdir, f"charts_{n_businesses}")
+            spec = portfolio_spec(1, "Benchmark", "PDF", "Monthly", start, end)
+            consolidated = render_report_file(db_path, spec, os.path.join(workdir, f"portfolio_{n_businesses}.pdf"), chart_dir)
+            conn = sqlite3.connect(db_path)
+            specs = batch_specs(conn, 1, "PDF", "Monthly", start, end)
+            conn.close()
+            separate = sum(
+                render_report_file(db_path, business_spec, os.path.join(workdir, f"business_{business_spec['business_id']}.pdf"), chart_dir)
+                for business_spec, _ in specs
+            )
+            results.append({
+                "businesses": n_businesses,
+                "consolidated": round(consolidated, 2),
+                "separate": round(separate, 2),
+            })
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark consolidated portfolio report generation")
+    parser.add_argument("--businesses", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--rows", type=int, default=2_000, help="Transactions per business")
+    args = parser.parse_args()
+    for result in benchmark_portfolio(args.businesses, args.rows):
+        print(
+            f"{result['businesses']:>5} businesses: consolidated {result['consolidated']:6.2f}s, "
+            f"one report each {result['separate']:7.2f}s"
+        )
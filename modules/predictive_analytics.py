@@ -0,0 +1,242 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.data_loader import optimize_memory
+
+RISK_LABELS = ["Low", "Medium", "High"]
+TIER_LABELS = ["Poor", "Below Avg", "Average", "Good", "Excellent"]
+
+# Columns whose distribution across the whole dataset drives the relative scores
+RANKED_COLUMNS = ["predicted_profit", "monthly_sales", "employee_efficiency",
+                  "sales_per_sqft", "inventory_turnover"]
+
+# Running sums behind the executive dashboard cards
+SUMMED_COLUMNS = ["predicted_profit", "monthly_sales", "marketing_roi",
+                  "inventory_level", "employee_efficiency"]
+
+# ============================================================
+# SORTED COLUMN STATISTICS
+# ============================================================
+class SortedColumnStats:
+    """Sorted copies of the ranked columns, maintained under inserts and removals.
+
+    Percentile ranks, qcut cut points and column maxima are read straight
+    from the sorted arrays, so appending rows never requires re-sorting
+    the dataset.
+    """
+
+    def __init__(self, sorted_columns):
+        self.columns = sorted_columns
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls({
+            col: np.sort(df[col].to_numpy())
+            for col in RANKED_COLUMNS if col in df.columns
+        })
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def insert(self, df):
+        """Merge the rows of ``df`` into the sorted columns"""
+        for col, values in self.columns.items():
+            new = np.sort(df[col].to_numpy().astype(values.dtype, copy=False))
+            self.columns[col] = np.insert(values, np.searchsorted(values, new), new)
+
+    def remove(self, df):
+        """Remove the rows of ``df`` (which must be present) from the sorted columns"""
+        for col, values in self.columns.items():
+            old = np.sort(df[col].to_numpy().astype(values.dtype, copy=False))
+            # Equal values map to the same left position; offset each repeat
+            repeat = np.arange(len(old)) - np.searchsorted(old, old, side="left")
+            positions = np.searchsorted(values, old, side="left") + repeat
+            self.columns[col] = np.delete(values, positions)
+
+    def pct_rank(self, col, values):
+        """Average-method percentile rank, identical to Series.rank(pct=True)"""
+        ordered = self.columns[col]
+        left = np.searchsorted(ordered, values, side="left")
+        right = np.searchsorted(ordered, values, side="right")
+        return (left + right + 1) / 2 / len(ordered)
+
+    def quantiles(self, col, q):
+        """Cut points used by pd.qcut(col, q)"""
+        return pd.Series(self.columns[col], copy=False).quantile(np.linspace(0, 1, q + 1)).to_numpy()
+
+    def count_above(self, col, threshold):
+        """Number of values strictly greater than ``threshold``"""
+        ordered = self.columns[col]
+        return len(ordered) - int(np.searchsorted(ordered, threshold, side="right"))
+
+    def max_replacing_zero(self, col):
+        """Equivalent of col.replace(0, 1).max()"""
+        ordered = self.columns[col]
+        zero_lo = np.searchsorted(ordered, 0, side="left")
+        zero_hi = np.searchsorted(ordered, 0, side="right")
+        candidates = []
+        if zero_hi < len(ordered):
+            candidates.append(ordered[-1])
+        elif zero_lo > 0:
+            candidates.append(ordered[zero_lo - 1])
+        if zero_hi > zero_lo:
+            candidates.append(1)
+        return max(candidates)
+
+# ============================================================
+# DATASET-RELATIVE SCORES
+# ============================================================
+def apply_dataset_scores(df, stats):
+    """Add the columns that depend on the whole dataset (risk band, efficiency, tier)"""
+    df["risk_band"] = pd.cut(
+        df["predicted_profit"],
+        stats.quantiles("predicted_profit", 3),
+        labels=RISK_LABELS,
+        include_lowest=True
+    )
+
+    if 'employee_efficiency' in df.columns:
+        emp_eff_norm = df['employee_efficiency'] / stats.max_replacing_zero('employee_efficiency')
+    else:
+        emp_eff_norm = 0.5
+
+    if 'sales_per_sqft' in df.columns:
+        sales_sqft_norm = df['sales_per_sqft'] / stats.max_replacing_zero('sales_per_sqft')
+    else:
+        sales_sqft_norm = 0.5
+
+    if 'inventory_turnover' in df.columns:
+        inv_turn_norm = df['inventory_turnover'] / stats.max_replacing_zero('inventory_turnover')
+    else:
+        inv_turn_norm = 0.5
+
+    df['efficiency_score'] = (emp_eff_norm * 0.4 +
+                              sales_sqft_norm * 0.3 +
+                              inv_turn_norm * 0.3) * 100
+
+    # Create performance tiers
+    if 'predicted_profit' in df.columns and 'monthly_sales' in df.columns and 'employee_efficiency' in df.columns:
+        performance_score = pd.Series(
+            stats.pct_rank('predicted_profit', df['predicted_profit'].to_numpy()) * 0.4 +
+            stats.pct_rank('monthly_sales', df['monthly_sales'].to_numpy()) * 0.3 +
+            stats.pct_rank('employee_efficiency', df['employee_efficiency'].to_numpy()) * 0.3,
+            index=df.index
+        )
+        df['performance_tier'] = pd.qcut(performance_score, 5, labels=TIER_LABELS)
+    else:
+        df['performance_tier'] = 'Average'
+
+    return df
+
+# ============================================================
+# INCREMENTAL (DELTA) DATASET
+# ============================================================
+def conform_delta(frame, delta):
+    """Shrink ``delta`` and line its dtypes up with ``frame`` so concatenating keeps them.
+
+    Only the delta is downcast and categorized. Categorical columns of
+    ``frame`` gain any new values of the delta as categories (the codes
+    are kept), since concatenating categoricals with different categories
+    would fall back to object. Numeric columns concatenate to their
+    common type, which is lossless.
+    """
+    delta, _ = optimize_memory(delta)
+    # Shallow copy: replacing a column below must not touch the caller's frame
+    frame = frame.copy(deep=False)
+    for col in delta.columns.intersection(frame.columns):
+        frame_type = frame[col].dtype
+        if isinstance(frame_type, pd.CategoricalDtype):
+            values = delta[col].astype(object)
+            new = pd.Index(values.dropna().unique()).difference(frame_type.categories)
+            if len(new):
+                frame[col] = frame[col].cat.add_categories(new)
+            delta[col] = pd.Categorical(values, categories=frame[col].cat.categories)
+        elif isinstance(delta[col].dtype, pd.CategoricalDtype):
+            delta[col] = delta[col].astype(frame_type)
+    return frame, delta
+
+class IncrementalDataset:
+    """Enriched dataset that accepts appended delta uploads without a full recompute.
+
+    ``score_rows(df_raw, key_column)`` runs the row-level part of the pipeline (schema,
+    derived metrics, model prediction) and is only ever called on the delta.
+    Dataset-relative columns and dashboard aggregates are refreshed from the
+    maintained sorted columns and running sums.
+    """
+
+    def __init__(self, frame, score_rows, key_column=None):
+        self.frame = frame
+        self.score_rows = score_rows
+        self.key_column = key_column
+        self.stats = SortedColumnStats.from_frame(frame)
+        self._sums = {
+            col: float(frame[col].sum()) for col in SUMMED_COLUMNS if col in frame.columns
+        }
+        self.history = []
+
+    def _add_to_sums(self, df, sign):
+        for col in self._sums:
+            self._sums[col] += sign * float(df[col].sum())
+
+    def append(self, delta_raw):
+        """Score and merge a delta upload; rows sharing a key replace existing ones"""
+        start = time.perf_counter()
+        received = len(delta_raw)
+        # Dashboard deltas compare against the dataset as it was before this upload
+        previous_kpis = self.aggregates()
+
+        if self.key_column:
+            delta_raw = delta_raw.drop_duplicates(self.key_column, keep="last")
+        duplicates_dropped = received - len(delta_raw)
+
+        scored, schema_report = self.score_rows(delta_raw, self.key_column)
+
+        frame = self.frame
+        replaced = 0
+        if self.key_column:
+            stale = frame[self.key_column].isin(scored[self.key_column]).to_numpy()
+            replaced = int(stale.sum())
+            if replaced:
+                self.stats.remove(frame[stale])
+                self._add_to_sums(frame[stale], -1)
+                frame = frame[~stale]
+
+        self.stats.insert(scored)
+        self._add_to_sums(scored, 1)
+
+        # Only the delta is downcast; the dataset-relative scores are the one full pass
+        frame, scored = conform_delta(frame, scored)
+        combined = pd.concat([frame, scored], ignore_index=True)
+        apply_dataset_scores(combined, self.stats)
+        self.frame = combined
+
+        summary = {
+            "received": received,
+            "duplicates_dropped": duplicates_dropped,
+            "replaced": replaced,
+            "added": len(scored) - replaced,
+            "total_rows": len(self.frame),
+            "seconds": time.perf_counter() - start,
+            "schema_report": schema_report,
+            "previous_kpis": previous_kpis,
+        }
+        self.history.append(summary)
+        return summary
+
+    def aggregates(self):
+        """Executive dashboard KPIs for the unfiltered dataset, without a rescan"""
+        n_rows = len(self.frame)
+        sums = self._sums
+        high_cut = self.stats.quantiles("predicted_profit", 3)[2]
+        return {
+            "avg_profit": sums["predicted_profit"] / n_rows,
+            "avg_sales": sums["monthly_sales"] / n_rows,
+            "risk_percentage": self.stats.count_above("predicted_profit", high_cut) / n_rows * 100,
+            "total_records": n_rows,
+            "profit_margin": (sums["predicted_profit"] / sums["monthly_sales"] * 100) if sums["monthly_sales"] > 0 else 0,
+            "avg_roi": sums["marketing_roi"] / n_rows if "marketing_roi" in sums else 2.0,
+            "inventory_turnover": (sums["monthly_sales"] / sums["inventory_level"]) if sums.get("inventory_level", 0) > 0 else 0,
+            "employee_productivity": sums["employee_efficiency"] / n_rows if "employee_efficiency" in sums else 50000,
+        }
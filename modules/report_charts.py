@@ -0,0 +1,163 @@
+"""Server-side PNG charts for PDF reports.
+
+Charts are drawn with matplotlib's Agg canvas (no display, no pyplot
+global state) inside the report worker processes. Each PNG is stored in
+a shared directory under a hash of its chart kind and the aggregate
+data it plots, so a chart whose numbers have not changed is reused by
+every report, recipient and period that shows it instead of being drawn
+again.
+"""
+import hashlib
+import json
+import os
+from datetime import date, timedelta
+from pathlib import Path
+
+# Bump when chart styling changes so cached images are not reused
+CHART_STYLE_VERSION = 1
+CHART_SIZE = (7.0, 2.8)
+CHART_DPI = 120
+# Categories/items drawn before the rest are folded into "Other"
+MAX_BARS = 8
+
+SALES_COLOR = "#10B981"
+EXPENSE_COLOR = "#EF4444"
+ACCENT_COLOR = "#1E3A8A"
+LOW_STOCK_COLOR = "#F59E0B"
+
+# ============================================================
+# CHART DATA
+# ============================================================
+def daily_totals(conn, business_id, start, end):
+    """Zero-filled (day, sales, expenses) rows of the period, aggregated in SQL"""
+    rows = conn.execute(
+        '''SELECT date(date),
+            SUM(CASE WHEN transaction_type = 'sale' THEN amount ELSE 0 END),
+            SUM(CASE WHEN transaction_type = 'expense' THEN amount ELSE 0 END)
+        FROM transactions
+        WHERE business_id = ? AND date >= ? AND date < ?
+        GROUP BY date(date)''',
+        (business_id, start.isoformat(), (end + timedelta(days=1)).isoformat())
+    ).fetchall()
+    totals = {day: (sales, expenses) for day, sales, expenses in rows}
+    days = [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+    return [(day, *totals.get(day, (0.0, 0.0))) for day in days]
+
+def _top(pairs, limit=MAX_BARS):
+    """Largest ``limit - 1`` (label, value) pairs plus an "Other" bucket for the rest"""
+    pairs = sorted(pairs, key=lambda pair: pair[1], reverse=True)
+    if len(pairs) <= limit:
+        return pairs
+    return pairs[:limit - 1] + [("Other", sum(value for _, value in pairs[limit - 1:]))]
+
+def expense_breakdown(summary):
+    return _top([(category or "Uncategorized", total) for kind, category, total, _ in summary["categories"] if kind == "expense"])
+
+def business_comparison(businesses):
+    """(business, sales, expenses) rows of the top sellers, the rest folded into Other"""
+    rows = sorted(
+        ((business["business_name"], business["summary"]["sales"], business["summary"]["expenses"]) for business in businesses),
+        key=lambda row: row[1], reverse=True
+    )
+    if len(rows) <= MAX_BARS:
+        return rows
+    rest = rows[MAX_BARS - 1:]
+    return rows[:MAX_BARS - 1] + [("Other", sum(row[1] for row in rest), sum(row[2] for row in rest))]
+
+def inventory_values(inventory):
+    """(item, stock value, low stock) rows of the most valuable items"""
+    items = sorted(
+        ((item[2], item[3] * item[4], item[3] <= item[5]) for item in inventory),
+        key=lambda item: item[1], reverse=True
+    )
+    return items[:MAX_BARS]
+
+# ============================================================
+# DRAWING
+# ============================================================
+def _figure():
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=CHART_SIZE, dpi=CHART_DPI)
+    ax = fig.add_subplot()
+    ax.spines[["top", "right"]].set_visible(False)
+    ax.tick_params(labelsize=8)
+    return fig, ax
+
+def _currency_axis(axis):
+    from matplotlib.ticker import FuncFormatter
+    axis.set_major_formatter(FuncFormatter(lambda value, _: f"{value:,.0f}"))
+
+def draw_daily_trend(rows, path):
+    fig, ax = _figure()
+    days = [date.fromisoformat(day) for day, _, _ in rows]
+    ax.plot(days, [sales for _, sales, _ in rows], color=SALES_COLOR, linewidth=1.6, label="Sales")
+    ax.plot(days, [expenses for _, _, expenses in rows], color=EXPENSE_COLOR, linewidth=1.6, label="Expenses")
+    ax.set_title("Daily Sales & Expenses (₹)", fontsize=10, color=ACCENT_COLOR)
+    ax.legend(fontsize=8, frameon=False)
+    _currency_axis(ax.yaxis)
+    fig.autofmt_xdate()
+    fig.savefig(path, format="png", bbox_inches="tight")
+
+def draw_expense_breakdown(pairs, path):
+    fig, ax = _figure()
+    labels = [label for label, _ in pairs][::-1]
+    ax.barh(labels, [value for _, value in pairs][::-1], color=EXPENSE_COLOR)
+    ax.set_title("Expenses by Category (₹)", fontsize=10, color=ACCENT_COLOR)
+    _currency_axis(ax.xaxis)
+    fig.savefig(path, format="png", bbox_inches="tight")
+
+def draw_inventory_values(items, path):
+    fig, ax = _figure()
+    items = items[::-1]
+    ax.barh(
+        [name for name, _, _ in items], [value for _, value, _ in items],
+        color=[LOW_STOCK_COLOR if low else SALES_COLOR for _, _, low in items]
+    )
+    ax.set_title("Inventory Value (₹, amber = low stock)", fontsize=10, color=ACCENT_COLOR)
+    _currency_axis(ax.xaxis)
+    fig.savefig(path, format="png", bbox_inches="tight")
+
+def draw_business_comparison(rows, path):
+    fig, ax = _figure()
+    rows = rows[::-1]
+    positions = range(len(rows))
+    ax.barh([p + 0.2 for p in positions], [sales for _, sales, _ in rows], height=0.4, color=SALES_COLOR, label="Sales")
+    ax.barh([p - 0.2 for p in positions], [expenses for _, _, expenses in rows], height=0.4, color=EXPENSE_COLOR, label="Expenses")
+    ax.set_yticks(list(positions), [name for name, _, _ in rows])
+    ax.set_title("Sales & Expenses by Business (₹)", fontsize=10, color=ACCENT_COLOR)
+    ax.legend(fontsize=8, frameon=False)
+    _currency_axis(ax.xaxis)
+    fig.savefig(path, format="png", bbox_inches="tight")
+
+CHARTS = {
+    "daily_trend": draw_daily_trend,
+    "expense_breakdown": draw_expense_breakdown,
+    "inventory_values": draw_inventory_values,
+    "business_comparison": draw_business_comparison,
+}
+
+# ============================================================
+# CHART CACHE
+# ============================================================
+def chart_path(chart_dir, kind, data):
+    """Cached PNG of ``kind`` drawn from ``data``, drawing it first if missing"""
+    key = json.dumps([kind, data, CHART_STYLE_VERSION, CHART_SIZE, CHART_DPI], default=str)
+    path = Path(chart_dir) / f"{kind}_{hashlib.sha1(key.encode()).hexdigest()[:20]}.png"
+    if path.exists():
+        os.utime(path)
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Concurrent workers drawing the same chart each write their own temp file
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    CHARTS[kind](data, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+def prune_charts(chart_dir, keep):
+    """Drop the least recently used chart images beyond ``keep``"""
+    chart_dir = Path(chart_dir)
+    if not chart_dir.is_dir():
+        return
+    charts = sorted(chart_dir.glob("*.png"), key=lambda p: p.stat().st_mtime)
+    for path in charts[:-keep] if keep else charts:
+        path.unlink(missing_ok=True)
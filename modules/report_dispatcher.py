@@ -0,0 +1,420 @@
+"""Scheduled report dispatcher.
+
+Run with ``python -m modules.report_dispatcher --smtp-host mail.example.com``
+next to the app. Every ``--interval`` seconds it reads the active rows of
+``scheduled_reports``, picks the ones whose weekly or monthly day has come
+since they were last sent, and:
+
+* groups them by (business, report type) and renders each group's PDF
+  once on the ``ReportQueue`` process pool, sharing the app's artifact
+  cache;
+* delivers one email per recipient over a pool of reused SMTP
+  connections, retrying transient failures with backoff;
+* stamps ``last_sent`` for every delivered schedule.
+
+``--once --local-sink`` runs a single pass against an in-process SMTP
+stand-in and prints throughput metrics.
+"""
+import argparse
+import calendar
+import json
+import os
+import queue
+import random
+import smtplib
+import socketserver
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+from email import encoders
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from modules.reports import DEFAULT_CACHE_DIR, REPORT_FORMATS, ReportQueue, period_range, report_spec
+
+REPORT_PERIODS = {"weekly": "Weekly", "monthly": "Monthly"}
+DEFAULT_SENDER = "reports@bizsight.local"
+# last_sent is written in batches of this many delivered schedules
+LAST_SENT_BATCH = 100
+
+# ============================================================
+# DUE SCHEDULES
+# ============================================================
+def last_occurrence(report_type, schedule_day, today):
+    """Most recent scheduled day on or before ``today``.
+
+    Weekly days are 0=Monday..6=Sunday; monthly days past the end of a
+    month fall on its last day.
+    """
+    if report_type == "weekly":
+        return today - timedelta(days=(today.weekday() - schedule_day) % 7)
+    year, month = today.year, today.month
+    occurrence = date(year, month, min(schedule_day, calendar.monthrange(year, month)[1]))
+    if occurrence > today:
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+        occurrence = date(year, month, min(schedule_day, calendar.monthrange(year, month)[1]))
+    return occurrence
+
+def due_schedules(conn, today=None):
+    """Active schedules whose last occurrence has not been sent yet.
+
+    A schedule missed while the dispatcher was down is sent on the next
+    pass; a new schedule waits for its first occurrence after creation.
+    Returns (id, business_id, business_name, report_type, email) rows.
+    """
+    today = today or date.today()
+    rows = conn.execute(
+        '''SELECT s.id, s.business_id, b.business_name, s.report_type, s.email, s.schedule_day,
+            date(s.last_sent), date(s.created_at)
+        FROM scheduled_reports s
+        JOIN business_profiles b ON b.id = s.business_id
+        WHERE s.active = 1'''
+    ).fetchall()
+    due = []
+    for schedule_id, business_id, business_name, report_type, email, schedule_day, last_sent, created in rows:
+        if report_type not in REPORT_PERIODS or schedule_day is None:
+            continue
+        occurrence = last_occurrence(report_type, schedule_day, today)
+        if last_sent is not None:
+            if date.fromisoformat(last_sent) >= occurrence:
+                continue
+        elif created is not None and date.fromisoformat(created) > occurrence:
+            continue
+        due.append((schedule_id, business_id, business_name, report_type, email))
+    return due
+
+def mark_sent(conn, schedule_ids, sent_at=None):
+    """Record delivery; stamped in UTC by SQLite, the clock ``created_at`` uses too"""
+    conn.executemany(
+        'UPDATE scheduled_reports SET last_sent = COALESCE(?, CURRENT_TIMESTAMP) WHERE id = ?',
+        [(sent_at, schedule_id) for schedule_id in schedule_ids]
+    )
+    conn.commit()
+
+# ============================================================
+# SMTP DELIVERY
+# ============================================================
+class SmtpPool:
+    """Reusable SMTP connections shared by the delivery threads.
+
+    A connection is taken for one message and handed back afterwards, so
+    each TCP/TLS handshake and login serves many messages. Connections
+    that drop are reopened on the next use; after ``max_messages``
+    messages a connection is closed to stay under per-session limits.
+    """
+
+    def __init__(self, host, port=25, username=None, password=None, starttls=False,
+                 timeout=30, max_messages=100):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.max_messages = max_messages
+        self.connections_opened = 0
+        self._idle = queue.LifoQueue()
+        self._guard = threading.Lock()
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            smtp.starttls()
+        if self.username:
+            smtp.login(self.username, self.password or "")
+        with self._guard:
+            self.connections_opened += 1
+        return [smtp, 0]
+
+    def send(self, message):
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = self._connect()
+        try:
+            connection[0].send_message(message)
+        except smtplib.SMTPResponseException:
+            # The server answered, so the session is still usable once reset
+            self._reset(connection)
+            raise
+        except Exception:
+            self._discard(connection)
+            raise
+        connection[1] += 1
+        if connection[1] >= self.max_messages:
+            self._discard(connection)
+        else:
+            self._idle.put(connection)
+
+    def _reset(self, connection):
+        try:
+            connection[0].rset()
+            self._idle.put(connection)
+        except Exception:
+            self._discard(connection)
+
+    def _discard(self, connection):
+        try:
+            connection[0].quit()
+        except Exception:
+            connection[0].close()
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+def _is_permanent(error):
+    """Refused recipients and 5xx replies will fail the same way on a retry"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+def deliver(pool, message, retries=3, backoff=1.0):
+    """Send one message, retrying transient failures; returns (attempts, error or None)"""
+    for attempt in range(1, retries + 2):
+        try:
+            pool.send(message)
+            return attempt, None
+        except (smtplib.SMTPException, OSError) as e:
+            if _is_permanent(e) or attempt > retries:
+                return attempt, f"{type(e).__name__}: {e}"
+            time.sleep(backoff * 2 ** (attempt - 1))
+
+def report_attachment(data, filename, report_format="PDF"):
+    """MIME part of a rendered report, encoded once and shared by every recipient"""
+    maintype, subtype = REPORT_FORMATS[report_format]["mime"].split("/", 1)
+    part = MIMEBase(maintype, subtype)
+    part.set_payload(data)
+    encoders.encode_base64(part)
+    part.add_header("Content-Disposition", "attachment", filename=filename)
+    return part
+
+def build_message(sender, recipient, spec, attachment):
+    message = MIMEMultipart()
+    message["From"] = sender
+    message["To"] = recipient
+    message["Subject"] = f"BizSight AI - {spec['period']} report for {spec['business_name']}"
+    message.attach(MIMEText(
+        f"Your {spec['period'].lower()} business report for {spec['business_name']} "
+        f"({spec['start']} to {spec['end']}) is attached.\n\n- BizSight AI"
+    ))
+    message.attach(attachment)
+    return message
+
+# ============================================================
+# DISPATCH
+# ============================================================
+def dispatch_due(db_path, report_queue, pool, sender=DEFAULT_SENDER, today=None,
+                 delivery_threads=8, retries=3, backoff=1.0):
+    """Render and email every due schedule once; returns run metrics"""
+    today = today or date.today()
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    try:
+        due = due_schedules(conn, today)
+        groups = defaultdict(list)
+        for schedule_id, business_id, business_name, report_type, email in due:
+            groups[(business_id, business_name, report_type)].append((schedule_id, email))
+
+        # One render per (business, report type), all in flight at once
+        renders = {}
+        cache_hits = 0
+        for (business_id, business_name, report_type), recipients in groups.items():
+            period = REPORT_PERIODS[report_type]
+            start, end = period_range(period, today=today)
+            spec = report_spec(business_id, business_name, "PDF", period, start, end)
+            path = report_queue.cached(spec)
+            if path is not None:
+                cache_hits += 1
+                renders[path] = (spec, recipients, None)
+            else:
+                path, future = report_queue.submit(spec)
+                renders[path] = (spec, recipients, future)
+
+        metrics = {"due": len(due), "reports": len(groups), "cache_hits": cache_hits, "render_errors": 0,
+                   "sent": 0, "failed": 0, "retries": 0, "errors": []}
+        delivered = []
+        with ThreadPoolExecutor(max_workers=delivery_threads, thread_name_prefix="report-smtp") as executor:
+            # Each report's emails are queued as soon as it is rendered
+            deliveries = {}
+            for path, data in _rendered(renders, metrics):
+                spec, recipients, _ = renders[path]
+                attachment = report_attachment(data, f"bizsight_{spec['period'].lower()}_report_{spec['end']}.pdf")
+                for schedule_id, email in recipients:
+                    message = build_message(sender, email, spec, attachment)
+                    deliveries[executor.submit(deliver, pool, message, retries, backoff)] = (schedule_id, email)
+            render_done = time.perf_counter()
+
+            for future in as_completed(deliveries):
+                schedule_id, email = deliveries[future]
+                attempts, error = future.result()
+                metrics["retries"] += attempts - 1
+                if error is None:
+                    metrics["sent"] += 1
+                    delivered.append(schedule_id)
+                    if len(delivered) >= LAST_SENT_BATCH:
+                        mark_sent(conn, delivered)
+                        delivered = []
+                else:
+                    metrics["failed"] += 1
+                    metrics["errors"].append(f"{email}: {error}")
+        if delivered:
+            mark_sent(conn, delivered)
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    metrics.update({
+        "render_seconds": round(render_done - started, 3),
+        "seconds": round(elapsed, 3),
+        "emails_per_sec": round(metrics["sent"] / elapsed, 1) if elapsed > 0 else 0.0,
+        "smtp_connections": pool.connections_opened,
+    })
+    return metrics
+
+def _rendered(renders, metrics):
+    """Yield (path, bytes) for cached reports, then for renders as they finish.
+
+    Failed renders, and artifacts the app's cache pruned before they could
+    be read, are counted and skipped; their schedules stay due for the
+    next pass.
+    """
+    pending = {}
+    for path, (_, _, future) in renders.items():
+        if future is None:
+            try:
+                data = path.read_bytes()
+            except OSError as e:
+                metrics["render_errors"] += 1
+                metrics["errors"].append(f"read {path.name}: {e}")
+                continue
+            yield path, data
+        else:
+            pending[future] = path
+    for future in as_completed(pending):
+        path = pending[future]
+        try:
+            future.result()
+            data = path.read_bytes()
+        except Exception as e:
+            metrics["render_errors"] += 1
+            metrics["errors"].append(f"render {path.name}: {e}")
+            continue
+        yield path, data
+
+def run_forever(db_path, report_queue, pool, interval=300, **options):
+    """Dispatch due reports every ``interval`` seconds until interrupted"""
+    while True:
+        metrics = dispatch_due(db_path, report_queue, pool, **options)
+        if metrics["due"]:
+            print(json.dumps(metrics), flush=True)
+        pool.close()
+        time.sleep(interval)
+
+# ============================================================
+# LOCAL SMTP STAND-IN
+# ============================================================
+class SmtpSink(socketserver.ThreadingTCPServer):
+    """Minimal in-process SMTP server that accepts and counts messages.
+
+    ``fail_rate`` answers that share of messages with a transient 451 so
+    retries can be exercised. Not a real mail server.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, fail_rate=0.0):
+        super().__init__((host, port), _SmtpSinkHandler)
+        self.fail_rate = fail_rate
+        self.messages = 0
+        self.rejected = 0
+        self.sessions = 0
+        self._guard = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, name="smtp-sink", daemon=True)
+        self._thread.start()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+class _SmtpSinkHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        sink = self.server
+        with sink._guard:
+            sink.sessions += 1
+        self._reply("220 bizsight-sink ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self._reply("250 bizsight-sink")
+            elif command == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                with sink._guard:
+                    rejected = random.random() < sink.fail_rate
+                    if rejected:
+                        sink.rejected += 1
+                    else:
+                        sink.messages += 1
+                self._reply("451 Try again later" if rejected else "250 OK")
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("250 OK")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Email due scheduled reports")
+    parser.add_argument("--db", default="bizsight.db")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR))
+    parser.add_argument("--smtp-host", default=os.environ.get("BIZSIGHT_SMTP_HOST", "localhost"))
+    parser.add_argument("--smtp-port", type=int, default=int(os.environ.get("BIZSIGHT_SMTP_PORT", 25)))
+    parser.add_argument("--smtp-user", default=os.environ.get("BIZSIGHT_SMTP_USER"))
+    parser.add_argument("--starttls", action="store_true")
+    parser.add_argument("--sender", default=os.environ.get("BIZSIGHT_SMTP_SENDER", DEFAULT_SENDER))
+    parser.add_argument("--render-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-artifacts", type=int, default=5000, help="Rendered reports kept in the cache")
+    parser.add_argument("--smtp-connections", type=int, default=8, help="Parallel deliveries and pooled connections")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--interval", type=int, default=300, help="Seconds between passes")
+    parser.add_argument("--once", action="store_true", help="Run a single pass and print its metrics")
+    parser.add_argument("--today", type=date.fromisoformat, help="Dispatch as of this date (YYYY-MM-DD)")
+    parser.add_argument("--local-sink", action="store_true", help="Deliver to an in-process SMTP stand-in")
+    parser.add_argument("--sink-fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    sink = SmtpSink(fail_rate=args.sink_fail_rate) if args.local_sink else None
+    pool = SmtpPool(
+        "127.0.0.1" if sink else args.smtp_host, sink.port if sink else args.smtp_port,
+        args.smtp_user, os.environ.get("BIZSIGHT_SMTP_PASSWORD"), args.starttls
+    )
+    report_queue = ReportQueue(args.cache_dir, args.db, max_workers=args.render_workers, max_artifacts=args.max_artifacts)
+    options = dict(sender=args.sender, delivery_threads=args.smtp_connections, retries=args.retries,
+                   backoff=0.05 if sink else 1.0)
+    try:
+        if args.once:
+            metrics = dispatch_due(args.db, report_queue, pool, today=args.today, **options)
+            if sink:
+                metrics["sink"] = {"messages": sink.messages, "rejected": sink.rejected, "sessions": sink.sessions}
+            print(json.dumps(metrics, indent=2))
+        else:
+            run_forever(args.db, report_queue, pool, args.interval, today=args.today, **options)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.close()
@@ -0,0 +1,726 @@
+"""Business report rendering, artifact cache and process-pool render queue.
+
+Reports are rendered in worker processes straight from the database, so
+the Streamlit script thread never builds a PDF or workbook itself. Each
+artifact is stored on disk under a key of (business, format, period
+range, data version, layout version) and served again while none of
+those change. Identical concurrent requests share one render.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from io import BytesIO
+from multiprocessing import get_context
+from pathlib import Path
+
+from openpyxl import Workbook
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Flowable, Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from modules.report_charts import (
+    CHART_SIZE, chart_path, daily_totals, expense_breakdown, inventory_values, prune_charts
+)
+
+# Most recent transactions listed in the PDF
+PDF_TRANSACTION_ROWS = 20
+
+# Rows fetched per round trip when streaming a full export
+EXPORT_CHUNK_ROWS = 5000
+
+# Excel rejects sheets longer than this (header row included)
+EXCEL_MAX_ROWS = 1048576
+
+# Shared by the app and the scheduled report dispatcher
+DEFAULT_CACHE_DIR = Path(tempfile.gettempdir()) / "bizsight_reports"
+
+# Bump when the rendered layout changes so cached artifacts are not reused
+REPORT_LAYOUT_VERSION = 5
+
+REPORT_FORMATS = {
+    "PDF": {"extension": "pdf", "mime": "application/pdf"},
+    "Excel": {"extension": "xlsx", "mime": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"},
+}
+
+TRANSACTION_COLUMNS = ['ID', 'Business ID', 'Type', 'Amount', 'Category', 'Description', 'Date', 'Created At']
+INVENTORY_COLUMNS = ['ID', 'Business ID', 'Item Name', 'Quantity', 'Unit Price', 'Reorder Level', 'Last Updated']
+
+# ============================================================
+# PERIODS & DATA
+# ============================================================
+def period_range(period, start_date=None, end_date=None, today=None):
+    """Inclusive (start, end) dates of a report period ending today, or the custom range"""
+    today = today or date.today()
+    if period == "Weekly":
+        return today - timedelta(days=6), today
+    if period == "Monthly":
+        return today - timedelta(days=29), today
+    if start_date is None or end_date is None:
+        raise ValueError("A custom range needs a start and an end date")
+    if start_date > end_date:
+        raise ValueError("The start date is after the end date")
+    return start_date, end_date
+
+# Per-business write counter behind the artifact cache key. Triggers bump it
+# on every insert, update and delete of a transaction or inventory row, so an
+# edit that leaves counts and sums alone (a new category, swapped amounts)
+# still invalidates cached reports.
+DATA_VERSIONS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS report_data_versions (
+        business_id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+'''
+
+_BUMP = '''
+    INSERT INTO report_data_versions (business_id, version) VALUES ({row}.business_id, 1)
+    ON CONFLICT (business_id) DO UPDATE SET version = version + 1;
+'''
+
+DATA_VERSION_TRIGGERS = tuple(
+    f'''CREATE TRIGGER IF NOT EXISTS {table}_report_version_{event.lower()}
+    AFTER {event} ON {table}
+    BEGIN {" ".join(_BUMP.format(row=row) for row in rows)} END'''
+    for table in ("transactions", "inventory")
+    for event, rows in (("INSERT", ("NEW",)), ("UPDATE", ("OLD", "NEW")), ("DELETE", ("OLD",)))
+)
+
+def ensure_report_schema(conn):
+    """Create the data version counter and the triggers that bump it"""
+    conn.execute(DATA_VERSIONS_TABLE)
+    for trigger in DATA_VERSION_TRIGGERS:
+        conn.execute(trigger)
+    conn.commit()
+
+def report_data_version(conn, business_id):
+    """Fingerprint of a business's transactions and inventory; changes on any insert, edit or delete"""
+    changes = conn.execute(
+        'SELECT version FROM report_data_versions WHERE business_id = ?', (business_id,)
+    ).fetchone()
+    transactions = conn.execute(
+        'SELECT COUNT(*), MAX(id), SUM(amount), MAX(date) FROM transactions WHERE business_id = ?',
+        (business_id,)
+    ).fetchone()
+    inventory = conn.execute(
+        'SELECT COUNT(*), MAX(id), SUM(quantity), SUM(quantity * unit_price), MAX(last_updated) FROM inventory WHERE business_id = ?',
+        (business_id,)
+    ).fetchone()
+    return data_fingerprint(changes[0] if changes else 0, transactions, inventory)
+
+def data_fingerprint(changes, transactions, inventory):
+    """Version string of a business from its write counter and transaction and inventory aggregate rows.
+
+    The counter catches every edit; the aggregates keep a rebuilt database,
+    whose counters start again from zero, from matching old artifacts.
+    """
+    key = [changes, list(transactions), list(inventory)]
+    return hashlib.sha1(json.dumps(key, default=str).encode()).hexdigest()[:16]
+
+def _date_bounds(start, end):
+    """Half-open text bounds on the timestamp column, so the (business_id, date) index is range-scanned"""
+    return start.isoformat(), (end + timedelta(days=1)).isoformat()
+
+def fetch_summary(conn, business_id, start, end):
+    """Period totals and per-category sums/counts, aggregated in SQL"""
+    low, high = _date_bounds(start, end)
+    categories = conn.execute(
+        '''SELECT transaction_type, COALESCE(category, ''), SUM(amount), COUNT(*)
+        FROM transactions
+        WHERE business_id = ? AND date >= ? AND date < ?
+        GROUP BY transaction_type, category
+        ORDER BY transaction_type DESC, SUM(amount) DESC''',
+        (business_id, low, high)
+    ).fetchall()
+    return summarize_categories(categories)
+
+def summarize_categories(categories):
+    """Summary dict of (type, category, total, count) rows: sales/expense totals and counts plus the rows"""
+    summary = {"sales": 0.0, "expenses": 0.0, "sale_count": 0, "expense_count": 0, "categories": categories}
+    for transaction_type, _, total, count in categories:
+        if transaction_type == "sale":
+            summary["sales"] += total
+            summary["sale_count"] += count
+        elif transaction_type == "expense":
+            summary["expenses"] += total
+            summary["expense_count"] += count
+    return summary
+
+def _transactions_query(business_id, start, end, limit=None):
+    low, high = _date_bounds(start, end)
+    query = '''SELECT id, business_id, transaction_type, amount, category, description, date, created_at
+        FROM transactions
+        WHERE business_id = ? AND date >= ? AND date < ?
+        ORDER BY date DESC'''
+    params = [business_id, low, high]
+    if limit is not None:
+        query += ' LIMIT ?'
+        params.append(limit)
+    return query, params
+
+def fetch_transactions(conn, business_id, start, end, limit=None):
+    """Transactions of the period, newest first; receipts are never loaded"""
+    return conn.execute(*_transactions_query(business_id, start, end, limit)).fetchall()
+
+def iter_transactions(conn, business_id, start, end, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Transactions of the period, newest first, ``chunk_rows`` rows at a time"""
+    cursor = conn.execute(*_transactions_query(business_id, start, end))
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            return
+        yield from rows
+
+def iter_detail_rows(conn, business_id, start, end, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Transactions of the period grouped by type and category, oldest first within a group"""
+    low, high = _date_bounds(start, end)
+    cursor = conn.execute(
+        '''SELECT id, business_id, transaction_type, amount, category, description, date, created_at
+        FROM transactions
+        WHERE business_id = ? AND date >= ? AND date < ?
+        ORDER BY transaction_type DESC, COALESCE(category, ''), date''',
+        (business_id, low, high)
+    )
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            return
+        yield from rows
+
+def fetch_inventory(conn, business_id):
+    return conn.execute(
+        'SELECT * FROM inventory WHERE business_id = ? ORDER BY item_name',
+        (business_id,)
+    ).fetchall()
+
+# ============================================================
+# RENDERERS
+# ============================================================
+# Full-detail listings use fixed row heights so rows per page are known up front
+DETAIL_ROW_HEIGHT = 11
+
+DETAIL_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3B82F6')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 7),
+    ('LEADING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 1),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+    ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors.lightgrey),
+    ('ALIGN', (-1, 1), (-1, -1), 'RIGHT'),
+])
+SUBTOTAL_BACKGROUND = colors.HexColor('#E0E7FF')
+
+SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1E3A8A')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 14),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+class PagedTable(Flowable):
+    """Long table that pulls its rows from an iterator one page at a time.
+
+    ``rows`` yields (cells, highlighted) pairs; highlighted rows are drawn
+    bold on a tinted background. Every split emits a plain ``Table`` of
+    exactly the rows that fit, headed by ``header``, and keeps the rest
+    of the iterator for the next page. Splitting a single platypus
+    ``Table`` instead re-wraps all remaining rows on every page, which is
+    quadratic in the row count.
+    """
+
+    def __init__(self, rows, header, col_widths, style, _buffer=None, _exhausted=False):
+        super().__init__()
+        self._rows = iter(rows)
+        self._buffer = _buffer or []
+        self._exhausted = _exhausted
+        self.header = header
+        self.col_widths = col_widths
+        self.style = style
+        self.width = sum(col_widths)
+
+    def _fill(self, n_rows):
+        while len(self._buffer) < n_rows and not self._exhausted:
+            try:
+                self._buffer.append(next(self._rows))
+            except StopIteration:
+                self._exhausted = True
+
+    def _capacity(self, height):
+        """Body rows that fit under the header in ``height`` points"""
+        return int(height // DETAIL_ROW_HEIGHT) - 1
+
+    def wrap(self, availWidth, availHeight):
+        capacity = self._capacity(availHeight)
+        self._fill(max(capacity, 0) + 1)
+        if self._exhausted and len(self._buffer) <= capacity:
+            self.height = (len(self._buffer) + 1) * DETAIL_ROW_HEIGHT
+        else:
+            # Taller than the space left, so the frame asks for a split
+            self.height = availHeight + DETAIL_ROW_HEIGHT
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        capacity = self._capacity(availHeight)
+        if capacity < 1:
+            return []
+        self._fill(capacity)
+        rest = PagedTable(self._rows, self.header, self.col_widths, self.style, self._buffer[capacity:], self._exhausted)
+        return [self._table(self._buffer[:capacity]), rest]
+
+    def _table(self, rows):
+        table = Table(
+            [self.header] + [cells for cells, _ in rows],
+            colWidths=self.col_widths, rowHeights=DETAIL_ROW_HEIGHT
+        )
+        commands = list(self.style.getCommands())
+        for i, (_, highlighted) in enumerate(rows, start=1):
+            if highlighted:
+                commands.append(('BACKGROUND', (0, i), (-1, i), SUBTOTAL_BACKGROUND))
+                commands.append(('FONTNAME', (0, i), (-1, i), 'Helvetica-Bold'))
+        table.setStyle(TableStyle(commands))
+        return table
+
+    def draw(self):
+        table = self._table(self._buffer)
+        table.wrapOn(self.canv, self.width, self.height)
+        table.drawOn(self.canv, 0, 0)
+
+def _subtotal_row(group, total, count):
+    return ['', group[0].title(), f"{group[1]} subtotal ({count:,})", '', f"{total:,.2f}"], True
+
+def _with_subtotals(transactions):
+    """Detail rows with a subtotal row after each (type, category) group"""
+    group, total, count = None, 0.0, 0
+    for _, _, transaction_type, amount, category, description, day, _ in transactions:
+        key = (transaction_type, category or '')
+        if group is not None and key != group:
+            yield _subtotal_row(group, total, count)
+            total, count = 0.0, 0
+        group = key
+        total += amount
+        count += 1
+        yield [
+            (day or '')[:10], transaction_type.title(), category or '',
+            (description or '')[:40], f"{amount:,.2f}"
+        ], False
+    if group is not None:
+        yield _subtotal_row(group, total, count)
+
+def detail_table(transactions):
+    """Every transaction, grouped by type and category with subtotal rows"""
+    return PagedTable(
+        _with_subtotals(transactions),
+        ['Date', 'Type', 'Category', 'Description', 'Amount (₹)'],
+        [0.9 * inch, 0.7 * inch, 1.5 * inch, 2.5 * inch, 0.9 * inch],
+        DETAIL_TABLE_STYLE
+    )
+
+def inventory_table(inventory):
+    rows = (
+        ([
+            item[2], str(item[3]), f"{item[4]:,.2f}", f"{item[3] * item[4]:,.2f}",
+            'Low Stock' if item[3] <= item[5] else 'OK'
+        ], item[3] <= item[5])
+        for item in inventory
+    )
+    style = TableStyle(DETAIL_TABLE_STYLE.getCommands() + [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10B981')),
+        ('ALIGN', (1, 1), (3, -1), 'RIGHT'),
+        ('ALIGN', (-1, 1), (-1, -1), 'CENTER'),
+    ])
+    return PagedTable(
+        rows,
+        ['Item Name', 'Quantity', 'Unit Price (₹)', 'Total Value (₹)', 'Status'],
+        [2.3 * inch, 0.9 * inch, 1.1 * inch, 1.2 * inch, 1.0 * inch],
+        style
+    )
+
+def _chart_image(path):
+    width = 6.5 * inch
+    return Image(str(path), width=width, height=width * CHART_SIZE[1] / CHART_SIZE[0])
+
+def generate_pdf_report(business_name, summary, transactions, inventory, period="Monthly", date_range=None,
+                        charts=None, detail=False, output=None):
+    """Generate PDF report using ReportLab from SQL aggregates and the listed transactions.
+
+    With ``detail``, ``transactions`` is an iterable of every transaction
+    ordered by type and category (see ``iter_detail_rows``), listed in
+    full with category subtotals. Written to ``output`` (a path) if
+    given, else returned as a buffer.
+    """
+    charts = charts or {}
+    buffer = output or BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+    
+    # Title
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1E3A8A'),
+        spaceAfter=30,
+        alignment=1  # Center
+    )
+    
+    story.append(Paragraph(f"BizSight AI - {period} Business Report", title_style))
+    story.append(Paragraph(f"Business: {business_name}", styles['Normal']))
+    if date_range is not None:
+        story.append(Paragraph(f"Period: {date_range[0]:%Y-%m-%d} to {date_range[1]:%Y-%m-%d}", styles['Normal']))
+    story.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
+    story.append(Spacer(1, 20))
+    
+    # Executive Summary
+    story.append(Paragraph("Executive Summary", styles['Heading2']))
+    
+    if summary["categories"]:
+        total_sales = summary["sales"]
+        total_expenses = summary["expenses"]
+        net_profit = total_sales - total_expenses
+        
+        summary_data = [
+            ['Metric', 'Value'],
+            ['Total Sales', f"₹{total_sales:,.2f}"],
+            ['Total Expenses', f"₹{total_expenses:,.2f}"],
+            ['Net Profit', f"₹{net_profit:,.2f}"],
+            ['Profit Margin', f"{(net_profit/total_sales*100) if total_sales > 0 else 0:.1f}%"],
+            ['Transactions', f"{summary['sale_count']:,} sales, {summary['expense_count']:,} expenses"]
+        ]
+        
+        summary_table = Table(summary_data)
+        summary_table.setStyle(SUMMARY_TABLE_STYLE)
+        
+        story.append(summary_table)
+        story.append(Spacer(1, 20))
+        
+        # Category Breakdown
+        story.append(Paragraph("Category Breakdown", styles['Heading2']))
+        
+        category_data = [['Type', 'Category', 'Transactions', 'Total (₹)']]
+        for transaction_type, category, total, count in summary["categories"]:
+            category_data.append([transaction_type.title(), category, f"{count:,}", f"{total:,.2f}"])
+        
+        category_table = Table(category_data)
+        category_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1E3A8A')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('ALIGN', (2, 1), (3, -1), 'RIGHT')
+        ]))
+        
+        story.append(category_table)
+        story.append(Spacer(1, 20))
+        
+        for kind in ("daily_trend", "expense_breakdown"):
+            if kind in charts:
+                story.append(_chart_image(charts[kind]))
+                story.append(Spacer(1, 12))
+    else:
+        story.append(Paragraph("No transactions in this period.", styles['Normal']))
+        story.append(Spacer(1, 20))
+    
+    # Transaction Summary
+    if detail:
+        story.append(Paragraph("All Transactions by Category", styles['Heading2']))
+        story.append(detail_table(transactions))
+        story.append(Spacer(1, 20))
+    elif transactions:
+        story.append(Paragraph("Recent Transactions", styles['Heading2']))
+        
+        trans_data = [['Date', 'Type', 'Category', 'Amount (₹)']]
+        for trans in transactions:
+            trans_data.append([
+                trans[6][:10] if trans[6] else '',
+                trans[2].title(),
+                trans[4],
+                f"{trans[3]:,.2f}"
+            ])
+        
+        trans_table = Table(trans_data)
+        trans_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3B82F6')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('ALIGN', (3, 1), (3, -1), 'RIGHT')
+        ]))
+        
+        story.append(trans_table)
+        story.append(Spacer(1, 20))
+    
+    # Inventory Summary
+    if inventory:
+        story.append(Paragraph("Inventory Summary", styles['Heading2']))
+        if "inventory_values" in charts:
+            story.append(_chart_image(charts["inventory_values"]))
+            story.append(Spacer(1, 12))
+        story.append(inventory_table(inventory))
+    
+    doc.build(story)
+    if output is None:
+        buffer.seek(0)
+    return buffer
+
+def write_excel_report(path, summary, transactions, inventory, date_range=None):
+    """Stream a workbook with Summary, Transactions and Inventory sheets to ``path``.
+
+    The workbook is write-only, so rows are serialized as they are
+    appended and ``transactions`` can be any iterable (a chunked cursor)
+    without the history ever being held in memory.
+    """
+    workbook = Workbook(write_only=True)
+    
+    sheet = workbook.create_sheet('Summary')
+    total_sales, total_expenses = summary["sales"], summary["expenses"]
+    net_profit = total_sales - total_expenses
+    sheet.append(['Metric', 'Value'])
+    if date_range is not None:
+        sheet.append(['Period', f"{date_range[0]:%Y-%m-%d} to {date_range[1]:%Y-%m-%d}"])
+    sheet.append(['Total Sales', total_sales])
+    sheet.append(['Total Expenses', total_expenses])
+    sheet.append(['Net Profit', net_profit])
+    sheet.append(['Profit Margin (%)', round(net_profit / total_sales * 100, 1) if total_sales > 0 else 0])
+    sheet.append(['Sales', summary["sale_count"]])
+    sheet.append(['Expenses', summary["expense_count"]])
+    sheet.append([])
+    sheet.append(['Type', 'Category', 'Total', 'Transactions'])
+    for row in summary["categories"]:
+        sheet.append(list(row))
+    
+    append_sheet_rows(workbook, 'Transactions', TRANSACTION_COLUMNS, transactions)
+    append_sheet_rows(workbook, 'Inventory', INVENTORY_COLUMNS, inventory)
+    
+    workbook.save(path)
+
+def append_sheet_rows(workbook, title, header, rows, max_rows=EXCEL_MAX_ROWS):
+    """Append ``rows`` under ``header``, continuing on "Title (2)", "Title (3)", ... whenever a sheet is full"""
+    sheet = workbook.create_sheet(title)
+    sheet.append(header)
+    used, part = 1, 1
+    for row in rows:
+        if used == max_rows:
+            part += 1
+            sheet = workbook.create_sheet(f"{title} ({part})")
+            sheet.append(header)
+            used = 1
+        sheet.append(row)
+        used += 1
+
+def report_charts(conn, spec, summary, inventory, chart_dir, start, end):
+    """Cached chart images of a PDF report keyed by kind; charts with nothing to plot are left out"""
+    data = {"daily_trend": daily_totals(conn, spec["business_id"], start, end) if summary["categories"] else None}
+    data["expense_breakdown"] = expense_breakdown(summary)
+    data["inventory_values"] = inventory_values(inventory)
+    return {kind: chart_path(chart_dir, kind, rows) for kind, rows in data.items() if rows}
+
+def render_report(db_path, spec, path, chart_dir=DEFAULT_CACHE_DIR / "charts"):
+    """Fetch a report's data and render it into ``path``"""
+    start, end = date.fromisoformat(spec["start"]), date.fromisoformat(spec["end"])
+    conn = sqlite3.connect(db_path)
+    try:
+        summary = fetch_summary(conn, spec["business_id"], start, end)
+        inventory = fetch_inventory(conn, spec["business_id"])
+        if spec["report_format"] != "PDF":
+            # The workbook lists the whole period, streamed from the cursor
+            transactions = iter_transactions(conn, spec["business_id"], start, end)
+            write_excel_report(path, summary, transactions, inventory, (start, end))
+            return
+        charts = report_charts(conn, spec, summary, inventory, chart_dir, start, end)
+        detail = spec.get("detail", False)
+        if detail:
+            # Every row, built into page tables straight from the cursor
+            transactions = iter_detail_rows(conn, spec["business_id"], start, end)
+        else:
+            # The summary PDF lists only the most recent rows
+            transactions = fetch_transactions(conn, spec["business_id"], start, end, PDF_TRANSACTION_ROWS)
+        generate_pdf_report(
+            spec["business_name"], summary, transactions, inventory, spec["period"], (start, end),
+            charts, detail, output=path
+        )
+    finally:
+        conn.close()
+
+def render_report_file(db_path, spec, path, chart_dir=DEFAULT_CACHE_DIR / "charts"):
+    """Process-pool task: render a business or portfolio report into ``path`` atomically; returns render seconds"""
+    start = time.perf_counter()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        if "user_id" in spec:
+            from modules.portfolio_reports import render_portfolio
+            render_portfolio(db_path, spec, tmp_path, chart_dir)
+        else:
+            render_report(db_path, spec, tmp_path, chart_dir)
+        os.replace(tmp_path, path)
+    finally:
+        # A failed render must not leave its partial file in the cache directory
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return time.perf_counter() - start
+
+# ============================================================
+# ARTIFACT CACHE & RENDER QUEUE
+# ============================================================
+def report_spec(business_id, business_name, report_format, period, start_date, end_date, detail=False):
+    """Plain-dict description of a report, picklable for worker processes"""
+    return {
+        "business_id": business_id,
+        "business_name": business_name,
+        "report_format": report_format,
+        "period": period,
+        "start": start_date.isoformat(),
+        "end": end_date.isoformat(),
+        # PDF only: list every transaction instead of the most recent ones
+        "detail": bool(detail) and report_format == "PDF",
+    }
+
+class ReportQueue:
+    """Renders reports on a process pool and caches the artifacts on disk.
+
+    ``cached`` answers from disk without touching the pool; ``submit``
+    returns the in-flight future for the same key when one exists, so
+    repeated clicks and concurrent users share a single render. Workers
+    are spawned (not forked) because the app process runs threads.
+    """
+
+    def __init__(self, cache_dir, db_path, max_workers=2, max_artifacts=200):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.chart_dir = self.cache_dir / "charts"
+        self.db_path = db_path
+        self.max_artifacts = max_artifacts
+        conn = sqlite3.connect(db_path)
+        try:
+            ensure_report_schema(conn)
+        finally:
+            conn.close()
+        self._pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context("spawn"))
+        self._in_flight = {}
+        self._guard = threading.Lock()
+
+    def artifact_path(self, spec, data_version):
+        key = json.dumps([spec, data_version, REPORT_LAYOUT_VERSION], sort_keys=True)
+        digest = hashlib.sha1(key.encode()).hexdigest()[:20]
+        owner = f"portfolio{spec['user_id']}" if "user_id" in spec else spec["business_id"]
+        return self.cache_dir / f"{owner}_{digest}.{REPORT_FORMATS[spec['report_format']]['extension']}"
+
+    def data_version(self, spec):
+        """Data fingerprint of the business, or the whole portfolio, a spec reports on"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            if "user_id" in spec:
+                from modules.portfolio_reports import portfolio_data_version
+                return portfolio_data_version(conn, spec["user_id"])
+            return report_data_version(conn, spec["business_id"])
+        finally:
+            conn.close()
+
+    def cached(self, spec, data_version=None):
+        """Path of the up-to-date artifact for ``spec``, or None"""
+        path = self.artifact_path(spec, data_version or self.data_version(spec))
+        if path.exists():
+            # Touch so pruning keeps recently served artifacts
+            os.utime(path)
+            return path
+        return None
+
+    def submit(self, spec, data_version=None):
+        """Future resolving to (path, render seconds) of the rendered artifact"""
+        path = self.artifact_path(spec, data_version or self.data_version(spec))
+        with self._guard:
+            future = self._in_flight.get(path)
+            if future is None:
+                future = self._pool.submit(render_report_file, self.db_path, spec, str(path), self.chart_dir)
+                self._in_flight[path] = future
+                future.add_done_callback(lambda _, path=path: self._finished(path))
+        return path, future
+
+    def _finished(self, path):
+        with self._guard:
+            self._in_flight.pop(path, None)
+        self._prune()
+
+    def _prune(self):
+        """Drop the least recently used artifacts beyond ``max_artifacts``"""
+        artifacts = sorted(
+            (p for p in self.cache_dir.iterdir() if p.suffix in (".pdf", ".xlsx")),
+            key=lambda p: p.stat().st_mtime
+        )
+        for path in artifacts[:-self.max_artifacts]:
+            path.unlink(missing_ok=True)
+        # A report shows up to three charts
+        prune_charts(self.chart_dir, 3 * self.max_artifacts)
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+def benchmark_detail_pdf(row_counts=(1_000, 10_000, 100_000), categories=12, seed=42):
+    """Render full-detail PDFs of synthetic periods; returns rows, seconds and bytes per size"""
+    import random
+    rng = random.Random(seed)
+    end = date.today()
+    start = end - timedelta(days=364)
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_rows in row_counts:
+            db_path = os.path.join(workdir, f"bench_{n_rows}.db")
+            conn = sqlite3.connect(db_path)
+            conn.execute('''CREATE TABLE transactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, business_id INTEGER NOT NULL,
+                transaction_type TEXT NOT NULL, amount REAL NOT NULL, category TEXT, description TEXT,
+                date TIMESTAMP, receipt_image BLOB, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+            conn.execute('''CREATE TABLE inventory (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, business_id INTEGER NOT NULL, item_name TEXT NOT NULL,
+                quantity INTEGER NOT NULL, unit_price REAL NOT NULL, reorder_level INTEGER DEFAULT 10,
+                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
+            conn.executemany(
+                '''INSERT INTO transactions (business_id, transaction_type, amount, category, description, date)
+                VALUES (1, ?, ?, ?, ?, ?)''',
+                (
+                    (
+                        rng.choice(("sale", "expense")), round(rng.uniform(10, 5000), 2),
+                        f"Category {rng.randrange(categories)}", f"Synthetic entry {i}",
+                        f"{start + timedelta(days=rng.randrange(365))} {rng.randrange(24):02d}:00:00",
+                    )
+                    for i in range(n_rows)
+                )
+            )
+            conn.executemany(
+                'INSERT INTO inventory (business_id, item_name, quantity, unit_price) VALUES (1, ?, ?, ?)',
+                [(f"Item {i}", rng.randrange(50), round(rng.uniform(5, 500), 2)) for i in range(200)]
+            )
+            conn.commit()
+            conn.close()
+            spec = report_spec(1, "Benchmark", "PDF", "Custom Range", start, end, detail=True)
+            path = os.path.join(workdir, f"bench_{n_rows}.pdf")
+            seconds = render_report_file(db_path, spec, path, os.path.join(workdir, "charts"))
+            results.append({"rows": n_rows, "seconds": round(seconds, 2), "bytes": os.path.getsize(path)})
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark full-detail PDF report generation")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    args = parser.parse_args()
+    for result in benchmark_detail_pdf(args.rows):
+        print(f"{result['rows']:>9,} rows: {result['seconds']:7.2f}s, {result['bytes'] / 1024 ** 2:6.1f} MB")
@@ -0,0 +1,102 @@
+"""Load generator for the scoring service.
+
+Run with ``python -m modules.scoring_loadgen --concurrency 32 --requests 5000``
+against a running ``python -m modules.scoring_service``. Reports client-side
+latency percentiles and throughput, then the service's own counters.
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+from modules.data_loader import DEFAULTS, FEATURE_SCHEMA
+
+def random_records(rng, n_records):
+    """Plausible feature rows: schema defaults jittered by +/-30% and clipped to range"""
+    records = []
+    for _ in range(n_records):
+        record = {}
+        for col, default in DEFAULTS.items():
+            spec = FEATURE_SCHEMA[col]
+            if spec["dtype"] == "category":
+                record[col] = default
+                continue
+            value = default * rng.uniform(0.7, 1.3)
+            low, high = spec.get("min"), spec.get("max")
+            value = min(max(value, low if low is not None else value), high if high is not None else value)
+            record[col] = int(round(value)) if spec["dtype"] == "int" else float(value)
+        records.append(record)
+    return records
+
+def _post(url, payload):
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+def run_load(base_url, concurrency=32, total_requests=2000, batch_size=1, seed=42):
+    """Fire ``total_requests`` requests from ``concurrency`` threads; returns client-side metrics"""
+    rng = np.random.default_rng(seed)
+    # Pre-generate payloads so the client does not bottleneck on record building
+    payloads = [random_records(rng, batch_size) for _ in range(min(total_requests, 500))]
+    latencies = []
+    errors = 0
+    counter = iter(range(total_requests))
+    guard = threading.Lock()
+
+    def worker():
+        nonlocal errors
+        while True:
+            with guard:
+                i = next(counter, None)
+            if i is None:
+                return
+            payload = payloads[i % len(payloads)]
+            start = time.perf_counter()
+            try:
+                _post(f"{base_url}/predict", payload if batch_size > 1 else payload[0])
+                elapsed = time.perf_counter() - start
+                with guard:
+                    latencies.append(elapsed)
+            except Exception:
+                with guard:
+                    errors += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "requests_per_sec": round(len(latencies) / wall, 1),
+        "rows_per_sec": round(len(latencies) * batch_size / wall, 1),
+        "latency_ms": {
+            "p50": round(float(np.percentile(latencies_ms, 50)), 3) if len(latencies_ms) else None,
+            "p99": round(float(np.percentile(latencies_ms, 99)), 3) if len(latencies_ms) else None,
+        },
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generator for the BizSight scoring service")
+    parser.add_argument("--url", default="http://127.0.0.1:8600")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=1, help="Rows per request")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    result = run_load(args.url, args.concurrency, args.requests, args.batch_size, args.seed)
+    print("Client:", json.dumps(result, indent=2))
+    with urllib.request.urlopen(f"{args.url}/stats") as response:
+        print("Service:", json.dumps(json.loads(response.read()), indent=2))
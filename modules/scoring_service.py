@@ -0,0 +1,300 @@
+"""Standalone HTTP/JSON profit scoring service.
+
+Run with ``python -m modules.scoring_service --port 8600``. Endpoints:
+
+* ``POST /predict`` with a JSON object (one row), a list of objects or
+  ``{"records": [...]}``; returns ``{"predictions": [...]}``.
+* ``GET /stats`` latency percentiles, throughput and batching counters.
+* ``GET /health`` liveness and model version.
+
+The active model registry version is served unless ``--version`` or
+``--model`` is given.
+
+Concurrent single-row requests are coalesced into micro-batches so the
+model runs one vectorized predict per batch instead of one per request.
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from modules.data_loader import validate_schema
+from modules.explainability import model_fingerprint
+
+DEFAULT_MODEL_PATH = "business_sales_profit_pipeline.pkl"
+DEFAULT_REGISTRY_DIR = "models"
+
+# ============================================================
+# LATENCY & THROUGHPUT STATS
+# ============================================================
+class ServiceStats:
+    """Rolling request latencies plus lifetime counters"""
+
+    def __init__(self, window=10_000):
+        self.started_at = time.time()
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.requests = 0
+        self.rows = 0
+        self.errors = 0
+        self.batches = 0
+        self._recent = deque()
+        self._guard = threading.Lock()
+
+    def record_request(self, seconds, rows):
+        now = time.time()
+        with self._guard:
+            self.latencies.append(seconds)
+            self.requests += 1
+            self.rows += rows
+            self._recent.append((now, rows))
+            while self._recent and self._recent[0][0] < now - 60:
+                self._recent.popleft()
+
+    def record_batch(self, rows):
+        with self._guard:
+            self.batches += 1
+            self.batch_sizes.append(rows)
+
+    def record_error(self):
+        with self._guard:
+            self.errors += 1
+
+    def snapshot(self):
+        """Counters and latency percentiles (milliseconds) as a JSON-ready dict"""
+        with self._guard:
+            latencies = np.array(self.latencies) * 1000
+            batch_sizes = np.array(self.batch_sizes)
+            uptime = time.time() - self.started_at
+            recent_rows = sum(rows for _, rows in self._recent)
+            recent_span = min(uptime, 60)
+            return {
+                "uptime_seconds": round(uptime, 1),
+                "requests": self.requests,
+                "rows": self.rows,
+                "errors": self.errors,
+                "batches": self.batches,
+                "mean_batch_rows": round(float(batch_sizes.mean()), 2) if len(batch_sizes) else 0,
+                "latency_ms": {
+                    "p50": round(float(np.percentile(latencies, 50)), 3) if len(latencies) else None,
+                    "p99": round(float(np.percentile(latencies, 99)), 3) if len(latencies) else None,
+                    "max": round(float(latencies.max()), 3) if len(latencies) else None,
+                },
+                "throughput_rows_per_sec": {
+                    "lifetime": round(self.rows / uptime, 1) if uptime > 0 else 0,
+                    "last_60s": round(recent_rows / recent_span, 1) if recent_span > 0 else 0,
+                },
+            }
+
+# ============================================================
+# MICRO-BATCHER
+# ============================================================
+class MicroBatcher:
+    """Coalesces small concurrent scoring requests into one predict call.
+
+    A single worker thread waits for the first pending request, then keeps
+    collecting until ``max_batch_rows`` rows are queued or ``max_wait_ms``
+    has passed, scores everything in one batch and resolves each
+    request's future with its slice of the predictions.
+    """
+
+    def __init__(self, score_fn, max_batch_rows=512, max_wait_ms=5, stats=None):
+        self.score_fn = score_fn
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self.stats = stats
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="scoring-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, records):
+        """Queue a list of records; returns a Future of their predictions"""
+        future = Future()
+        self._queue.put((records, future))
+        return future
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            n_rows = len(pending[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while n_rows < self.max_batch_rows:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                n_rows += len(item[0])
+            self._score(pending, n_rows)
+
+    def _score(self, pending, n_rows):
+        records = [record for items, _ in pending for record in items]
+        try:
+            predictions = self.score_fn(records)
+        except Exception as e:
+            if len(pending) == 1:
+                pending[0][1].set_exception(e)
+                return
+            # Score each request on its own so only the failing one gets the error
+            for items, future in pending:
+                try:
+                    future.set_result(self.score_fn(items))
+                except Exception as request_error:
+                    future.set_exception(request_error)
+            return
+        if self.stats is not None:
+            self.stats.record_batch(n_rows)
+        offset = 0
+        for items, future in pending:
+            future.set_result(predictions[offset:offset + len(items)])
+            offset += len(items)
+
+# ============================================================
+# SCORING SERVICE
+# ============================================================
+class ScoringService:
+    """Model wrapper shared by the HTTP handler threads"""
+
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, max_batch_rows=512, max_wait_ms=5):
+        self.model = joblib.load(model_path)
+        self.columns = self.model.feature_names_in_.tolist()
+        self.version = model_fingerprint(self.model)
+        self.max_batch_rows = max_batch_rows
+        self.stats = ServiceStats()
+        self.batcher = MicroBatcher(self.score_records, max_batch_rows, max_wait_ms, self.stats)
+
+    def score_records(self, records):
+        """Validate and score a list of feature dicts in one vectorized call"""
+        frame, _ = validate_schema(pd.DataFrame.from_records(records), self.columns)
+        return self.model.predict(frame).astype(float).tolist()
+
+    def predict(self, records):
+        """Score records, micro-batching small requests and running large ones directly"""
+        if len(records) >= self.max_batch_rows:
+            predictions = self.score_records(records)
+            self.stats.record_batch(len(records))
+            return predictions
+        return self.batcher.submit(records).result()
+
+# JSON values a feature may take; lists and objects would break the frame built from the records
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+def _parse_records(payload):
+    """Records of a request body; raises ValueError (a 400) before anything is queued"""
+    if isinstance(payload, dict) and "records" in payload:
+        payload = payload["records"]
+    if isinstance(payload, dict):
+        payload = [payload]
+    if not isinstance(payload, list) or not all(isinstance(record, dict) for record in payload):
+        raise ValueError("Expected a JSON object, a list of objects or {\"records\": [...]}")
+    if not payload:
+        raise ValueError("No records to score")
+    for i, record in enumerate(payload):
+        for field, value in record.items():
+            if not isinstance(value, SCALAR_TYPES):
+                raise ValueError(f"Record {i}: field {field!r} must be a number, string, boolean or null")
+    return payload
+
+class ScoringHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections under concurrent load
+    request_queue_size = 256
+
+def make_handler(service):
+    """HTTP request handler class bound to ``service``"""
+
+    class ScoringHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "ok", "model_version": service.version})
+            elif self.path == "/stats":
+                self._send_json(200, service.stats.snapshot())
+            else:
+                self._send_json(404, {"error": "Not found"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send_json(404, {"error": "Not found"})
+                return
+            start = time.perf_counter()
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                records = _parse_records(json.loads(self.rfile.read(length) or b"null"))
+            except ValueError as e:
+                service.stats.record_error()
+                self._send_json(400, {"error": str(e)})
+                return
+            try:
+                predictions = service.predict(records)
+            except Exception as e:
+                service.stats.record_error()
+                self._send_json(500, {"error": str(e)})
+                return
+            elapsed = time.perf_counter() - start
+            service.stats.record_request(elapsed, len(records))
+            self._send_json(200, {
+                "predictions": predictions,
+                "model_version": service.version,
+                "latency_ms": round(elapsed * 1000, 3),
+            })
+
+        def log_message(self, format, *args):
+            # Per-request access logs would dominate the cost of small requests
+            pass
+
+    return ScoringHandler
+
+def resolve_model_path(model_path=None, version=None, registry_dir=DEFAULT_REGISTRY_DIR):
+    """Explicit path, else the requested or active registry version, else the bundled pipeline"""
+    if model_path:
+        return model_path
+    from modules.model_registry import ModelRegistry
+    registry = ModelRegistry(registry_dir)
+    version = version or registry.active
+    if version:
+        return registry.path(version)
+    return DEFAULT_MODEL_PATH
+
+def serve(host="127.0.0.1", port=8600, model_path=DEFAULT_MODEL_PATH, max_batch_rows=512, max_wait_ms=5):
+    """Start the scoring service and block until interrupted"""
+    service = ScoringService(model_path, max_batch_rows, max_wait_ms)
+    server = ScoringHTTPServer((host, port), make_handler(service))
+    print(f"BizSight scoring service (model {service.version}) on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="BizSight AI profit scoring service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--model", help="Pipeline file to serve (overrides the registry)")
+    parser.add_argument("--version", help="Registry version to serve (default: the active one)")
+    parser.add_argument("--max-batch-rows", type=int, default=512)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    args = parser.parse_args()
+    serve(args.host, args.port, resolve_model_path(args.model, args.version), args.max_batch_rows, args.max_wait_ms)
@@ -0,0 +1,272 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.data_loader import FEATURE_SCHEMA, validate_schema
+
+# Simulator inputs that can be swept: label, slider bounds, default sweep
+# range and whether the parameter only takes integer values
+SIMULATION_PARAMETERS = {
+    "marketing_spend": {"label": "Marketing Spend (₹)", "min": 10000, "max": 200000, "range": (10000, 200000), "int": True},
+    "avg_daily_footfall": {"label": "Daily Footfall", "min": 50, "max": 1000, "range": (50, 1000), "int": True},
+    "conversion_rate": {"label": "Conversion Rate", "min": 0.1, "max": 0.5, "range": (0.1, 0.5), "int": False},
+    "avg_employee_salary": {"label": "Average Salary (₹)", "min": 15000, "max": 50000, "range": (15000, 50000), "int": True},
+    "rent_cost": {"label": "Monthly Rent (₹)", "min": 10000, "max": 100000, "range": (10000, 100000), "int": True},
+    "inventory_level": {"label": "Inventory Level", "min": 100, "max": 5000, "range": (100, 5000), "int": True},
+    "employee_count": {"label": "Employee Count", "min": 1, "max": 100, "range": (1, 100), "int": True},
+    "discount_percentage": {"label": "Discount Percentage", "min": 0, "max": 50, "range": (0, 50), "int": True},
+    "city_tier": {"label": "City Tier", "min": 1, "max": 3, "range": (1, 3), "int": True},
+}
+
+DISTRIBUTIONS = ["Normal", "Uniform", "Empirical"]
+
+# Levers a manager controls directly; the rest of the scenario is held fixed
+OPTIMIZABLE_PARAMETERS = ["marketing_spend", "employee_count", "discount_percentage",
+                          "avg_employee_salary", "inventory_level"]
+
+# Percentiles reported by the Monte Carlo summary
+MONTE_CARLO_PERCENTILES = [1, 5, 10, 25, 50, 75, 90, 95, 99]
+
+def parameter_label(param):
+    """Display label for a simulator parameter"""
+    if param in SIMULATION_PARAMETERS:
+        return SIMULATION_PARAMETERS[param]["label"]
+    return param.replace("_", " ").title()
+
+# ============================================================
+# SCENARIO SCORING
+# ============================================================
+def heuristic_profit(frame):
+    """Demonstration-mode profit (no model loaded), same formula as the single-scenario simulator"""
+    expected_sales = frame["avg_daily_footfall"] * frame["conversion_rate"] * frame["avg_transaction_value"] * 30
+    salary_cost = frame["avg_employee_salary"] * frame["employee_count"]
+    return (expected_sales * 0.2 - frame["marketing_spend"] - salary_cost).to_numpy(dtype=np.float64)
+
+def score_scenarios(model, frame, columns):
+    """Predicted profit for every row of a scenario frame in one batched call"""
+    aligned, _ = validate_schema(frame, columns)
+    if model:
+        return model.predict(aligned)
+    return heuristic_profit(aligned)
+
+def expected_sales(frame):
+    """Monthly sales implied by footfall, conversion and ticket size"""
+    return (frame["avg_daily_footfall"] * frame["conversion_rate"] * frame["avg_transaction_value"] * 30).to_numpy()
+
+# ============================================================
+# GRID SWEEP
+# ============================================================
+def sweep_values(param, low, high, steps):
+    """Evenly spaced sweep values; integer parameters are rounded and deduplicated"""
+    values = np.linspace(low, high, steps)
+    if SIMULATION_PARAMETERS.get(param, {}).get("int"):
+        values = np.unique(np.round(values)).astype(np.int64)
+    return values
+
+def build_grid(base_scenario, axes):
+    """One row per point of the cartesian product of ``axes`` over a base scenario.
+
+    ``axes`` maps parameter names to 1-D value arrays; every other column is
+    broadcast from ``base_scenario``. Row order is C order over the axes, so
+    results reshape directly to ``[len(v) for v in axes.values()]``.
+    """
+    mesh = np.meshgrid(*[np.asarray(values) for values in axes.values()], indexing="ij")
+    n_points = mesh[0].size
+    columns = {
+        col: np.full(n_points, value)
+        for col, value in base_scenario.items() if col not in axes
+    }
+    for param, values in zip(axes, mesh):
+        columns[param] = values.ravel()
+    return pd.DataFrame(columns)
+
+def run_grid_sweep(model, base_scenario, axes, columns):
+    """Score a full parameter grid; returns profit and sales arrays shaped like the grid"""
+    start = time.perf_counter()
+    grid = build_grid(base_scenario, axes)
+    profit = score_scenarios(model, grid, columns)
+    sales = expected_sales(grid)
+    seconds = time.perf_counter() - start
+
+    shape = [len(values) for values in axes.values()]
+    return {
+        "axes": {param: np.asarray(values) for param, values in axes.items()},
+        "profit": np.asarray(profit).reshape(shape),
+        "sales": sales.reshape(shape),
+        "n_points": len(grid),
+        "seconds": seconds,
+        "points_per_sec": len(grid) / seconds if seconds > 0 else 0.0,
+    }
+
+# ============================================================
+# MONTE CARLO SIMULATION
+# ============================================================
+def sample_parameter(rng, param, spec, n_samples, empirical_values=None):
+    """Draw ``n_samples`` values for one parameter from its distribution spec.
+
+    ``spec`` is {"dist": "Normal", "mean", "std"}, {"dist": "Uniform", "low",
+    "high"} or {"dist": "Empirical"}, which bootstraps ``empirical_values``.
+    Draws are clipped to the feature's valid range and integer features
+    are rounded.
+    """
+    if spec["dist"] == "Normal":
+        values = rng.normal(spec["mean"], spec["std"], n_samples)
+    elif spec["dist"] == "Uniform":
+        values = rng.uniform(spec["low"], spec["high"], n_samples)
+    elif spec["dist"] == "Empirical":
+        if empirical_values is None or len(empirical_values) == 0:
+            raise ValueError(f"No dataset values available for '{param}'")
+        values = rng.choice(np.asarray(empirical_values, dtype=np.float64), n_samples)
+    else:
+        raise ValueError(f"Unknown distribution '{spec['dist']}'")
+
+    schema = FEATURE_SCHEMA.get(param, {})
+    low, high = schema.get("min"), schema.get("max")
+    if low is not None or high is not None:
+        values = np.clip(values, low, high)
+    if schema.get("dtype") == "int":
+        values = np.round(values).astype(np.int64)
+    return values
+
+def run_monte_carlo(model, base_scenario, distributions, columns, n_samples,
+                    seed=42, empirical=None, batch_size=100_000):
+    """Sample scenarios from per-parameter distributions and score them in batches.
+
+    All draws are made up front from one seeded generator, so results depend
+    only on the seed and inputs, not on ``batch_size``. Scoring runs in
+    batches to bound the memory of the aligned frame.
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    empirical = empirical or {}
+    samples = {
+        param: sample_parameter(rng, param, spec, n_samples, empirical.get(param))
+        for param, spec in distributions.items()
+    }
+    fixed = {col: value for col, value in base_scenario.items() if col not in samples}
+
+    profit = np.empty(n_samples, dtype=np.float64)
+    sales = np.empty(n_samples, dtype=np.float64)
+    for batch_start in range(0, n_samples, batch_size):
+        batch_stop = min(batch_start + batch_size, n_samples)
+        batch = pd.DataFrame({
+            **{col: np.full(batch_stop - batch_start, value) for col, value in fixed.items()},
+            **{param: values[batch_start:batch_stop] for param, values in samples.items()},
+        })
+        profit[batch_start:batch_stop] = score_scenarios(model, batch, columns)
+        sales[batch_start:batch_stop] = expected_sales(batch)
+    seconds = time.perf_counter() - start
+
+    counts, edges = np.histogram(profit, bins=100)
+    return {
+        "n_samples": n_samples,
+        "seed": seed,
+        "mean": float(profit.mean()),
+        "std": float(profit.std()),
+        "percentiles": dict(zip(MONTE_CARLO_PERCENTILES, np.percentile(profit, MONTE_CARLO_PERCENTILES))),
+        "prob_loss": float((profit < 0).mean()),
+        "mean_sales": float(sales.mean()),
+        "histogram": (counts, edges),
+        "seconds": seconds,
+        "samples_per_sec": n_samples / seconds if seconds > 0 else 0.0,
+    }
+
+# ============================================================
+# BUDGET-CONSTRAINED OPTIMIZER
+# ============================================================
+def budget_spend(frame):
+    """Monthly spend counted against the optimizer budget: marketing plus payroll"""
+    return (frame["marketing_spend"] + frame["employee_count"] * frame["avg_employee_salary"]).to_numpy(dtype=np.float64)
+
+def _candidate_frame(base_scenario, names, candidates):
+    n_rows = len(candidates)
+    columns = {col: np.full(n_rows, value) for col, value in base_scenario.items() if col not in names}
+    for idx, name in enumerate(names):
+        columns[name] = candidates[:, idx]
+    return pd.DataFrame(columns)
+
+def optimize_scenario(model, base_scenario, bounds, columns, budget,
+                      max_evaluations=20_000, population=1_000, elite_fraction=0.1, seed=42):
+    """Maximize predicted profit over ``bounds`` subject to budget_spend <= ``budget``.
+
+    Cross-entropy search: each iteration draws a population from a Gaussian
+    over the parameters, scores it in one batched predict, and refits the
+    Gaussian to the best feasible candidates. Stops when ``max_evaluations``
+    model evaluations are used or the search distribution collapses.
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    names = list(bounds)
+    low = np.array([bounds[name][0] for name in names], dtype=np.float64)
+    high = np.array([bounds[name][1] for name in names], dtype=np.float64)
+    span = np.where(high > low, high - low, 1.0)
+    is_int = np.array([FEATURE_SCHEMA.get(name, {}).get("dtype") == "int" for name in names])
+
+    # The current scenario is the first candidate, so the result is never worse when it is feasible
+    current = np.array([[base_scenario[name] for name in names]], dtype=np.float64)
+    current_frame = _candidate_frame(base_scenario, names, current)
+    baseline_profit = float(score_scenarios(model, current_frame, columns)[0])
+    baseline_feasible = bool(budget_spend(current_frame)[0] <= budget)
+    evaluations = 1
+
+    best_profit, best_values = (baseline_profit, current[0]) if baseline_feasible else (-np.inf, None)
+    mean = np.clip(current[0], low, high)
+    std = span / 2
+    n_elite = max(2, int(population * elite_fraction))
+    trace = []
+
+    while evaluations < max_evaluations:
+        n_candidates = min(population, max_evaluations - evaluations)
+        candidates = np.clip(rng.normal(mean, std, (n_candidates, len(names))), low, high)
+        candidates[:, is_int] = np.round(candidates[:, is_int])
+
+        frame = _candidate_frame(base_scenario, names, candidates)
+        profit = np.asarray(score_scenarios(model, frame, columns), dtype=np.float64)
+        feasible = budget_spend(frame) <= budget
+        evaluations += n_candidates
+
+        if feasible.any():
+            fitness = np.where(feasible, profit, -np.inf)
+            order = np.argsort(fitness)[::-1][:min(n_elite, int(feasible.sum()))]
+            if fitness[order[0]] > best_profit:
+                best_profit, best_values = float(fitness[order[0]]), candidates[order[0]]
+            elite = candidates[order]
+        else:
+            # Nothing affordable yet: move towards the cheapest candidates
+            elite = candidates[np.argsort(budget_spend(frame))[:n_elite]]
+
+        # Smoothed refit keeps the search from collapsing on one lucky batch
+        mean = 0.7 * elite.mean(axis=0) + 0.3 * mean
+        std = np.maximum(0.7 * elite.std(axis=0) + 0.3 * std, span * 1e-3)
+
+        trace.append({
+            "iteration": len(trace) + 1,
+            "evaluations": evaluations,
+            "best_profit": best_profit if np.isfinite(best_profit) else np.nan,
+            "elite_mean_profit": float(profit[order].mean()) if feasible.any() else np.nan,
+            "feasible_pct": float(feasible.mean() * 100),
+        })
+        if np.all(std <= span * 1e-3):
+            break
+
+    seconds = time.perf_counter() - start
+    best_scenario = None
+    best_spend = None
+    if best_values is not None:
+        best_scenario = {
+            name: (int(value) if integer else float(value))
+            for name, value, integer in zip(names, best_values, is_int)
+        }
+        best_spend = float(budget_spend(_candidate_frame(base_scenario, names, best_values[None, :]))[0])
+    return {
+        "best_scenario": best_scenario,
+        "best_profit": best_profit if best_values is not None else None,
+        "best_spend": best_spend,
+        "baseline_profit": baseline_profit,
+        "baseline_feasible": baseline_feasible,
+        "trace": pd.DataFrame(trace),
+        "evaluations": evaluations,
+        "seconds": seconds,
+        "evals_per_sec": evaluations / seconds if seconds > 0 else 0.0,
+    }
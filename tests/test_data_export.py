@@ -0,0 +1,29 @@
+import pandas as pd
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import pytest
+
+from modules.data_export import export_frame
+
+@pytest.fixture
+def frame():
+    """Object-dtype string key, plus columns that are null in the whole first chunk"""
+    return pd.DataFrame({
+        "business_id": [f"B{i}" for i in range(25)],
+        "monthly_sales": [float(i) for i in range(25)],
+        "late_strings": [None] * 20 + ["a"] * 5,
+        "all_null": [None] * 25,
+    })
+
+@pytest.mark.parametrize("fmt", ["Parquet", "Feather"])
+def test_arrow_export_keeps_object_columns(frame, fmt, tmp_path):
+    path = tmp_path / "export"
+    stats = export_frame(frame, path, fmt, chunk_rows=10)
+    table = pq.read_table(path) if fmt == "Parquet" else feather.read_table(path)
+    assert stats["rows"] == 25
+    assert str(table.schema.field("business_id").type) == "string"
+    assert table.to_pandas().equals(frame)
+
+def test_empty_frame_exports(frame, tmp_path):
+    stats = export_frame(frame.iloc[:0], tmp_path / "empty.parquet", "Parquet")
+    assert stats["rows"] == 0